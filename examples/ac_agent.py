@@ -50,7 +50,7 @@ class ActorCritic(object):
 
 
 if __name__ == '__main__':
-    environment = env.BusterEnv()
+    environment = env.BusterEnv(render_mode='human')
     environment.seed(123)
 
     # state normalization
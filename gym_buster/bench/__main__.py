@@ -0,0 +1,7 @@
+import sys
+
+from gym_buster.bench.throughput import Throughput
+
+
+if __name__ == '__main__':
+    sys.exit(Throughput.main())
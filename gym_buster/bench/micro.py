@@ -0,0 +1,250 @@
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from gym_buster.envs.buster_env import BusterEnv
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.entity import Entity
+from gym_buster.envs.game_classes.math_utils import MathUtility
+from gym_buster.bench.results import Results
+
+
+class MicroBenchmark:
+    """
+    Class that will time the hot functions of the game on fixed seeded scenarios
+
+    A scenario is a game of BusterEnv with a given number of busters and ghosts, played a few steps with seeded actions
+    so every run times the same positions. Functions that change the game are given the same game at every call: the
+    world state is restored before each call, out of the measured time.
+
+    Run it with : python -m gym_buster.bench.micro --output results.json --compare previous.json
+    """
+
+    KIND = 'micro'
+    KEYS = ('benchmark', 'buster_number', 'ghost_number')
+
+    # (buster_number, ghost_number) of each scenario
+    SCENARIOS = ((3, 15), (3, 100), (10, 400))
+
+    # Steps played before the measures so busters are spread on the map
+    WARMUP_STEPS = 20
+
+    # ------------------ TIMING FUNCTIONS -------------------- #
+    @staticmethod
+    def _time(function, setup, number):
+        """
+        Function that times calls of a function
+        :param function: the function, called without argument
+        :param setup: a function called before each call and not timed, nothing if not given
+        :param number: the number of calls
+        :return: the total time of the calls in nanoseconds
+        """
+        if setup is None:
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                function()
+            return time.perf_counter_ns() - start
+
+        elapsed = 0
+        for _ in range(number):
+            setup()
+            start = time.perf_counter_ns()
+            function()
+            elapsed += time.perf_counter_ns() - start
+        return elapsed
+
+    @staticmethod
+    def measure(function, setup=None, repeat=5, min_time=0.05):
+        """
+        Function that times a function, the number of calls of a repeat grows until it lasts min_time
+        :param function: the function, called without argument
+        :param setup: a function called before each call and not timed, nothing if not given
+        :param repeat: the number of repeats
+        :param min_time: the minimum duration of a repeat in seconds
+        :return: the tuple (number of calls of a repeat, list of the time of a call in each repeat in nanoseconds)
+        """
+        number = 1
+        elapsed = MicroBenchmark._time(function, setup, number)
+        while elapsed < min_time * 1e9:
+            number *= 10 if elapsed < min_time * 1e8 else 2
+            elapsed = MicroBenchmark._time(function, setup, number)
+
+        times = [elapsed / number]
+        for _ in range(repeat - 1):
+            times.append(MicroBenchmark._time(function, setup, number) / number)
+        return number, times
+
+    # ------------------ SCENARIO FUNCTIONS -------------------- #
+    @staticmethod
+    def random_moves(rng, buster_number):
+        """
+        Function that gives MOVE commands to random places of the map
+        :param rng: the numpy random generator
+        :param buster_number: the number of busters
+        :return: an array of shape (buster_number, Constants.COMMAND_SIZE), see Commands
+        """
+        commands = np.zeros((buster_number, Constants.COMMAND_SIZE), dtype=np.int64)
+        commands[:, 0] = Constants.COMMAND_MOVE
+        commands[:, 1] = rng.integers(0, Constants.MAP_WIDTH, buster_number, endpoint=True)
+        commands[:, 2] = rng.integers(0, Constants.MAP_HEIGHT, buster_number, endpoint=True)
+        return commands
+
+    @staticmethod
+    def scenario(buster_number, ghost_number, seed=0):
+        """
+        Function that prepares a game with seeded positions and actions
+        :param buster_number: the number of busters in each team
+        :param ghost_number: the number of ghosts
+        :param seed: the seed of the game and of the actions
+        :return: the environment after WARMUP_STEPS steps
+        """
+        environment = BusterEnv(buster_number, ghost_number)
+        environment.seed(seed)
+        environment.action_space.seed(seed)
+        environment.reset()
+
+        # Team 1 moves randomly so the scenarios do not change with the AI
+        rng = np.random.default_rng(seed)
+        for _ in range(MicroBenchmark.WARMUP_STEPS):
+            commands_0 = environment._transform_action(environment.action_space.sample())
+            environment._run_step(commands_0, MicroBenchmark.random_moves(rng, buster_number))
+            environment.state = environment._get_state()
+        environment.observation = environment._make_observation()
+        return environment
+
+    @staticmethod
+    def math_benchmarks():
+        """
+        Function that gives the benchmarks of MathUtility, they do not depend on the number of entities
+        :return: a list of tuples (name, function, setup)
+        """
+        return [
+            ('MathUtility.distance', lambda: MathUtility.distance(1200, 3400, 5600, 7800), None),
+            ('MathUtility.opposite_direction',
+             lambda: MathUtility.opposite_direction(8000, 4500, 7000, 4000, Constants.GHOST_RUN_WAY), None),
+            ('MathUtility.limit_coordinates', lambda: MathUtility.limit_coordinates(-120, 9200), None),
+        ]
+
+    @staticmethod
+    def game_benchmarks(environment, rng):
+        """
+        Function that gives the benchmarks of a game
+        :param environment: the environment given by scenario(...)
+        :param rng: the numpy random generator of the commands of the round
+        :return: a list of tuples (name, function, setup)
+        """
+        buster = environment.buster_team0[0]
+        busters = environment.buster_team0 + environment.buster_team1
+        commands_0 = environment._transform_action(environment.action_space.sample())
+        commands_1 = MicroBenchmark.random_moves(rng, environment.buster_number)
+        snapshot = environment.get_snapshot()
+
+        # A ghost in the vision range of a buster runs away at every call
+        ghost = environment.ghosts[0]
+        ghost.x, ghost.y = MathUtility.limit_coordinates(buster.x + 1000, buster.y + 1000)
+        ghost_snapshot = environment.world.snapshot()
+        environment.restore(snapshot)
+
+        return [
+            ('Entity.get_closest', lambda: buster.get_closest(environment.ghosts), None),
+            ('Entity.get_entities_visible',
+             lambda: Entity.get_entities_visible(environment.buster_team0, environment.ghosts), None),
+            ('Ghost.run_away', lambda: ghost.run_away(busters), lambda: environment.world.restore(ghost_snapshot)),
+            ('Buster.buster_command', lambda: buster.buster_command('MOVE 8000 4500'),
+             lambda: environment.world.restore(snapshot['world'])),
+            ('BusterEnv._make_observation', environment._make_observation, None),
+            ('BusterEnv._run_step', lambda: environment._run_step(commands_0, commands_1),
+             lambda: environment.restore(snapshot)),
+        ]
+
+    # ------------------ RUN FUNCTIONS -------------------- #
+    @staticmethod
+    def run(scenarios=SCENARIOS, seed=0, repeat=5, min_time=0.05, only=None):
+        """
+        Function that runs every benchmark
+        :param scenarios: the tuples (buster_number, ghost_number) of the scenarios
+        :param seed: the seed of the scenarios
+        :param repeat: the number of repeats of each benchmark
+        :param min_time: the minimum duration of a repeat in seconds
+        :param only: a text the names of the benchmarks to run contain, every benchmark if not given
+        :return: a list of result rows
+        """
+        def rows(benchmarks, buster_number, ghost_number):
+            result = []
+            for name, function, setup in benchmarks:
+                if only is not None and only not in name:
+                    continue
+                number, times = MicroBenchmark.measure(function, setup, repeat, min_time)
+                result.append({'benchmark': name, 'buster_number': buster_number, 'ghost_number': ghost_number,
+                               'calls': number, 'repeat': repeat, 'min_ns': min(times),
+                               'median_ns': statistics.median(times)})
+            return result
+
+        results = rows(MicroBenchmark.math_benchmarks(), None, None)
+        for buster_number, ghost_number in scenarios:
+            environment = MicroBenchmark.scenario(buster_number, ghost_number, seed)
+            benchmarks = MicroBenchmark.game_benchmarks(environment, np.random.default_rng(seed + 1))
+            results += rows(benchmarks, buster_number, ghost_number)
+            environment.close()
+        return results
+
+    @staticmethod
+    def compare(old, new, threshold=0.1):
+        """
+        Function that compares the median times of two results
+        :param old: the reference results
+        :param new: the results to check
+        :param threshold: the relative slow down over which a benchmark is flagged as a regression
+        :return: the comparison rows, see Results.compare, with a 'regression' flag
+        """
+        comparison = Results.compare(old, new, MicroBenchmark.KEYS, 'median_ns')
+        for line in comparison:
+            line['regression'] = line['ratio'] > 1 + threshold
+        return comparison
+
+    @staticmethod
+    def main(argv=None):
+        """
+        Function that runs the benchmarks from the command line
+        :param argv: the arguments, the ones of the command line if not given
+        :return: the exit status, 1 if a regression is found
+        """
+        parser = argparse.ArgumentParser(prog='python -m gym_buster.bench.micro',
+                                         description='Time the hot functions of the game')
+        parser.add_argument('--output', '-o', help='json file to save the results in')
+        parser.add_argument('--compare', '-c', help='json file of previous results to compare with')
+        parser.add_argument('--label', help='name of the benchmarked version saved with the results')
+        parser.add_argument('--scenario', '-s', action='append',
+                            help='BUSTERSxGHOSTS, can be repeated (default: 3x15 3x100 10x400)')
+        parser.add_argument('--only', help='run the benchmarks whose name contains this text')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--min-time', type=float, default=0.05, help='minimum duration of a repeat in seconds')
+        parser.add_argument('--threshold', type=float, default=0.1, help='relative slow down flagged as regression')
+        arguments = parser.parse_args(argv)
+
+        scenarios = MicroBenchmark.SCENARIOS
+        if arguments.scenario:
+            scenarios = [tuple(int(number) for number in scenario.split('x')) for scenario in arguments.scenario]
+
+        rows = MicroBenchmark.run(scenarios, arguments.seed, arguments.repeat, arguments.min_time, arguments.only)
+        print(Results.format_table(rows, MicroBenchmark.KEYS + ('calls', 'min_ns', 'median_ns')))
+
+        if arguments.output:
+            Results.save(arguments.output, MicroBenchmark.KIND, rows, arguments.label)
+
+        if arguments.compare:
+            old = Results.load(arguments.compare)
+            comparison = MicroBenchmark.compare(old, {'rows': rows}, arguments.threshold)
+            print()
+            print(Results.format_table(comparison, MicroBenchmark.KEYS + ('old', 'new', 'ratio', 'regression')))
+            if any(line['regression'] for line in comparison):
+                return 1
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(MicroBenchmark.main())
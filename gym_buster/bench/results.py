@@ -0,0 +1,134 @@
+import csv
+import json
+import platform
+import time
+
+import numpy as np
+
+
+class Results:
+    """
+    Class that will save, load and compare benchmark results
+
+    A result file holds the kind of benchmark, a description of the machine and the versions used, and a list of rows.
+    Files are written in json, or in csv when their name ends with .csv : the kind and the description are then
+    written first in comment lines starting with #. Two rows of different files are compared when their key fields are
+    equal.
+    """
+
+    @staticmethod
+    def metadata(label=None):
+        """
+        Function that describes where the results come from
+        :param label: a free text naming the version benchmarked, a commit for instance
+        :return: a dictionary
+        """
+        return {
+            'label': label,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'system': platform.system(),
+        }
+
+    @staticmethod
+    def save(path, kind, rows, label=None):
+        """
+        Function that writes results in a json or csv file
+        :param path: the path of the file
+        :param kind: the kind of benchmark
+        :param rows: a list of dictionaries
+        :param label: a free text naming the version benchmarked
+        :return: the saved results
+        """
+        results = {'kind': kind, 'metadata': Results.metadata(label), 'rows': rows}
+        with open(path, 'w', newline='') as file:
+            if not path.endswith('.csv'):
+                json.dump(results, file, indent=2)
+                return results
+
+            file.write('# kind: ' + kind + '\n')
+            for key, value in results['metadata'].items():
+                file.write('# ' + key + ': ' + ('' if value is None else str(value)) + '\n')
+            columns = []
+            for row in rows:
+                columns += [column for column in row if column not in columns]
+            writer = csv.DictWriter(file, columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        return results
+
+    @staticmethod
+    def load(path):
+        """
+        Function that reads results written by save(...)
+        :param path: the path of the file
+        :return: a dictionary with the kind, metadata and rows
+        """
+        with open(path, newline='') as file:
+            if not path.endswith('.csv'):
+                return json.load(file)
+            lines = file.read().splitlines()
+
+        def value(text):
+            if text == '':
+                return None
+            for kind in (int, float):
+                try:
+                    return kind(text)
+                except ValueError:
+                    pass
+            return {'True': True, 'False': False}.get(text, text)
+
+        metadata = {}
+        for line in lines:
+            if line.startswith('# '):
+                key, _, text = line[2:].partition(': ')
+                metadata[key] = text or None
+        kind = metadata.pop('kind', None)
+        rows = [{key: value(text) for key, text in row.items()}
+                for row in csv.DictReader(line for line in lines if not line.startswith('#'))]
+        return {'kind': kind, 'metadata': metadata, 'rows': rows}
+
+    @staticmethod
+    def compare(old, new, keys, metric):
+        """
+        Function that pairs the rows of two results and gives the change of a metric
+        :param old: the reference results
+        :param new: the results to check
+        :param keys: the names of the fields identifying a row
+        :param metric: the name of the compared field
+        :return: a list of dictionaries with the key fields, 'old', 'new' and 'ratio' (new / old), for the rows found in
+        both results with a value of the metric (a failed configuration has none)
+        """
+        reference = {tuple(row.get(key) for key in keys): row for row in old['rows']}
+        comparison = []
+        for row in new['rows']:
+            key = tuple(row.get(key) for key in keys)
+            if key not in reference or row.get(metric) is None or reference[key].get(metric) is None:
+                continue
+            before = reference[key][metric]
+            after = row[metric]
+            line = dict(zip(keys, key))
+            line.update({'old': before, 'new': after, 'ratio': after / before if before else float('inf')})
+            comparison.append(line)
+        return comparison
+
+    @staticmethod
+    def format_table(rows, columns):
+        """
+        Function that lays out rows in aligned text columns
+        :param rows: a list of dictionaries
+        :param columns: the names of the fields to show
+        :return: a string
+        """
+        def text(value):
+            if isinstance(value, float):
+                return '{:.3f}'.format(value) if abs(value) < 1000 else '{:.0f}'.format(value)
+            return '-' if value is None else str(value)
+
+        cells = [list(columns)] + [[text(row.get(column)) for column in columns] for row in rows]
+        widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+        return '\n'.join('  '.join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells)
@@ -0,0 +1,318 @@
+import argparse
+import functools
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from gym_buster.envs.buster_env import BusterEnv
+from gym_buster.envs.batched_buster_env import BatchedBusterEnv
+from gym_buster.envs.subproc_buster_env import SubprocBusterEnv
+from gym_buster.envs.game_classes.game_config import GameConfig
+from gym_buster.bench.micro import MicroBenchmark
+from gym_buster.bench.results import Results
+
+
+class Throughput:
+    """
+    Class that will measure the speed of whole headless games
+
+    A configuration is an engine, the numbers of busters and ghosts of a game, the size of the map, the number of games
+    stepped together and the number of worker processes. The engines are :
+        - single : a list of BusterEnv stepped one after the other in the process
+        - batched : one BatchedBusterEnv
+        - subproc : a SubprocBusterEnv, its BusterEnv are stepped in worker processes
+    Team 0 plays seeded random actions, team 1 is played by the simple AI of the environments. Games are reset as soon
+    as they are over. Each configuration is run in its own process so its peak memory is not hidden by the previous one.
+
+    Run it with : python -m gym_buster.bench --ghosts 15,150,1500 --batch 1,16 --output results.csv
+    """
+
+    KIND = 'throughput'
+    KEYS = ('engine', 'buster_number', 'ghost_number', 'map_width', 'map_height', 'batch_size', 'workers')
+
+    # Compared metrics, True when a higher value is better
+    METRICS = {'steps_per_s': True, 'resets_per_s': True, 'p50_us': False, 'p99_us': False, 'peak_rss_kb': False}
+
+    ENGINES = ('single', 'batched', 'subproc')
+
+    # Number of different actions played in turn, sampled before the measures
+    ACTION_POOL = 64
+
+    # ------------------ ENVIRONMENT FUNCTIONS -------------------- #
+    @staticmethod
+    def _engine(config):
+        """
+        Function that creates the games of a configuration
+        :param config: the configuration, see run(...)
+        :return: the tuple (step, reset, close) of functions, step takes the actions of the batch and gives the number
+        of games over
+        """
+        batch_size = config['batch_size']
+        game_config = GameConfig(map_width=config['map_width'], map_height=config['map_height'])
+        env_fn = functools.partial(BusterEnv, config['buster_number'], config['ghost_number'],
+                                   max_steps=config['max_steps'], config=game_config)
+
+        if config['engine'] == 'single':
+            envs = [env_fn() for _ in range(batch_size)]
+            for i, env in enumerate(envs):
+                env.seed(config['seed'] + i)
+
+            def step(actions):
+                over = 0
+                for env, action in zip(envs, actions):
+                    _, _, done, _ = env.step(action)
+                    if done:
+                        env.reset()
+                        over += 1
+                return over
+
+            def reset():
+                for env in envs:
+                    env.reset()
+
+            def close():
+                for env in envs:
+                    env.close()
+
+            return step, reset, close
+
+        if config['engine'] == 'batched':
+            env = BatchedBusterEnv(batch_size, config['buster_number'], config['ghost_number'], config['max_steps'],
+                                   config=game_config)
+        elif config['engine'] == 'subproc':
+            env = SubprocBusterEnv(batch_size, config['workers'], env_fn)
+        else:
+            raise ValueError("Unknown engine : " + str(config['engine']))
+        env.seed(config['seed'])
+
+        def step(actions):
+            _, _, dones, _ = env.step(actions)
+            return int(np.count_nonzero(dones))
+
+        return step, env.reset, env.close
+
+    # ------------------ RUN FUNCTIONS -------------------- #
+    @staticmethod
+    def peak_rss():
+        """
+        Function that gives the peak resident memory of the process and of its largest finished child process
+        :return: the tuple (process, child) in kilobytes, None where it is not available
+        """
+        if resource is None:
+            return None, None
+        return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+    @staticmethod
+    def run(config):
+        """
+        Function that measures one configuration in the process
+        :param config: a dictionary with engine, buster_number, ghost_number, batch_size, workers, max_steps, steps
+        (measured calls to step), resets (measured calls to reset), warmup (calls to step before the measures) and seed
+        :return: a result row
+        """
+        row = {key: config.get(key) for key in Throughput.KEYS}
+        step, reset, close = Throughput._engine(config)
+        try:
+            rng = np.random.default_rng(config['seed'])
+            pool = rng.random((Throughput.ACTION_POOL, config['batch_size'], 4 * config['buster_number']))
+            reset()
+
+            start = time.perf_counter_ns()
+            for _ in range(config['resets']):
+                reset()
+            reset_time = time.perf_counter_ns() - start
+
+            for i in range(config['warmup']):
+                step(pool[i % len(pool)])
+
+            latencies = np.zeros(config['steps'], dtype=np.int64)
+            episodes = 0
+            for i in range(config['steps']):
+                actions = pool[i % len(pool)]
+                start = time.perf_counter_ns()
+                episodes += step(actions)
+                latencies[i] = time.perf_counter_ns() - start
+        finally:
+            close()
+
+        games = config['batch_size']
+        peak_rss, peak_rss_workers = Throughput.peak_rss()
+        row.update({
+            'steps': config['steps'] * games,
+            'episodes': episodes,
+            'steps_per_s': config['steps'] * games / max(latencies.sum(), 1) * 1e9,
+            'resets_per_s': config['resets'] * games / max(reset_time, 1) * 1e9,
+            'p50_us': float(np.percentile(latencies, 50)) / 1e3,
+            'p99_us': float(np.percentile(latencies, 99)) / 1e3,
+            'peak_rss_kb': peak_rss,
+            'peak_rss_workers_kb': peak_rss_workers,
+        })
+        return row
+
+    @staticmethod
+    def _run_child(connection, config):
+        """
+        Function run in the process of a configuration, it sends back the result row or the error
+        :param connection: the pipe end of the child process
+        :param config: the configuration
+        """
+        try:
+            connection.send(Throughput.run(config))
+        except Exception:
+            connection.send({'error': traceback.format_exc()})
+        finally:
+            connection.close()
+
+    @staticmethod
+    def run_isolated(config):
+        """
+        Function that measures one configuration in a new process
+        :param config: the configuration, see run(...)
+        :return: a result row, with an 'error' field if the configuration failed
+        """
+        context = multiprocessing.get_context('spawn')
+        connection, child_connection = context.Pipe(duplex=False)
+        process = context.Process(target=Throughput._run_child, args=(child_connection, config))
+        process.start()
+        child_connection.close()
+        try:
+            row = connection.recv()
+        except EOFError:
+            row = {'error': 'the process of the configuration stopped with code ' + str(process.exitcode)}
+        process.join()
+
+        if 'error' in row:
+            failed = {key: config.get(key) for key in Throughput.KEYS}
+            failed['error'] = row['error'].strip().splitlines()[-1]
+            return failed
+        return row
+
+    @staticmethod
+    def configurations(engines, buster_numbers, ghost_numbers, map_sizes, batch_sizes, workers, **options):
+        """
+        Function that gives every combination of the swept values
+        :param engines: the engines
+        :param buster_numbers: the numbers of busters in each team
+        :param ghost_numbers: the numbers of ghosts
+        :param map_sizes: the tuples (width, height) of the maps
+        :param batch_sizes: the numbers of games stepped together
+        :param workers: the numbers of worker processes of the subproc engine, one per core if 0
+        :param options: the other fields of the configurations (max_steps, steps, resets, warmup, seed)
+        :return: a list of configurations
+        """
+        configs = []
+        workers = workers if 'subproc' in engines else [0]
+        for engine, buster_number, ghost_number, map_size, batch_size, worker_number in itertools.product(
+                engines, buster_numbers, ghost_numbers, map_sizes, batch_sizes, workers):
+            map_width, map_height = map_size
+            if engine != 'subproc':
+                worker_number = 0
+            elif worker_number == 0:
+                worker_number = min(os.cpu_count() or 1, batch_size)
+            config = dict(options, engine=engine, buster_number=buster_number, ghost_number=ghost_number,
+                          map_width=map_width, map_height=map_height, batch_size=batch_size, workers=worker_number)
+            if config not in configs:
+                configs.append(config)
+        return configs
+
+    @staticmethod
+    def compare(old, new, threshold=0.1):
+        """
+        Function that compares every metric of two results
+        :param old: the reference results
+        :param new: the results to check
+        :param threshold: the relative change in the wrong direction over which a metric is flagged as a regression
+        :return: the comparison rows, see Results.compare, with 'metric' and 'regression' fields
+        """
+        comparison = []
+        for metric, higher_better in Throughput.METRICS.items():
+            for line in Results.compare(old, new, Throughput.KEYS, metric):
+                line['metric'] = metric
+                if higher_better:
+                    line['regression'] = line['ratio'] < 1 - threshold
+                else:
+                    line['regression'] = line['ratio'] > 1 + threshold
+                comparison.append(line)
+        return comparison
+
+    @staticmethod
+    def main(argv=None):
+        """
+        Function that runs the benchmark from the command line
+        :param argv: the arguments, the ones of the command line if not given
+        :return: the exit status, 1 if a comparison finds a regression
+        """
+        def numbers(text):
+            return [int(number) for number in text.split(',')]
+
+        def sizes(text):
+            return [tuple(int(number) for number in size.split('x')) for size in text.split(',')]
+
+        parser = argparse.ArgumentParser(prog='python -m gym_buster.bench',
+                                         description='Measure the throughput of headless games. Lists of values '
+                                                     'separated by commas are swept.')
+        parser.add_argument('--engine', default='single', help='engines among ' + ', '.join(Throughput.ENGINES))
+        parser.add_argument('--busters', type=numbers, default=[3], help='busters per team')
+        parser.add_argument('--ghosts', type=numbers, default=[15], help='ghosts per game')
+        parser.add_argument('--map-size', type=sizes, default=[(GameConfig.DEFAULT.map_width,
+                                                                GameConfig.DEFAULT.map_height)],
+                            help='WIDTHxHEIGHT of the map')
+        parser.add_argument('--batch', type=numbers, default=[1], help='games stepped together')
+        parser.add_argument('--workers', type=numbers, default=[0],
+                            help='worker processes of the subproc engine, one per core if 0')
+        parser.add_argument('--max-steps', type=int, default=250, help='steps of a game')
+        parser.add_argument('--steps', type=int, default=1000, help='measured calls to step')
+        parser.add_argument('--resets', type=int, default=20, help='measured calls to reset')
+        parser.add_argument('--warmup', type=int, default=20, help='calls to step before the measures')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-isolate', action='store_true',
+                            help='run the configurations in this process, the peak memory is then the largest one')
+        parser.add_argument('--output', '-o', help='file to save the results in, csv or json from its extension')
+        parser.add_argument('--label', help='name of the benchmarked version saved with the results')
+        parser.add_argument('--compare', '-c', nargs=2, metavar=('OLD', 'NEW'),
+                            help='compare two result files instead of running the benchmark')
+        parser.add_argument('--threshold', type=float, default=0.1, help='relative change flagged as regression')
+        arguments = parser.parse_args(argv)
+
+        if arguments.compare:
+            old, new = (Results.load(path) for path in arguments.compare)
+            if old['kind'] == MicroBenchmark.KIND:
+                comparison = MicroBenchmark.compare(old, new, arguments.threshold)
+                columns = MicroBenchmark.KEYS + ('old', 'new', 'ratio', 'regression')
+            else:
+                comparison = Throughput.compare(old, new, arguments.threshold)
+                columns = Throughput.KEYS + ('metric', 'old', 'new', 'ratio', 'regression')
+            print(Results.format_table(comparison, columns))
+            return 1 if any(line['regression'] for line in comparison) else 0
+
+        engines = arguments.engine.split(',')
+        for engine in engines:
+            if engine not in Throughput.ENGINES:
+                parser.error("unknown engine : " + engine)
+
+        configs = Throughput.configurations(engines, arguments.busters, arguments.ghosts, arguments.map_size,
+                                            arguments.batch, arguments.workers, max_steps=arguments.max_steps,
+                                            steps=arguments.steps, resets=arguments.resets, warmup=arguments.warmup,
+                                            seed=arguments.seed)
+        columns = Throughput.KEYS + ('steps_per_s', 'resets_per_s', 'p50_us', 'p99_us', 'peak_rss_kb', 'error')
+        rows = []
+        for i, config in enumerate(configs):
+            print('[{}/{}] {}'.format(i + 1, len(configs), ' '.join(str(config[key]) for key in Throughput.KEYS
+                                                                   if key in config)), file=sys.stderr, flush=True)
+            rows.append(Throughput.run(config) if arguments.no_isolate else Throughput.run_isolated(config))
+        print(Results.format_table(rows, columns))
+
+        if arguments.output:
+            Results.save(arguments.output, Throughput.KIND, rows, arguments.label)
+        return 0
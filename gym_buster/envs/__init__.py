@@ -1 +1,4 @@
-from gym_buster.envs.buster_env import BusterEnv
\ No newline at end of file
+from gym_buster.envs.buster_env import BusterEnv
+from gym_buster.envs.batched_buster_env import BatchedBusterEnv
+from gym_buster.envs.subproc_buster_env import SubprocBusterEnv
+from gym_buster.envs.replay import ReplayWriter, ReplayReader
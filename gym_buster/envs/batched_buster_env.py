@@ -0,0 +1,231 @@
+import numpy as np
+import gym
+
+from gym import spaces
+from gym.utils import seeding
+
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.ai_behaviour import Aibehaviour
+from gym_buster.envs.game_classes.world_state import WorldState
+from gym_buster.envs.game_classes.game_config import GameConfig
+from gym_buster.envs.game_classes.rules import Rules
+from gym_buster.envs.game_classes.observation import ObservationBuilder
+from gym_buster.envs.game_classes.rasterizer import Rasterizer
+
+
+class BatchedBusterEnv(gym.Env):
+    """
+    Class that will handle a batch of independent codebuster games advanced together
+    Every game follows the rules of BusterEnv, but the whole batch is stepped with array operations. A game that is
+    over is reset automatically, its last observation is given in the info dictionary of the game.
+    """
+    metadata = {
+        'render.modes': ['rgb_array']
+    }
+
+    def __init__(self, batch_size=16, buster_number=3, ghost_number=15, max_steps=250, observation_dtype=np.float64,
+                 config=None):
+        """
+        Initialize the environment
+        :param batch_size: the number of games
+        :param buster_number: the number of busters in each team
+        :param ghost_number: the number of ghosts in each game
+        :param max_steps: the number of steps of a game
+        :param observation_dtype: the type of the observations, np.float32 avoids a conversion before a network
+        :param config: the map size and rule constants of every game (see GameConfig), GameConfig.DEFAULT if not given
+        """
+        if buster_number < 1 or ghost_number < 1:
+            raise ValueError("Wrong number of entities : " + str(buster_number) + " busters per team, " +
+                             str(ghost_number) + " ghosts")
+        self.batch_size = batch_size
+        self.buster_number = buster_number
+        self.ghost_number = ghost_number
+        self.max_steps = max_steps
+        self.config = GameConfig.DEFAULT if config is None else config
+        self.map_width = self.config.map_width
+        self.map_heigth = self.config.map_height
+
+        # Game state of every game
+        self.world = WorldState(buster_number, ghost_number, batch_size, self.config)
+        self.scores = np.zeros((batch_size, 2), dtype=np.int64)
+        self.current_step = np.zeros(batch_size, dtype=np.int64)
+        self.observation = None
+        self.closest_ghosts = None
+        self.observation_builder = ObservationBuilder(buster_number, batch_size, observation_dtype)
+        self.rasterizer = None
+
+        # Observation and action space of one game and of the batch
+        self.single_observation_space = self._observation_space()
+        self.single_action_space = self._action_space()
+        self.observation_space = self._batch_space(self.single_observation_space)
+        self.action_space = self._batch_space(self.single_action_space)
+
+        self.seed()
+
+    def seed(self, seed=None):
+        self.np_random, seed = seeding.np_random(seed)
+        return [seed]
+
+    def reset(self):
+        """
+        Function to call to reset every game of the batch
+        :return: the observations of the batch
+        """
+        self._reset_games(np.ones(self.batch_size, dtype=bool))
+        self.closest_ghosts = None
+        self.observation = self._make_observation()
+        return self.observation
+
+    def step(self, actions):
+        """
+        Function to call to move forward one step in every game
+        :param actions: an array of shape (batch_size, 4 * buster_number) sampled from the action space
+        :return: the observations, rewards, dones of the batch and a list of info dictionaries. The observations are
+        overwritten by the step after the next one, copy them to keep them longer
+        """
+        actions = np.asarray(actions).reshape(self.batch_size, self.buster_number, 4)
+        self.current_step += 1
+
+        commands = np.concatenate([self._transform_action(actions), self._opponent_commands()], axis=1)
+        previous_score = self.scores[:, 0].copy()
+        self.scores += Rules.play_round(self.world, commands)
+        self.closest_ghosts = None
+
+        game_over = self.world.count_alive() == 0
+        self.observation = self._make_observation()
+        rewards = self._compute_reward(previous_score, game_over)
+        dones = (self.current_step > self.max_steps) | game_over
+
+        infos = [{} for _ in range(self.batch_size)]
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]['terminal_observation'] = self.observation[i].copy()
+            self._reset_games(dones)
+            self.closest_ghosts = None
+            self._make_observation(self.observation)
+
+        return self.observation, rewards, dones, infos
+
+    def render(self, mode='rgb_array'):
+        """
+        Function that draws every game of the batch, see Rasterizer
+        :param mode: 'rgb_array', the only mode of a batch
+        :return: an array of shape (batch_size, height, width, 3) of uint8
+        """
+        if mode != 'rgb_array':
+            raise ValueError("Unknown render mode : " + str(mode))
+        if self.rasterizer is None:
+            self.rasterizer = Rasterizer(self.config, batch_size=self.batch_size)
+        return self.rasterizer.draw(self.world).copy()
+
+    def _reset_games(self, games):
+        """
+        Function that starts a new game for some games of the batch
+        :param games: the boolean mask of the games to reset
+        """
+        self.world.clear(games)
+        self.scores[games] = 0
+        self.current_step[games] = 0
+        self.world.spawn_ghosts(self.np_random, games)
+
+    def _opponent_commands(self):
+        """
+        Function that asks the simple AI (class Aibehaviour) the commands of team 1 in every game
+        :return: an array of shape (batch_size, buster_number, Constants.COMMAND_SIZE)
+        """
+        return Aibehaviour.world_commands(self.world, self.np_random)
+
+    def _transform_action(self, actions):
+        """
+        Transform actions from action space to commands
+        Privilege to release then bust the closest visible ghost then move
+        :param actions: the actions of shape (batch_size, buster_number, 4)
+        :return: an array of shape (batch_size, buster_number, Constants.COMMAND_SIZE)
+        """
+        world = self.world
+        releasing = actions[..., 3] > 0.8
+        busting = ~releasing & (actions[..., 2] > 0.8)
+        ghost, dist = self._closest_visible_ghosts()
+        found = np.isfinite(dist[..., 0])
+
+        commands = np.zeros(actions.shape[:-1] + (Constants.COMMAND_SIZE,), dtype=np.int64)
+        commands[..., 0] = Constants.COMMAND_MOVE
+        commands[..., 1] = (actions[..., 0] * self.map_width).astype(np.int64)
+        commands[..., 2] = (actions[..., 1] * self.map_heigth).astype(np.int64)
+
+        # Busting with nothing in sight keeps the buster in place
+        staying = busting & ~found
+        commands[..., 1][staying] = world.x[:, world.team_0][staying].astype(np.int64)
+        commands[..., 2][staying] = world.y[:, world.team_0][staying].astype(np.int64)
+
+        busting &= found
+        commands[..., 0][busting] = Constants.COMMAND_BUST
+        commands[..., 3][busting] = ghost[..., 0][busting]
+        commands[..., 0][releasing] = Constants.COMMAND_RELEASE
+
+        return commands
+
+    def _closest_visible_ghosts(self):
+        """
+        Function that gives the 3 closest ghosts visible by team 0 of each buster of team 0
+        The result is kept until the world changes, so the observation and the next actions share it
+        :return: the ghosts ids and the distances, arrays of shape (batch_size, buster_number, 3), the distance
+        is infinite when there is no more visible ghost
+        """
+        if self.closest_ghosts is None:
+            world = self.world
+            visible = world.visible(world.team_0, world.ghosts)
+            self.closest_ghosts = world.nearest(world.team_0, world.ghosts, 3, visible)
+        return self.closest_ghosts
+
+    def _make_observation(self, out=None):
+        """
+        Compute the observation of every game, same layout as BusterEnv
+        :param out: the observation to write in, the next buffer of the observation builder if not given
+        :return: an array of shape (batch_size, 2 + 14 * buster_number)
+        """
+        return self.observation_builder.build(self.world, self.scores, self._closest_visible_ghosts(), out)
+
+    def _compute_reward(self, previous_score, game_over):
+        """
+        Function that will compute the reward of every game, same rewards as BusterEnv
+        :param previous_score: the score of team 0 in the previous observation
+        :param game_over: the boolean mask of the games where every ghost has been scored
+        :return: an array of rewards
+        """
+        score_0 = self.scores[:, 0]
+        reward = np.zeros(self.batch_size)
+        reward[score_0 < previous_score] = -200
+        reward[score_0 > previous_score] = 200
+        reward[game_over & (self.scores[:, 1] > score_0)] = -4000
+        reward[score_0 > self.scores[:, 1]] = 4000
+        return reward
+
+    def _action_space(self):
+        """
+        Action space of one game, same as BusterEnv
+        :return: the space
+        """
+        action_low = [0.0, 0.0, 0.0, 0.0] * self.buster_number
+        action_high = [1.0, 1.0, 1.0, 1.0] * self.buster_number
+
+        return spaces.Box(np.array(action_low), np.array(action_high))
+
+    def _observation_space(self):
+        """
+        Observation space of one game, same as BusterEnv
+        :return: the space
+        """
+        obs_low = [0.0, 0.0] + [0.0] * 14 * self.buster_number
+        obs_high = [self.ghost_number, self.ghost_number] + [1.0] * 14 * self.buster_number
+
+        return spaces.Box(np.array(obs_low), np.array(obs_high), dtype=self.observation_builder.dtype)
+
+    def _batch_space(self, space):
+        """
+        Function that stacks a space for every game of the batch
+        :param space: the space of one game
+        :return: the space of the batch
+        """
+        return spaces.Box(np.tile(space.low, (self.batch_size, 1)), np.tile(space.high, (self.batch_size, 1)),
+                          dtype=space.dtype)
@@ -1,17 +1,22 @@
-import random
 import numpy as np
 import gym
 
 from gym import spaces
 from gym.utils import seeding
-from gym.envs.classic_control import rendering
 
 from gym_buster.envs.game_classes.constants import Constants
 from gym_buster.envs.game_classes.buster import Buster
 from gym_buster.envs.game_classes.ghost import Ghost
-from gym_buster.envs.game_classes.entity import Entity
 from gym_buster.envs.game_classes.ai_behaviour import Aibehaviour
-from gym_buster.envs.game_classes.math_utils import MathUtility
+from gym_buster.envs.game_classes.world_state import WorldState
+from gym_buster.envs.game_classes.game_config import GameConfig
+from gym_buster.envs.game_classes.rules import Rules
+from gym_buster.envs.game_classes.commands import Commands
+from gym_buster.envs.game_classes.tracing import Trace
+from gym_buster.envs.game_classes.observation import ObservationBuilder
+from gym_buster.envs.game_classes.phase_timer import PhaseTimer
+from gym_buster.envs.game_classes.render_layer import RenderLayer
+from gym_buster.envs.game_classes.rasterizer import Rasterizer
 
 
 class BusterEnv(gym.Env):
@@ -23,35 +28,75 @@ class BusterEnv(gym.Env):
         'videos.frames_per_second': 30
     }
 
-    def __init__(self):
+    def __init__(self, buster_number=3, ghost_number=15, max_episodes=1, max_steps=250, render_mode=None,
+                 observation_dtype=np.float64, config=None):
         """
         Initialize the environment
+        The world state, the busters, the observation buffers and the spaces are sized once here and reused by every
+        episode
+        :param buster_number: the number of busters in each team
+        :param ghost_number: the number of ghosts
+        :param max_episodes: the number of episodes a training loop should play, see episodes
+        :param max_steps: the number of steps of a game
+        :param render_mode: 'human' or 'rgb_array', nothing is rendered if not given (True is read as 'human'). The
+        viewer is only created at the first call to render() in 'human' mode, so a headless environment never imports
+        pyglet. 'rgb_array' frames are drawn with numpy by a Rasterizer, without display
+        :param observation_dtype: the type of the observations, np.float32 avoids a conversion before a network
+        :param config: the map size and rule constants (see GameConfig), GameConfig.DEFAULT if not given
         """
-        print("Initializing environment ...")
-        self.ghosts = []
-        self.buster_team0 = []
-        self.buster_team1 = []
-        self.ghost_number = 15
-        self.buster_number = 3
-        self.max_steps = 250
+        if Trace.env <= Trace.INFO:
+            Trace.record(Trace.ENV, Trace.INFO, Trace.EVENT_INIT)
+        if render_mode is True:
+            render_mode = 'human'
+        elif render_mode is False:
+            render_mode = None
+        if render_mode is not None and render_mode not in self.metadata['render.modes']:
+            raise ValueError("Unknown render mode : " + str(render_mode))
+        self.render_mode = render_mode
+        self.config = GameConfig.DEFAULT if config is None else config
+        self.ghost_number = int(ghost_number)
+        self.buster_number = int(buster_number)
+        if self.buster_number < 1 or self.ghost_number < 1:
+            raise ValueError("Wrong number of entities : " + str(self.buster_number) + " busters per team, " +
+                             str(self.ghost_number) + " ghosts")
+        self.max_episodes = int(max_episodes)
+        self.max_steps = int(max_steps)
         self.current_step = 0
 
-        # Rendering objects
-        self.render_entities = []
-        self.viewer = rendering.Viewer(Constants.PYGAME_WINDOW_WIDTH, Constants.PYGAME_WINDOW_HEIGHT)
+        # Every entity is a view on a slot of the world state
+        self.world = WorldState(self.buster_number, self.ghost_number, config=self.config)
+        self.buster_team0 = [Buster(Constants.TYPE_BUSTER_TEAM_0, i, self.world) for i in range(self.buster_number)]
+        self.buster_team1 = [Buster(Constants.TYPE_BUSTER_TEAM_1, i, self.world) for i in range(self.buster_number)]
+        self.ghosts = [Ghost.view(self.world, self.world.ghost_slot(i), i) for i in range(self.ghost_number)]
+        for ghost in self.ghosts:
+            self.world.register_ghost(ghost)
+
+        # Rendering objects, kept apart from the entities
+        self.render_layer = RenderLayer()
+        self.viewer = None
+        self.rasterizer = None
         self.screen_width = Constants.PYGAME_WINDOW_WIDTH
         self.screen_height = Constants.PYGAME_WINDOW_HEIGHT
-        self.map_width = Constants.MAP_WIDTH
-        self.map_heigth = Constants.MAP_HEIGHT
+        self.map_width = self.config.map_width
+        self.map_heigth = self.config.map_height
 
         # Game state
         self.score_team0 = 0
         self.score_team1 = 0
         self.observation = None
         self.previous_observation = None
+        self.observation_builder = ObservationBuilder(self.buster_number, dtype=observation_dtype)
         self.state = None
         self.game_over = False
 
+        # Phase timer, only created when the timing is enabled (see enable_perf_stats)
+        self.timer = None
+
+        # Recorder of the episodes, see ReplayWriter
+        self.recorder = None
+        self.episode_seed = None
+        self.pending_seed = None
+
         # Observation and action space
         self.observation_space = self._observation_space()
         self.action_space = self._action_space()
@@ -59,41 +104,127 @@ class BusterEnv(gym.Env):
         self.seed()
 
     def seed(self, seed=None):
+        """
+        Seed the random generator of the environment, the next episode is the one of this seed
+        :param seed: the seed, a random one if not given
+        :return: the list of seeds
+        """
         self.np_random, seed = seeding.np_random(seed)
+        self.pending_seed = seed
         return [seed]
 
-    def reset(self):
+    # -------------- ATTRIBUTES OF THE FIRST API ---------------- #
+    @property
+    def episodes(self):
+        """
+        The number of episodes a training loop should play, given to the constructor as max_episodes
+        """
+        return self.max_episodes
+
+    @property
+    def episode_step(self):
+        """
+        The number of steps played in the current episode
+        """
+        return self.current_step
+
+    @property
+    def max_episodes_steps(self):
+        """
+        The number of steps of a game
+        """
+        return self.max_steps
+
+    @property
+    def game(self):
+        """
+        The game, the scores are read as game.score_team_0 and game.score_team_1
+        """
+        return self
+
+    @property
+    def score_team_0(self):
+        return self.score_team0
+
+    @property
+    def score_team_1(self):
+        return self.score_team1
+
+    # -------------- END ATTRIBUTES OF THE FIRST API ---------------- #
+
+    def reset(self, seed=None):
         """
         Function to call to reset environment to a new game
+        Every episode has its own seed, kept in episode_seed : the seed given, the one given last to seed(...) if no
+        episode was played since, else a seed drawn from the random generator. An episode is then replayed from its
+        seed and the commands of both teams (see ReplayWriter)
+        :param seed: the seed of the episode
+        :return: the first observation
         """
-        print("Resetting environment...")
-        self.ghosts = []
-        Ghost.reset_ghost()
-        self.buster_team0 = []
-        self.buster_team1 = []
+        if Trace.env <= Trace.INFO:
+            Trace.record(Trace.ENV, Trace.INFO, Trace.EVENT_RESET)
+        if self.recorder is not None:
+            self.recorder.end_episode(self)
+        if seed is None and self.pending_seed is None:
+            seed = int(self.np_random.integers(2 ** 63))
+        if seed is not None:
+            self.seed(seed)
+        self.episode_seed = self.pending_seed
+        self.pending_seed = None
         self.current_step = 0
 
         self.score_team0 = 0
         self.score_team1 = 0
 
         self.game_over = False
+        if self.timer is not None:
+            self.timer.clear()
 
-        # Create busters both team
-        for i in range(self.buster_number):
-            self.buster_team0.append(Buster(Constants.TYPE_BUSTER_TEAM_0, i))
-            self.buster_team1.append(Buster(Constants.TYPE_BUSTER_TEAM_1, i))
-
-        # Create ghosts
-        for i in range(self.ghost_number):
-            self.ghosts.append(Ghost(i))
-
-        # Init rendering images for each entity
-        self._init_rendering_entities()
+        # Busters back in their base, ghosts placed with the random generator of the environment
+        self.world.clear()
+        self.world.spawn_ghosts(self.np_random)
 
         self.state = self._get_state()
         self.previous_observation = self._make_observation()
         self.observation = self.previous_observation
 
+        if self.recorder is not None:
+            self.recorder.begin_episode(self)
+        return self.observation
+
+    def get_snapshot(self):
+        """
+        Function that captures the game (entities, scores, step and random generator), much cheaper than a deepcopy of
+        the environment as the viewer and the entity objects are left out
+        :return: a snapshot to give to restore(...)
+        """
+        return {
+            'world': self.world.snapshot(),
+            'scores': (self.score_team0, self.score_team1),
+            'step': self.current_step,
+            'game_over': self.game_over,
+            'rng': self.np_random.bit_generator.state,
+            'state': self.state,
+            'observation': self.observation.copy(),
+        }
+
+    def restore(self, snapshot):
+        """
+        Function that puts the game back as it was when a snapshot was taken, the snapshot can be restored many times
+        :param snapshot: a snapshot given by get_snapshot() of an environment with the same numbers of entities
+        :return: the observation of the restored game
+        """
+        self.world.restore(snapshot['world'])
+        self.score_team0, self.score_team1 = snapshot['scores']
+        self.current_step = snapshot['step']
+        self.game_over = snapshot['game_over']
+        self.np_random.bit_generator.state = snapshot['rng']
+
+        # The state dictionary is never modified once built, it is shared with the snapshot
+        self.state = snapshot['state']
+        self.observation = self.observation_builder.copy(snapshot['observation'])
+        self.previous_observation = self.observation
+
         return self.observation
 
     def step(self, action):
@@ -101,192 +232,167 @@ class BusterEnv(gym.Env):
         Function to call to move forward one step in the environment
         """
         self.current_step += 1
-        print("--------- STEP {} -----------".format(self.current_step))
-        print("Action : {}".format(action))
+        if Trace.env <= Trace.DEBUG:
+            Trace.record(Trace.ENV, Trace.DEBUG, Trace.EVENT_STEP, entity=self.current_step)
+        timer = self.timer
+        if timer is not None:
+            timer.steps += 1
+            timer.start()
 
         # Convert commands given by NN or sampling on action space
         commands = self._transform_action(action)
+        if timer is not None:
+            timer.lap(PhaseTimer.ACTION)
         self._run_step(commands, None)
 
-        # Check if the game is over
-        if len(self.ghosts) == 0:
-            self.game_over = True
-
-        print("Score team 0 : {}".format(self.score_team0))
-        print("Score team 1 : {}".format(self.score_team1))
-
-        # Check alive and captured ghosts
-        captured = 0
-        alive = 0
-        for ghost in self.ghosts:
-            if ghost.captured:
-                captured += 1
-            if ghost.alive:
-                alive += 1
+        # The game is over when every ghost has been brought back to a base, read from the ghost counters
+        alive = self.world.count_alive()
+        self.game_over = alive == 0
 
-        print("Captured : {}".format(captured))
-        print("Alive : {}".format(alive))
+        if Trace.env <= Trace.DEBUG:
+            Trace.record(Trace.ENV, Trace.DEBUG, Trace.EVENT_SCORE, a=self.score_team0, b=self.score_team1)
+            Trace.record(Trace.ENV, Trace.DEBUG, Trace.EVENT_GHOSTS, a=self.world.count_captured(), b=alive)
 
         self.state = self._get_state()
+        if timer is not None:
+            timer.lap(PhaseTimer.STATE)
         self.previous_observation = self.observation
         self.observation = self._make_observation()
 
-        print("New observation : {}".format(self.observation))
+        info = {}
+        if timer is not None:
+            timer.lap(PhaseTimer.OBSERVATION)
+            info['perf_stats'] = timer.stats()
+
+        return self.observation, self._compute_reward(), self._check_done(), info
 
-        return self.observation, self._compute_reward(), self._check_done() or alive == 0, {}
+    def enable_perf_stats(self, enabled=True):
+        """
+        Enable or disable the timing of the phases of the steps, see perf_stats()
+        A disabled timing costs nothing but a comparison per phase
+        :param enabled: true to time the next steps, the counters start from zero
+        """
+        self.timer = PhaseTimer() if enabled else None
+
+    def perf_stats(self):
+        """
+        Function that gives the time spent in each phase of the steps of the current episode, also given in the info
+        dictionary of step(...) under 'perf_stats' while the timing is enabled
+        :return: a dictionary with the nanoseconds spent in each phase ('<phase>_ns', see PhaseTimer), their sum and the
+        number of steps, nothing if the timing is disabled
+        """
+        if self.timer is None:
+            return None
+        return self.timer.stats()
 
     def _run_step(self, commands_0, commands_1):
         """
         Function called by step(...) with both commands for each team
+        Commands are arrays (see Commands), lists of text commands are accepted too
         If commands_1 is null then it will use a simple AI (class Aibehaviour)
         """
-        if commands_1:
-            commands_team_1 = commands_1
+        timer = self.timer
+        if timer is not None:
+            timer.start()
+
+        if commands_1 is not None:
+            commands_team_1 = Commands.as_array(commands_1)
         else:
-            commands_team_1 = Aibehaviour.next_command(self.buster_team1, self.ghosts)
-        commands_team_0 = commands_0
+            commands_team_1 = Aibehaviour.next_command(self.buster_team1, self.ghosts, self.np_random)
+        commands_team_0 = Commands.as_array(commands_0)
+        if self.recorder is not None:
+            self.recorder.record(commands_team_0, commands_team_1)
+        if timer is not None:
+            timer.lap(PhaseTimer.OPPONENT)
 
         # Apply action for each buster and save new state in a variable to resolve everything at the end
-        for i in range(self.buster_number):
-            buster_team0 = self.buster_team0[i]
-            buster_team1 = self.buster_team1[i]
-
-            command_0 = commands_team_0[i]
-            command_1 = commands_team_1[i]
-
-            self.score_team0 += buster_team0.buster_command(command_0)
-            self.score_team1 += buster_team1.buster_command(command_1)
+        for buster_team0, buster_team1, command_0, command_1 in zip(self.buster_team0, self.buster_team1,
+                                                                    commands_team_0.tolist(),
+                                                                    commands_team_1.tolist()):
+            self.score_team0 += buster_team0.execute(*command_0)
+            self.score_team1 += buster_team1.execute(*command_1)
+        if timer is not None:
+            timer.lap(PhaseTimer.COMMANDS)
 
         # Resolve states conflicting Buster that bust same ghost
-        for ghost in self.ghosts:
-            if ghost.value != Constants.VALUE_GHOST_BASIC and ghost.alive:
-                # Retrieve all busters that tried to bust this ghost
-                buster_team_0_busting_this_ghost = []
-                buster_team_1_busting_this_ghost = []
-                for buster in self.buster_team0:
-                    if buster.value == ghost.id:
-                        buster_team_0_busting_this_ghost.append(buster)
-                for buster in self.buster_team1:
-                    if buster.value == ghost.id:
-                        buster_team_1_busting_this_ghost.append(buster)
-
-                # Check number of each team ghost
-                # 1. If same number of buster for each team are busting a ghost then the busing is cancelled for the ghost
-                # and the busters
-                # 2. If different number of buster busting the ghost. The team with most buster win the ghost and it is
-                # captured by the buster of the wnning team the closest. Only the buster with the captured ghost is in a
-                # state carrying with the ghost id as value. The ghost take the position of the buster
-                if len(buster_team_0_busting_this_ghost) == len(buster_team_1_busting_this_ghost) and len(
-                        buster_team_1_busting_this_ghost) > 0:
-                    ghost.busting_cancelled()
-                    for buster in buster_team_0_busting_this_ghost + buster_team_1_busting_this_ghost:
-                        buster.cancelling_bust()
-                elif len(buster_team_0_busting_this_ghost) != len(buster_team_1_busting_this_ghost):
-                    # Find closest buster in team with most buster
-                    if len(buster_team_0_busting_this_ghost) > len(buster_team_1_busting_this_ghost):
-                        closest = buster_team_0_busting_this_ghost[0]
-                        winner_busters = buster_team_0_busting_this_ghost
-                    else:
-                        closest = buster_team_1_busting_this_ghost[0]
-                        winner_busters = buster_team_1_busting_this_ghost
-
-                    dist = MathUtility.distance(ghost.x, ghost.y, closest.x, closest.y)
-                    for buster in winner_busters:
-                        new_dist = MathUtility.distance(ghost.x, ghost.y, buster.x, buster.y)
-                        if new_dist < dist:
-                            dist = new_dist
-                            closest = buster
-
-                    # Reset all busters with this ghost id except closest
-                    if closest and len(buster_team_0_busting_this_ghost) + len(buster_team_1_busting_this_ghost) >= 1:
-                        if closest.action == Constants.ACTION_BUSTING:
-                            ghost.being_captured(closest)
-                            closest.capturing_ghost()
-                            if closest.type == Constants.TYPE_BUSTER_TEAM_0:
-                                self.score_team0 += 1
-                            elif closest.type == Constants.TYPE_BUSTER_TEAM_1:
-                                self.score_team1 += 1
-                        else:
-                            ghost.updating_position(closest)
-
-                        for buster in buster_team_0_busting_this_ghost + buster_team_1_busting_this_ghost:
-                            if buster != closest:
-                                buster.cancelling_bust()
+        scored = Rules.resolve_busting(self.world)
+        self.score_team0 += int(scored[0])
+        self.score_team1 += int(scored[1])
+        if timer is not None:
+            timer.lap(PhaseTimer.CONFLICTS)
 
         # make ghost run away for those who are not being busted
-        for ghost in self.ghosts:
-            if not ghost.captured and ghost.alive:
-                ghost.run_away(self.buster_team0 + self.buster_team1)
+        Rules.ghosts_run_away(self.world)
+        if timer is not None:
+            timer.lap(PhaseTimer.RUN_AWAY)
 
         # Compute score
-        for ghost in self.ghosts:
-            if ghost.is_in_team_0_base and not ghost.captured and ghost.alive:
-                self.score_team0 += 1
-                ghost.kill()
-            elif ghost.is_in_team_1_base and not ghost.captured and ghost.alive:
-                self.score_team1 += 1
-                ghost.kill()
+        scored = Rules.score_bases(self.world)
+        self.score_team0 += int(scored[0])
+        self.score_team1 += int(scored[1])
+        if timer is not None:
+            timer.lap(PhaseTimer.SCORING)
 
     def _init_rendering_entities(self):
         """
         Function to be called to init rendering entities and initialize the viewer
+        The geometries are pooled in the render layer : they are created for the first episode drawn and reused by the
+        next ones, so the viewer does not grow with the number of episodes
         """
+        from gym.envs.classic_control import rendering
+
         if self.viewer is None:
             self.viewer = rendering.Viewer(Constants.PYGAME_WINDOW_WIDTH, Constants.PYGAME_WINDOW_HEIGHT)
+            self.viewer.add_geom(self.render_layer)
 
-        for ghost in self.ghosts:
-            g = rendering.make_circle(Constants.PYGAME_GHOST_RADIUS)
-            g.set_color(0, 0, 255)
-            g_trans = rendering.Transform()
-            g.add_attr(g_trans)
-            ghost.render_img = g
-            ghost.render_trans = g_trans
-            self.viewer.add_geom(g)
-
-        for buster in self.buster_team0:
-            b = rendering.make_circle(Constants.PYGAME_BUSTER_RADIUS)
-            b.set_color(255, 0, 0)
-            b_trans = rendering.Transform()
-            b.add_attr(b_trans)
-            buster.render_img = b
-            buster.render_trans = b_trans
-            self.viewer.add_geom(b)
-
-        for buster in self.buster_team1:
-            b = rendering.make_circle(Constants.PYGAME_BUSTER_RADIUS)
-            b.set_color(0, 255, 0)
-            b_trans = rendering.Transform()
-            b.add_attr(b_trans)
-            buster.render_img = b
-            buster.render_trans = b_trans
-            self.viewer.add_geom(b)
-
-    def render(self, mode='human'):
+        def circle(radius, color):
+            image = rendering.make_circle(radius)
+            image.set_color(*color)
+            transform = rendering.Transform()
+            image.add_attr(transform)
+            return image, transform
+
+        self.render_layer.pool(self.ghosts, lambda ghost: circle(Constants.PYGAME_GHOST_RADIUS, (0, 0, 255)))
+        self.render_layer.pool(self.buster_team0, lambda buster: circle(Constants.PYGAME_BUSTER_RADIUS, (255, 0, 0)))
+        self.render_layer.pool(self.buster_team1, lambda buster: circle(Constants.PYGAME_BUSTER_RADIUS, (0, 255, 0)))
+
+    def render(self, mode=None):
         """
         Function to call to render the state of the game
+        :param mode: 'human' or 'rgb_array', the render mode of the environment if not given
+        :return: the rgb array in 'rgb_array' mode, nothing for a headless environment
         """
+        mode = mode or self.render_mode
+        if mode is None:
+            return None
+        if mode == 'rgb_array':
+            if self.rasterizer is None:
+                self.rasterizer = Rasterizer(self.config)
+            return self.rasterizer.draw(self.world).copy()
+        if self.viewer is None:
+            self._init_rendering_entities()
 
         scale_x = self.screen_width / self.map_width
         scale_y = self.screen_height / self.map_heigth
 
+        layer = self.render_layer
         for ghost in self.ghosts:
-            if not ghost.captured and ghost.alive:
-                ghost.render_img.set_color(0, 0, 255)
-                ghost.render_trans.set_translation(ghost.x * scale_x, ghost.y * scale_y)
-            else:
-                ghost.render_img.set_color(255, 255, 255)
+            free = not ghost.captured and ghost.alive
+            layer.show(ghost, free)
+            if free:
+                layer.transform(ghost).set_translation(ghost.x * scale_x, ghost.y * scale_y)
 
         for entity in self.buster_team0 + self.buster_team1:
             if entity.state == Constants.STATE_BUSTER_CARRYING:
-                entity.render_img.set_color(255, 255, 0)
+                layer.image(entity).set_color(255, 255, 0)
             else:
                 if entity.type == Constants.TYPE_BUSTER_TEAM_0:
-                    entity.render_img.set_color(255, 0, 0)
+                    layer.image(entity).set_color(255, 0, 0)
                 elif entity.type == Constants.TYPE_BUSTER_TEAM_1:
-                    entity.render_img.set_color(0, 255, 0)
-            entity.render_trans.set_translation(entity.x * scale_x, entity.y * scale_y)
+                    layer.image(entity).set_color(0, 255, 0)
+            layer.transform(entity).set_translation(entity.x * scale_x, entity.y * scale_y)
 
-        return self.viewer.render(return_rgb_array=mode == 'rgb_array')
+        return self.viewer.render()
 
     def close(self):
         """
@@ -295,6 +401,7 @@ class BusterEnv(gym.Env):
         if self.viewer:
             self.viewer.close()
             self.viewer = None
+            self.render_layer.clear()
 
     def _action_space(self):
         """
@@ -333,7 +440,7 @@ class BusterEnv(gym.Env):
             obs_low += [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
             obs_high += [1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0]
 
-        return spaces.Box(np.array(obs_low), np.array(obs_high))
+        return spaces.Box(np.array(obs_low), np.array(obs_high), dtype=self.observation_builder.dtype)
 
     def _compute_reward(self):
         """
@@ -371,48 +478,37 @@ class BusterEnv(gym.Env):
         state['team0'] = self.buster_team0
         state['team1'] = self.buster_team1
 
-        state['ghostvisibleteam0'] = Entity.get_entities_visible(self.buster_team0, self.ghosts)
-        state['ghostvisibleteam1'] = Entity.get_entities_visible(self.buster_team1, self.ghosts)
-        state['ennemyvisibleteam0'] = Entity.get_entities_visible(self.buster_team0, self.buster_team1)
-        state['ennemyvisibleteam1'] = Entity.get_entities_visible(self.buster_team1, self.buster_team0)
+        world = self.world
+        ghost_grid = world.grid(world.team_0, world.ghosts)
+        visible_team_0 = world.visible(world.team_0, world.ghosts, ghost_grid)
+        state['ghostvisibleteam0'] = self._select(self.ghosts, visible_team_0)
+        state['ghostvisibleteam1'] = self._select(self.ghosts, world.visible(world.team_1, world.ghosts, ghost_grid))
+        state['ennemyvisibleteam0'] = self._select(self.buster_team1, world.visible(world.team_0, world.team_1))
+        state['ennemyvisibleteam1'] = self._select(self.buster_team0, world.visible(world.team_1, world.team_0))
+
+        # The 3 closest visible ghosts of each buster of team 0, shared by the observation and the next actions
+        state['ghostclosestteam0'] = world.nearest(world.team_0, world.ghosts, 3, visible_team_0)
 
         return state
 
+    @staticmethod
+    def _select(entities, mask):
+        """
+        Function that keeps the entities flagged in a mask
+        :param entities: the entities list
+        :param mask: a boolean array with one flag per entity
+        :return: an entity list
+        """
+        return [entities[i] for i in np.flatnonzero(mask)]
+
     def _make_observation(self):
         """
         Compute the observation from the new state
+        The observation is written in a buffer of the observation builder, it stays valid during the next step
         :return: an array with observations
         """
-        print("Making observation")
-        observation = np.zeros(self.observation_space.shape)
-        observation[0] = self.state['scoreteam0']
-        observation[1] = self.state['scoreteam1']
-        for i in range(self.buster_number):
-            # state (carrying or not)
-            observation[i * 14 + 2] = self.state['team0'][i].state
-
-            # buster position
-            observation[i * 14 + 3] = self.state['team0'][i].x
-            observation[i * 14 + 4] = self.state['team0'][i].y
-
-            # coordinates of closest ghost visible
-            ghost0, dist0 = self.state['team0'][i].get_closest(self.state['ghostvisibleteam0'], 0)
-            ghost1, dist1 = self.state['team0'][i].get_closest(self.state['ghostvisibleteam0'], 1)
-            ghost2, dist2 = self.state['team0'][i].get_closest(self.state['ghostvisibleteam0'], 2)
-
-            observation[i * 14 + 5] = ghost0.x / self.map_width if ghost0 else 1.0
-            observation[i * 14 + 6] = ghost0.y / self.map_heigth if ghost0 else 1.0
-            observation[i * 14 + 7] = 1.0 if self.state['team0'][i].can_bust(ghost0) else 0.0
-            observation[i * 14 + 8] = ghost1.x / self.map_width if ghost1 else 1.0
-            observation[i * 14 + 9] = ghost1.y / self.map_heigth if ghost1 else 1.0
-            observation[i * 14 + 10] = 1.0 if self.state['team0'][i].can_bust(ghost1) else 0.0
-            observation[i * 14 + 11] = ghost2.x / self.map_width if ghost2 else 1.0
-            observation[i * 14 + 12] = ghost2.y / self.map_heigth if ghost2 else 1.0
-            observation[i * 14 + 13] = 1.0 if self.state['team0'][i].can_bust(ghost2) else 0.0
-            observation[i * 14 + 14] = 50.0 / self.map_width
-            observation[i * 14 + 15] = 50.0 / self.map_heigth
-
-        return observation
+        return self.observation_builder.build(self.world, (self.state['scoreteam0'], self.state['scoreteam1']),
+                                              self.state['ghostclosestteam0'])
 
     def _check_done(self):
         """
@@ -425,26 +521,26 @@ class BusterEnv(gym.Env):
         """
         Transform actions fromm action space to commands
         :param actions: the actions
-        :return: a list of 3 commands
+        :return: an array of shape (buster_number, Constants.COMMAND_SIZE), see Commands
         """
-        result = ["" for i in range(self.buster_number)]
+        result = np.zeros((self.buster_number, Constants.COMMAND_SIZE), dtype=np.int64)
+        ghost_ids, ghost_dist = self.state['ghostclosestteam0']
         for i in range(self.buster_number):
             # Privilege to release then bust then move
             if actions[i * 4 + 3] > 0.8:
                 # Release
-                result[i] = "RELEASE"
+                result[i, 0] = Constants.COMMAND_RELEASE
             elif actions[i * 4 + 2] > 0.8:
                 # Bust the closest ghost
-                ghost, dist = self.state['team0'][i].get_closest(self.state['ghostvisibleteam0'],
-                                                                 0)  # TODO adapt position
-                if ghost:
-                    result[i] = "BUST " + str(ghost.id)
+                if np.isfinite(ghost_dist[i, 0]):
+                    result[i] = (Constants.COMMAND_BUST, 0, 0, ghost_ids[i, 0])
                 else:
-                    print("Buster {} team 0 try busting but nothing happened".format(i))
-                    result[i] = "MOVE " + str(self.state['team0'][i].x) + " " + str(self.state['team0'][i].y)
+                    if Trace.env <= Trace.DEBUG:
+                        Trace.record(Trace.ENV, Trace.DEBUG, Trace.EVENT_NOTHING_TO_BUST, entity=i)
+                    result[i] = (Constants.COMMAND_MOVE, self.state['team0'][i].x, self.state['team0'][i].y, 0)
             else:
                 # Move random for now
                 x = actions[i * 4] * self.map_width
                 y = actions[i * 4 + 1] * self.map_heigth
-                result[i] = "MOVE " + str(int(x)) + " " + str(int(y))
+                result[i] = (Constants.COMMAND_MOVE, x, y, 0)
         return result
@@ -1,6 +1,7 @@
-import random
+import numpy as np
 
 from .constants import Constants
+from .tracing import Trace
 
 
 class Aibehaviour(object):
@@ -9,26 +10,29 @@ class Aibehaviour(object):
     """
 
     @staticmethod
-    def next_command(busters, ghosts):
+    def next_command(busters, ghosts, rng=None):
         """
         Function that will return commands to do for the next round
         :param busters: the busters belonging to the AI
         :param ghosts: the ghosts busters can see
-        :return: a list of commands
+        :param rng: the numpy random generator of the random moves, an unseeded one if not given
+        :return: an array of shape (busters, Constants.COMMAND_SIZE), see Commands
         """
-        busters_already_treated = dict(zip(busters, [None, None, None]))
+        busters_already_treated = dict.fromkeys(busters)
         ghosts_already_treated = []
-        commands = []
-        if 1 <= len(busters) <= 3:
+        if busters:
+            config = busters[0]._world.config
             for buster in busters:
                 # If a buster is carrying a ghost then go back to base or release if in distance
                 if buster.state == Constants.STATE_BUSTER_CARRYING and busters_already_treated[buster] is None:
-                    print("Buster " + str(buster.id) + " carrying a ghost.")
+                    if Trace.ai <= Trace.DEBUG:
+                        Trace.record(Trace.AI, Trace.DEBUG, Trace.EVENT_AI_CARRYING, buster.type, buster.id)
                     # Verify if in base else go back to base
                     if buster.is_in_team_base:
-                        busters_already_treated[buster] = "RELEASE"
+                        busters_already_treated[buster] = (Constants.COMMAND_RELEASE, 0, 0, 0)
                     else:
-                        busters_already_treated[buster] = "MOVE 15000 8000"
+                        busters_already_treated[buster] = (Constants.COMMAND_MOVE, config.map_width - 1000,
+                                                           config.map_height - 1000, 0)
                     continue
 
                 # If a busters can see a ghost then go on it (only one)
@@ -36,7 +40,7 @@ class Aibehaviour(object):
                     if buster.can_bust(ghost) and busters_already_treated[
                         buster] is None \
                             and ghost.alive and not ghost.captured:
-                        busters_already_treated[buster] = "BUST " + str(ghost.id)
+                        busters_already_treated[buster] = (Constants.COMMAND_BUST, 0, 0, ghost.id)
                         ghosts_already_treated.append(ghost)
                         continue
 
@@ -45,17 +49,86 @@ class Aibehaviour(object):
                     if not buster.can_bust(ghost) and ghost not in ghosts_already_treated and \
                             busters_already_treated[buster] is None \
                             and ghost.alive and not ghost.captured:
-                        busters_already_treated[buster] = "MOVE " + str(int(ghost.x)) + " " + str(int(ghost.y))
+                        busters_already_treated[buster] = (Constants.COMMAND_MOVE, int(ghost.x), int(ghost.y), 0)
                         ghosts_already_treated.append(ghost)
                         continue
 
                 # move randomly if nothing good
                 if busters_already_treated[buster] is None:
-                    x = random.randint(1500, 14500)
-                    y = random.randint(1000, 8000)
-                    busters_already_treated[buster] = "MOVE " + str(x) + " " + str(y)
+                    rng = np.random.default_rng() if rng is None else rng
+                    x = rng.integers(1500, max(config.map_width - 1500, 1500), endpoint=True)
+                    y = rng.integers(1000, max(config.map_height - 1000, 1000), endpoint=True)
+                    busters_already_treated[buster] = (Constants.COMMAND_MOVE, x, y, 0)
 
-        for buster in busters:
-            commands.append(busters_already_treated[buster])
+        return np.array([busters_already_treated[buster] for buster in busters], dtype=np.int64)
 
-        return commands
+    @staticmethod
+    def world_commands(world, rng=None):
+        """
+        Function that will return the commands of team 1 for every game of a world state, with array operations
+        Same heuristic and same commands as next_command(...) given every buster of team 1 and every ghost, in order :
+        carry the ghost home, bust the first ghost in range, chase the first ghost in no one's way or move randomly.
+        Busters are only looped over for the chases, a ghost chased or busted by a buster is not chased by the next ones
+        :param world: the world state, a single game or a batch, with any number of busters
+        :param rng: the numpy random generator of the random moves, an unseeded one if not given
+        :return: an array of shape (..., busters, Constants.COMMAND_SIZE), with the batch axis first if any
+        """
+        config = world.config
+        batched = world.batch_size is not None
+        team = world.team_1
+
+        # Every array gets a batch axis
+        buster_x = world.x[..., team].reshape(-1, world.buster_number)
+        buster_y = world.y[..., team].reshape(-1, world.buster_number)
+        buster_state = world.state[..., team].reshape(-1, world.buster_number)
+        dist = world.distances(team, world.ghosts).reshape(-1, world.buster_number, world.ghost_number)
+        ghost_x = world.x[..., world.ghosts].reshape(-1, world.ghost_number)
+        ghost_y = world.y[..., world.ghosts].reshape(-1, world.ghost_number)
+        free = world.free_ghosts().reshape(-1, world.ghost_number)
+        games = np.arange(len(buster_x))
+        commands = np.zeros(buster_x.shape + (Constants.COMMAND_SIZE,), dtype=np.int64)
+
+        # Carrying busters go back to base, or release in base
+        carrying = buster_state == Constants.STATE_BUSTER_CARRYING
+        if Trace.ai <= Trace.DEBUG:
+            for i in np.nonzero(carrying)[1]:
+                Trace.record(Trace.AI, Trace.DEBUG, Trace.EVENT_AI_CARRYING, Constants.TYPE_BUSTER_TEAM_1, int(i))
+        in_base = np.hypot(config.map_width - buster_x, config.map_height - buster_y) < config.base_range
+        commands[carrying & in_base, 0] = Constants.COMMAND_RELEASE
+        commands[carrying & ~in_base] = (Constants.COMMAND_MOVE, config.map_width - 1000, config.map_height - 1000, 0)
+
+        # Busting the first free ghost in range, several busters can bust the same ghost
+        in_range = (config.bust_min_range <= dist) & (dist <= config.bust_max_range)
+        bustable = in_range & free[:, None, :]
+        busting = ~carrying & bustable.any(axis=-1)
+        bust_target = np.argmax(bustable, axis=-1)
+        commands[busting, 0] = Constants.COMMAND_BUST
+        commands[busting, 3] = bust_target[busting]
+
+        # Chasing the first free ghost out of range that no previous buster busts or chases
+        looking = ~carrying & ~busting
+        chaseable = free[:, None, :] & ~in_range
+        claimed = np.zeros(free.shape, dtype=bool)
+        chasing = np.zeros(busting.shape, dtype=bool)
+        chase_target = np.zeros(busting.shape, dtype=np.int64)
+        for i in range(world.buster_number):
+            claimed[games, bust_target[:, i]] |= busting[:, i]
+            if looking[:, i].any():
+                unclaimed = chaseable[:, i] & ~claimed
+                chasing[:, i] = looking[:, i] & unclaimed.any(axis=-1)
+                chase_target[:, i] = np.argmax(unclaimed, axis=-1)
+                claimed[games, chase_target[:, i]] |= chasing[:, i]
+        commands[chasing, 0] = Constants.COMMAND_MOVE
+        commands[chasing, 1] = np.take_along_axis(ghost_x, chase_target, axis=-1)[chasing]
+        commands[chasing, 2] = np.take_along_axis(ghost_y, chase_target, axis=-1)[chasing]
+
+        # Moving randomly, drawn game after game and buster after buster as next_command does
+        roaming = looking & ~chasing
+        if roaming.any():
+            rng = np.random.default_rng() if rng is None else rng
+            for game, i in zip(*np.nonzero(roaming)):
+                x = rng.integers(1500, max(config.map_width - 1500, 1500), endpoint=True)
+                y = rng.integers(1000, max(config.map_height - 1000, 1000), endpoint=True)
+                commands[game, i] = (Constants.COMMAND_MOVE, x, y, 0)
+
+        return commands if batched else commands[0]
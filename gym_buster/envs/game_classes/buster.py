@@ -1,8 +1,8 @@
-import re
 from gym_buster.envs.game_classes.entity import Entity
 from gym_buster.envs.game_classes.constants import Constants
-from gym_buster.envs.game_classes.ghost import Ghost
-from gym_buster.envs.game_classes.math_utils import MathUtility
+from gym_buster.envs.game_classes.commands import Commands
+from gym_buster.envs.game_classes.world_state import StateField
+from gym_buster.envs.game_classes.tracing import Trace
 
 
 class Buster(Entity):
@@ -10,12 +10,20 @@ class Buster(Entity):
     Class that will handle a buster entity
     """
 
+    __slots__ = ()
+
+    action = StateField('action')
+    value = StateField('value')
+
     # -------------- PRIVATE FUNCTIONS AND PROPERTIES ----------------#
-    def __init__(self, team, id):
+    def __init__(self, team, id, world=None):
         """
         Constructor
+        :param team: the team of the buster
+        :param id: the id of the buster in its team
+        :param world: the world state holding the buster, a new one is created if not given
         """
-        super(Buster, self).__init__(team)
+        super(Buster, self).__init__(team, world, world.buster_slot(team, id) if world is not None else 0)
         self.id = id
         self._generate_buster_position()
         self.action = Constants.ACTION_NOTHING
@@ -29,8 +37,8 @@ class Buster(Entity):
             self.x = 50
             self.y = 50
         elif self.type == Constants.TYPE_BUSTER_TEAM_1:
-            self.x = Constants.MAP_WIDTH - 50
-            self.y = Constants.MAP_HEIGHT - 50
+            self.x = self._world.config.map_width - 50
+            self.y = self._world.config.map_height - 50
         else:
             raise ValueError("Entity neither in team 0 or team 1")
 
@@ -55,8 +63,8 @@ class Buster(Entity):
         :return: true or false
         """
         if ghost:
-            distance = MathUtility.distance(ghost.x, ghost.y, self.x, self.y)
-            return Constants.BUSTER_BUST_MIN_RANGE <= distance <= Constants.BUSTER_BUST_MAX_RANGE
+            distance = self.distance_to(ghost)
+            return self._world.config.bust_min_range <= distance <= self._world.config.bust_max_range
 
         return False
 
@@ -66,26 +74,30 @@ class Buster(Entity):
 
     def buster_command(self, command):
         """
-        Parse the buster command and execute the command
-        :param command: the command to check and execute
-        """
-        try:
-            move = re.match(Constants.ACTION_MOVE_REGEX, command)
-            release = re.match(Constants.ACTION_RELEASE_REGEX, command)
-            bust = re.match(Constants.ACTION_BUST_REGEX, command)
-            if move:
-                self.move(int(move.group(1)), int(move.group(2)))
-                return 0
-            elif release:
-                return self.release()
-            elif bust:
-                self.bust(int(bust.group(1)))
-                return 0
-            else:
-                raise Exception(
-                    "Wrong command for buster : " + str(self) + " , x : " + str(self.x) + ", y : " + str(self.y))
-        except Exception as exc:
-            raise exc
+        Parse the buster text command and execute the command
+        :param command: the text command to check and execute
+        :return: the points won by the buster team
+        """
+        return self.execute(*Commands.parse(command))
+
+    def execute(self, opcode, x, y, ghost_id):
+        """
+        Execute a command (see Commands)
+        :param opcode: the opcode of the command
+        :param x: the x coordinate for a move
+        :param y: the y coordinate for a move
+        :param ghost_id: the ghost to bust
+        :return: the points won by the buster team
+        """
+        if opcode == Constants.COMMAND_MOVE:
+            self.move(x, y)
+            return 0
+        elif opcode == Constants.COMMAND_RELEASE:
+            return self.release()
+        elif opcode == Constants.COMMAND_BUST:
+            self.bust(ghost_id)
+            return 0
+        raise ValueError("Wrong command for buster : " + str(self) + ", opcode : " + str(opcode))
 
     def move(self, x, y):
         """
@@ -95,27 +107,30 @@ class Buster(Entity):
         """
         super(Buster, self).move(x, y)
         self.action = Constants.ACTION_MOVING
-        print("Buster team {} with id {} moving to X: {}, Y: {}".format(self.type, self.id, self.x, self.y))
+        if Trace.buster <= Trace.DEBUG:
+            Trace.record(Trace.BUSTER, Trace.DEBUG, Trace.EVENT_MOVE, self.type, self.id, self.x, self.y)
 
     def release(self):
         """
         Execute the action to release the ghost
         """
         if self.value != Constants.VALUE_BUSTER_NOTHING and self.state == Constants.STATE_BUSTER_CARRYING:
-            ghost = Ghost.get_ghost(self.value)
+            ghost = self._world.get_ghost(self.value)
             ghost.being_released(self)
 
             self.value = Constants.VALUE_BUSTER_NOTHING
             self.state = Constants.STATE_BUSTER_NOTHING
             self.action = Constants.ACTION_RELEASING
 
-            print("Buster team {} with id {} releasing ghost id : {} at X: {}, Y: {}".format(self.type, self.id,
-                                                                                             ghost.id, self.x, self.y))
+            if Trace.buster <= Trace.DEBUG:
+                Trace.record(Trace.BUSTER, Trace.DEBUG, Trace.EVENT_RELEASE, self.type, self.id, ghost.id, self.x,
+                             self.y)
 
             return -1
         else:
             self.action = Constants.ACTION_NOTHING
-            print("Buster team {} with id {} has nothing to release".format(self.type, self.id))
+            if Trace.buster <= Trace.DEBUG:
+                Trace.record(Trace.BUSTER, Trace.DEBUG, Trace.EVENT_NOTHING_TO_RELEASE, self.type, self.id)
 
             return 0
 
@@ -124,15 +139,17 @@ class Buster(Entity):
         Execute the action to catch a ghost with id ids
         :param ids: the ghost to catch
         """
-        ghost = Ghost.get_ghost(ids)
+        ghost = self._world.get_ghost(ids)
         if self.state == Constants.STATE_BUSTER_NOTHING and ghost and self.can_bust(ghost) and not ghost.captured:
             ghost.value += 1
             self.value = ids
             self.action = Constants.ACTION_BUSTING
-            print("Buster team {} with id {} busting ghost id : {}".format(self.type, self.id, ids))
+            if Trace.buster <= Trace.DEBUG:
+                Trace.record(Trace.BUSTER, Trace.DEBUG, Trace.EVENT_BUST, self.type, self.id, ids)
         else:
             self.action = Constants.ACTION_NOTHING
-            print("Buster team {} with id {} failed busting".format(self.type, self.id))
+            if Trace.buster <= Trace.DEBUG:
+                Trace.record(Trace.BUSTER, Trace.DEBUG, Trace.EVENT_BUST_FAILED, self.type, self.id)
 
     def cancelling_bust(self):
         """
@@ -141,14 +158,16 @@ class Buster(Entity):
         self.action = Constants.ACTION_NOTHING
         self.value = Constants.VALUE_BUSTER_NOTHING
         self.state = Constants.STATE_BUSTER_NOTHING
-        print("Buster team {} with id {} cancelled busting".format(self.type, self.id))
+        if Trace.buster <= Trace.DEBUG:
+            Trace.record(Trace.BUSTER, Trace.DEBUG, Trace.EVENT_BUST_CANCELLED, self.type, self.id)
 
     def capturing_ghost(self):
         """
         Function that will change the state of the buster
         """
         self.state = Constants.STATE_BUSTER_CARRYING
-        print("Buster team {} with id {} captured ghost id : {}".format(self.type, self.id, self.value))
+        if Trace.buster <= Trace.DEBUG:
+            Trace.record(Trace.BUSTER, Trace.DEBUG, Trace.EVENT_CAPTURE, self.type, self.id, self.value)
 
     # -------------- END ACTION FUNCTIONS ----------------#
 
@@ -0,0 +1,67 @@
+import re
+
+import numpy as np
+
+from gym_buster.envs.game_classes.constants import Constants
+
+
+class Commands:
+    """
+    Class that will handle the conversion between the CodinGame text commands and the command arrays
+    A command is a row of Constants.COMMAND_SIZE integers : opcode, x, y, ghost id
+    The simulation only uses the arrays, the text form is kept for the bots speaking it
+    """
+
+    @staticmethod
+    def as_array(commands):
+        """
+        Function that gives the commands array of a list of text commands, an array is given back as is
+        :param commands: a commands array or a list of text commands
+        :return: an array of shape (commands, Constants.COMMAND_SIZE)
+        """
+        if isinstance(commands, np.ndarray):
+            return commands
+        return Commands.parse_all(commands)
+
+    @staticmethod
+    def parse(command):
+        """
+        Parse a text command
+        :param command: the command like "MOVE 1234 567", "BUST 4" or "RELEASE"
+        :return: the tuple (opcode, x, y, ghost id)
+        """
+        move = re.match(Constants.ACTION_MOVE_REGEX, command)
+        if move:
+            return Constants.COMMAND_MOVE, int(move.group(1)), int(move.group(2)), 0
+        if re.match(Constants.ACTION_RELEASE_REGEX, command):
+            return Constants.COMMAND_RELEASE, 0, 0, 0
+        bust = re.match(Constants.ACTION_BUST_REGEX, command)
+        if bust:
+            return Constants.COMMAND_BUST, 0, 0, int(bust.group(1))
+        raise ValueError("Wrong command for buster : " + str(command))
+
+    @staticmethod
+    def parse_all(commands):
+        """
+        Parse a list of text commands
+        :param commands: the commands list
+        :return: an array of shape (commands, Constants.COMMAND_SIZE)
+        """
+        return np.array([Commands.parse(command) for command in commands], dtype=np.int64).reshape(
+            len(commands), Constants.COMMAND_SIZE)
+
+    @staticmethod
+    def format(command):
+        """
+        Give the text of a command
+        :param command: the command row (opcode, x, y, ghost id)
+        :return: the text command like "MOVE 1234 567", "BUST 4" or "RELEASE"
+        """
+        opcode, x, y, ghost_id = (int(value) for value in command)
+        if opcode == Constants.COMMAND_MOVE:
+            return "MOVE " + str(x) + " " + str(y)
+        elif opcode == Constants.COMMAND_RELEASE:
+            return "RELEASE"
+        elif opcode == Constants.COMMAND_BUST:
+            return "BUST " + str(ghost_id)
+        raise ValueError("Wrong command opcode : " + str(opcode))
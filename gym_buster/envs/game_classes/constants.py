@@ -27,6 +27,11 @@ class Constants:
     ACTION_RELEASE_REGEX = r'RELEASE'
     ACTION_BUST_REGEX = r'BUST (\d+)'
 
+    COMMAND_MOVE = 1
+    COMMAND_BUST = 2
+    COMMAND_RELEASE = 3
+    COMMAND_SIZE = 4  # opcode, x, y, ghost id
+
     ACTION_NOTHING = 0
     ACTION_MOVING = 1
     ACTION_BUSTING = 2
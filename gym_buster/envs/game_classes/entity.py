@@ -1,30 +1,65 @@
-import random
+import heapq
+import numpy as np
 from math import cos, sin, atan2, degrees, radians
 from gym_buster.envs.game_classes.math_utils import MathUtility
 from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.world_state import WorldState, StateField
+from gym_buster.envs.game_classes.spatial_grid import SpatialGrid
 
 
 class Entity:
     """
     Class that will handle any entity
+    The attributes of the entity are stored in a slot of a world state, the few left on the object are slotted and
+    the rendering objects are kept by the render layer of the environment (see RenderLayer)
     """
 
+    __slots__ = ('_world', '_slot', 'id', 'direction', 'size')
+
+    x = StateField('x')
+    y = StateField('y')
+    angle = StateField('angle')
+    type = StateField('type')
+    state = StateField('state')
+
     # ---------------- PRIVATE FUNCTIONS AND PROPERTY ------------#
-    def __init__(self, type_entity):
+    def __init__(self, type_entity, world=None, slot=0):
         """
         Constructor
+        :param type_entity: the type of the entity
+        :param world: the world state holding the entity, a new one is created if not given
+        :param slot: the slot of the entity in the world state
         """
+        if world is None:
+            world = WorldState.standalone()
+        self._world = world
+        self._slot = slot
 
         self.id = 9999999999
-        self.x = Constants.MAP_WIDTH / 2
-        self.y = Constants.MAP_HEIGHT / 2
+        self.x = world.config.map_width / 2
+        self.y = world.config.map_height / 2
         self.type = type_entity
         self.angle = 0
         self.direction = 0
         self.size = 10
         self.state = Constants.STATE_BUSTER_NOTHING
-        self.render_img = None
-        self.render_trans = None
+
+    @classmethod
+    def view(cls, world, slot, ids):
+        """
+        Function that gives an entity on a slot of a world state without initialising the slot
+        :param world: the world state holding the entity
+        :param slot: the slot of the entity in the world state
+        :param ids: the id of the entity
+        :return: the entity
+        """
+        entity = cls.__new__(cls)
+        entity._world = world
+        entity._slot = slot
+        entity.id = ids
+        entity.direction = 0
+        entity.size = 10
+        return entity
 
     @property
     def is_in_team_0_base(self):
@@ -32,7 +67,7 @@ class Entity:
         Function that say if the entity is in team0 base
         :return: true or false
         """
-        return MathUtility.distance(0, 0, self.x, self.y) < Constants.ENTITY_RANGE_VISION
+        return MathUtility.distance(0, 0, self.x, self.y) < self._world.config.base_range
 
     @property
     def is_in_team_1_base(self):
@@ -40,8 +75,8 @@ class Entity:
         Function that say if the entity is in team1 base
         :return: true or false
         """
-        return MathUtility.distance(Constants.MAP_WIDTH, Constants.MAP_HEIGHT, self.x,
-                                    self.y) < Constants.ENTITY_RANGE_VISION
+        config = self._world.config
+        return MathUtility.distance(config.map_width, config.map_height, self.x, self.y) < config.base_range
 
     def _compute_max_move(self, x, y):
         """
@@ -50,13 +85,26 @@ class Entity:
         :param y: the y coordinate wanted
         :return: the tuple (x', y') of maximum coordinate if the original move is going to far
         """
+        config = self._world.config
         self.angle = degrees(atan2(-(y - self.y), x - self.x))
 
-        if MathUtility.distance(self.x, self.y, x, y) <= Constants.BUSTER_MAX_MOVE:
-            return MathUtility.limit_coordinates(x, y)
+        if MathUtility.distance(self.x, self.y, x, y) <= config.buster_max_move:
+            return MathUtility.limit_coordinates(x, y, config.map_width, config.map_height)
         else:
-            return MathUtility.limit_coordinates(int(self.x + Constants.BUSTER_MAX_MOVE * cos(
-                radians(self.angle))), self.y - int(Constants.BUSTER_MAX_MOVE * sin(radians(self.angle))))
+            return MathUtility.limit_coordinates(int(self.x + config.buster_max_move * cos(radians(self.angle))),
+                                                 self.y - int(config.buster_max_move * sin(radians(self.angle))),
+                                                 config.map_width, config.map_height)
+
+    def distance_to(self, entity):
+        """
+        Function that gives the distance to another entity, read from the distances of the world state when both
+        entities are in the same world
+        :param entity: the other entity
+        :return: the distance
+        """
+        if entity._world is self._world:
+            return self._world.distance(self._slot, entity._slot)
+        return MathUtility.distance(self.x, self.y, entity.x, entity.y)
 
     # ---------------- END PRIVATE FUNCTIONS AND PROPERTY ------------#
     
@@ -74,68 +122,72 @@ class Entity:
     # --------------- END ACTION FUNCTIONS ------------- #
     
     # --------------- UTIL FUNCTIONS FOR ENTITIES --------#
-    def get_closest(self, entities, position):
+    def get_closest(self, entities, position=0):
         """
         Function that gives the closest ghost of the buster from the ghosts list in his vision or of its friends
         :param entities: entities list
         :param position: the position of the closest to return
         :return: an entity and the distance
         """
-        dist0 = Constants.MAP_MAX_DISTANCE
-        closest0 = None
-        for entity in entities:
-            if MathUtility.distance(self.x, self.y, entity.x, entity.y) < dist0:
-                closest0 = entity
-                dist0 = MathUtility.distance(self.x, self.y, entity.x, entity.y)
-
-        closest1 = None
-        dist1 = Constants.MAP_MAX_DISTANCE
-        for entity in entities:
-            if MathUtility.distance(self.x, self.y, entity.x, entity.y) < dist1 and entity != closest0:
-                closest1 = entity
-                dist1 = MathUtility.distance(self.x, self.y, entity.x, entity.y)
-
-        closest2 = None
-        dist2 = Constants.MAP_MAX_DISTANCE
-        for entity in entities:
-            if MathUtility.distance(self.x, self.y, entity.x,
-                                    entity.y) < dist2 and entity != closest0 and entity != closest1:
-                closest2 = entity
-                dist2 = MathUtility.distance(self.x, self.y, entity.x, entity.y)
-
-        closest = [closest0, closest1, closest2]
-        dist = [dist0, dist1, dist2]
-
-        return closest[position], dist[position]
+        closest = self.get_nearest(entities, position + 1)
+        if position < len(closest):
+            return closest[position]
+        return None, Constants.MAP_MAX_DISTANCE
+
+    def get_nearest(self, entities, number):
+        """
+        Function that gives the closest entities sorted by distance, computing each distance once
+        Entities at the same distance keep the order of the list
+        :param entities: entities list
+        :param number: the number of entities to give
+        :return: a list of at most number tuples (entity, distance)
+        """
+        distances = [MathUtility.distance(self.x, self.y, entity.x, entity.y) for entity in entities]
+        closest = heapq.nsmallest(number, range(len(entities)), key=distances.__getitem__)
+        return [(entities[i], distances[i]) for i in closest]
 
     def get_number_entities_in_range(self, entities):
         """
         Function that will give the number of entities in range of this entity
+        Every distance is compared under SpatialGrid.MIN_PAIRS pairs, the entities are indexed in a grid above
         :param entities: entities list
         :return: a number
         """
-        result = 0
-        for entity in entities:
-            if MathUtility.distance(self.x, self.y, entity.x, entity.y) < Constants.ENTITY_RANGE_VISION:
-                result += 1
+        config = self._world.config
+        x = np.array([entity.x for entity in entities], dtype=np.float64)
+        y = np.array([entity.y for entity in entities], dtype=np.float64)
+        if len(entities) < SpatialGrid.MIN_PAIRS:
+            dx = self.x - x
+            dy = self.y - y
+            return int(np.count_nonzero(np.sqrt(dx * dx + dy * dy) < config.range_vision))
 
-        return result
+        grid = SpatialGrid(x, y, config.range_vision, config.map_width, config.map_height)
+        _, targets, _ = grid.query([self.x], [self.y])
+        return len(targets)
 
     @staticmethod
     def get_entities_visible(entities, targets):
         """
         Function that will return all entities that can be seen by entities over targets
+        Every distance is compared under SpatialGrid.MIN_PAIRS pairs, the targets are indexed in a grid above
         :param entities: the entities from which we compute
         :param targets: the targets we want to know which are in range of entities
         :return: a entity list
         """
-        result = []
-        for entity in entities:
-            for target in targets:
-                if MathUtility.distance(entity.x, entity.y, target.x,
-                                        target.y) < Constants.ENTITY_RANGE_VISION and target not in result:
-                    result.append(target)
-
-        return result
+        if not targets:
+            return []
+        config = targets[0]._world.config
+        x = np.array([entity.x for entity in entities], dtype=np.float64)
+        y = np.array([entity.y for entity in entities], dtype=np.float64)
+        target_x = np.array([target.x for target in targets], dtype=np.float64)
+        target_y = np.array([target.y for target in targets], dtype=np.float64)
+        if len(entities) * len(targets) < SpatialGrid.MIN_PAIRS:
+            dx = x[:, None] - target_x
+            dy = y[:, None] - target_y
+            visible = (np.sqrt(dx * dx + dy * dy) < config.range_vision).any(axis=0)
+        else:
+            grid = SpatialGrid(target_x, target_y, config.range_vision, config.map_width, config.map_height)
+            visible = grid.in_range(x, y)
+        return [target for target, seen in zip(targets, visible) if seen]
     
     # --------------- END UTIL FUNCTIONS FOR ENTITIES --------#
@@ -0,0 +1,61 @@
+from gym_buster.envs.game_classes.constants import Constants
+
+
+class GameConfig:
+    """
+    Class that will hold the size of the map and the rule constants of a game
+
+    Every value defaults to the one of Constants. A world state keeps its configuration, the rules and the entities of
+    the world state read their values from it.
+    """
+
+    def __init__(self, map_width=Constants.MAP_WIDTH, map_height=Constants.MAP_HEIGHT,
+                 range_vision=Constants.ENTITY_RANGE_VISION, base_range=Constants.ENTITY_RANGE_VISION,
+                 buster_max_move=Constants.BUSTER_MAX_MOVE, bust_min_range=Constants.BUSTER_BUST_MIN_RANGE,
+                 bust_max_range=Constants.BUSTER_BUST_MAX_RANGE, ghost_run_away=Constants.GHOST_RUN_WAY):
+        """
+        Constructor
+        :param map_width: the width of the map
+        :param map_height: the height of the map
+        :param range_vision: the distance under which an entity sees another one
+        :param base_range: the distance to the corner of a team under which an entity is in the base of the team
+        :param buster_max_move: the longest move of a buster in a round
+        :param bust_min_range: the shortest distance from which a buster can bust a ghost
+        :param bust_max_range: the longest distance from which a buster can bust a ghost
+        :param ghost_run_away: the move of a ghost running away from a buster
+        """
+        if map_width <= 0 or map_height <= 0:
+            raise ValueError("Wrong map size : " + str(map_width) + "x" + str(map_height))
+        if not 0 <= bust_min_range <= bust_max_range:
+            raise ValueError("Wrong bust range : " + str(bust_min_range) + " to " + str(bust_max_range))
+        if range_vision <= 0:
+            raise ValueError("Wrong vision range : " + str(range_vision))
+
+        self.map_width = map_width
+        self.map_height = map_height
+        self.range_vision = range_vision
+        self.base_range = base_range
+        self.buster_max_move = buster_max_move
+        self.bust_min_range = bust_min_range
+        self.bust_max_range = bust_max_range
+        self.ghost_run_away = ghost_run_away
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and self.__dict__ == other.__dict__
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.__dict__.items())))
+
+    def __repr__(self):
+        return 'GameConfig(' + ', '.join(key + '=' + str(value) for key, value in self.__dict__.items()) + ')'
+
+    def as_dict(self):
+        """
+        Function that gives every value of the configuration
+        :return: a dictionary, GameConfig(**dictionary) gives the same configuration
+        """
+        return dict(self.__dict__)
+
+
+# Configuration of the games created without one
+GameConfig.DEFAULT = GameConfig()
@@ -1,7 +1,10 @@
-import random
+import numpy as np
+
 from gym_buster.envs.game_classes.entity import Entity
 from gym_buster.envs.game_classes.constants import Constants
 from gym_buster.envs.game_classes.math_utils import MathUtility
+from gym_buster.envs.game_classes.world_state import WorldState, StateField
+from gym_buster.envs.game_classes.tracing import Trace
 
 
 class Ghost(Entity):
@@ -9,31 +12,39 @@ class Ghost(Entity):
     Class that will handle the ghost entity
     """
 
-    # Class variable to keep trace of all ghosts for performance
-    ghosts = []
+    __slots__ = ()
+
+    value = StateField('value')
+    alive = StateField('alive')
+    captured = StateField('captured')
 
     # ------------- PRIVATE AND PROPERTY FUNCTIONS -------------#
-    def __init__(self, id):
+    def __init__(self, id, world=None, rng=None):
         """
         Constructor
+        :param id: the id of the ghost
+        :param world: the world state holding the ghost, a new one is created if not given
+        :param rng: the numpy random generator placing the ghost, an unseeded one if not given
         """
-        super(Ghost, self).__init__(Constants.TYPE_GHOST)
+        super(Ghost, self).__init__(Constants.TYPE_GHOST, world, world.ghost_slot(id) if world is not None else 0)
         self.value = Constants.VALUE_GHOST_BASIC
 
         self.id = id
-        self._generate_random_ghost_position()
+        self._generate_random_ghost_position(np.random.default_rng() if rng is None else rng)
         self.alive = True
         self.captured = False
-        self._add_ghost(self)
+        self._world.register_ghost(self)
     
-    def _generate_random_ghost_position(self):
+    def _generate_random_ghost_position(self, rng):
         """
         Function that generate a random position for the ghost
+        :param rng: the numpy random generator
         """
+        config = self._world.config
         generated = False
         while not generated:
-            self.x = random.randint(0, Constants.MAP_WIDTH)
-            self.y = random.randint(0, Constants.MAP_HEIGHT)
+            self.x = rng.integers(0, config.map_width, endpoint=True)
+            self.y = rng.integers(0, config.map_height, endpoint=True)
             if not (self.is_in_team_0_base or self.is_in_team_1_base):
                 generated = True
 
@@ -41,32 +52,24 @@ class Ghost(Entity):
      
     # -------------- CLASS METHODS ---------------- #
 
-    @classmethod
-    def _add_ghost(cls, obj):
-        """
-        Add the ghost to the list of the class
-        :param obj: the ghost to add
-        """
-        cls.ghosts.append(obj)
-
     @classmethod
     def reset_ghost(cls):
         """
-        Reset the class list
+        Forget the ghosts created outside of an environment
         """
-        cls.ghosts = []
+        WorldState.standalone_ghosts.clear()
 
     @classmethod
-    def get_ghost(cls, ids):
+    def get_ghost(cls, ids, world=None):
         """
         Return the ghost with the id
         :param ids: the ghost to return
+        :param world: the world state holding the ghost, the ghosts created outside of an environment if not given
         :return: a ghost
         """
-        for ghost in cls.ghosts:
-            if ghost.id == ids:
-                return ghost
-        return None
+        if world is None:
+            return WorldState.standalone_ghosts.get(ids)
+        return world.get_ghost(ids)
 
     # -------------- END CLASS METHODS ---------------- #
 
@@ -78,21 +81,17 @@ class Ghost(Entity):
         :param busters: the list of busters on the map
         :return: the ghost himself and the new coordinates for him
         """
-        closest = []
-        max_distance = Constants.MAP_MAX_DISTANCE
-        for buster in busters:
-            temp_dist = MathUtility.distance(self.x, self.y, buster.x, buster.y)
-            if temp_dist < max_distance and temp_dist < Constants.ENTITY_RANGE_VISION:
-                closest = [buster]
-                max_distance = temp_dist
-            elif temp_dist == max_distance and temp_dist < Constants.ENTITY_RANGE_VISION:
-                closest.append(buster)
-
-        # For now run away from the first but we will need to compute the run away from multiple busters same distance
-        # TODO handle barycenter
-        if closest:
-            new_x, new_y = MathUtility.opposite_direction(self.x, self.y, closest[0].x, closest[0].y,
-                                                          Constants.GHOST_RUN_WAY)
+        if not busters:
+            return
+        config = self._world.config
+        dx = np.array([buster.x for buster in busters], dtype=np.float64) - self.x
+        dy = np.array([buster.y for buster in busters], dtype=np.float64) - self.y
+        distances = np.sqrt(dx * dx + dy * dy)
+        closest = int(np.argmin(distances))
+        if distances[closest] < config.range_vision:
+            buster = busters[closest]
+            new_x, new_y = MathUtility.opposite_direction(self.x, self.y, buster.x, buster.y, config.ghost_run_away,
+                                                          config.map_width, config.map_height)
             self.x = new_x
             self.y = new_y
 
@@ -125,7 +124,8 @@ class Ghost(Entity):
         """
         Function to call when same numbers of busters in each team tried to catch this ghost
         """
-        print("Ghost {} cancelling busting".format(self.id))
+        if Trace.ghost <= Trace.DEBUG:
+            Trace.record(Trace.GHOST, Trace.DEBUG, Trace.EVENT_GHOST_BUST_CANCELLED, entity=self.id)
         self.captured = False
         self.value = Constants.VALUE_GHOST_BASIC
 
@@ -21,7 +21,7 @@ class MathUtility:
         return sqrt(pow((x1 - x2), 2) + pow((y1 - y2), 2))
 
     @staticmethod
-    def opposite_direction(x1, y1, x2, y2, length):
+    def opposite_direction(x1, y1, x2, y2, length, width=Constants.MAP_WIDTH, height=Constants.MAP_HEIGHT):
         """
         Compute the opposite point of point2 through point 1 but with a different length
         :param x1: the x coordinate from point 1
@@ -29,6 +29,8 @@ class MathUtility:
         :param x2: the x coordinate from point 2
         :param y2: the y coordinate from point 2
         :param length: the length from point1 to new point
+        :param width: the width of the map
+        :param height: the height of the map
         :return: a new point opposite to point2 of length length from this new point to point 1
         """
         dist = MathUtility.distance(x1, y1, x2, y2)
@@ -38,27 +40,29 @@ class MathUtility:
             new_x = (x1 - x2)/dist
             new_y = (y1 - y2)/dist
 
-            return MathUtility.limit_coordinates(x1 + new_x * length, y1 + new_y * length)
+            return MathUtility.limit_coordinates(x1 + new_x * length, y1 + new_y * length, width, height)
 
     @staticmethod
-    def limit_coordinates(x1, y1):
+    def limit_coordinates(x1, y1, width=Constants.MAP_WIDTH, height=Constants.MAP_HEIGHT):
         """
         Function that will return the coordinates to stay on the map
         :param x1: the x coordinate
         :param y1: the y coordinate
+        :param width: the width of the map
+        :param height: the height of the map
         :return: a tuple
         """
         if x1 < 0:
             x = 0
-        elif x1 > Constants.MAP_WIDTH:
-            x = Constants.MAP_WIDTH
+        elif x1 > width:
+            x = width
         else:
             x = x1
 
         if y1 < 0:
             y = 0
-        elif y1 > Constants.MAP_HEIGHT:
-            y = Constants.MAP_HEIGHT
+        elif y1 > height:
+            y = height
         else:
             y = y1
         return x, y
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class ObservationBuilder:
+    """
+    Class that will build the observations of team 0 in preallocated buffers
+
+    Layout of an observation : team 0 points, team 1 points, then for each buster of team 0 : state (carrying or
+    not), buster_x, buster_y, then x, y and can_bust of its 3 closest visible ghosts, then base_x, base_y.
+
+    Two buffers are used in turn, so an observation stays valid while the next one is built (enough to compare the
+    previous and the new observation of a step). Copy an observation to keep it longer.
+    """
+
+    BUSTER_SIZE = 14
+    CLOSEST_GHOSTS = 3
+
+    def __init__(self, buster_number, batch_size=None, dtype=np.float64):
+        """
+        Constructor
+        :param buster_number: the number of busters in each team
+        :param batch_size: the number of games, a single game without batch axis if not given
+        :param dtype: the type of the observations
+        """
+        self.buster_number = buster_number
+        self.size = 2 + self.BUSTER_SIZE * buster_number
+        self.shape = (self.size,) if batch_size is None else (batch_size, self.size)
+        self.dtype = np.dtype(dtype)
+        self.buffers = [np.zeros(self.shape, dtype=self.dtype) for _ in range(2)]
+        self.current = 0
+
+    def build(self, world, scores, closest, out=None):
+        """
+        Function that writes the observation of every game
+        :param world: the world state
+        :param scores: the points of team 0 and team 1, an array of shape (..., 2)
+        :param closest: the tuple (ids, distances) of the closest visible ghosts of each buster of team 0, see
+        WorldState.nearest
+        :param out: the array to write in, the next buffer if not given
+        :return: the observation, an array of shape (..., size)
+        """
+        if out is None:
+            self.current = 1 - self.current
+            out = self.buffers[self.current]
+
+        out[..., :2] = scores
+
+        busters = out[..., 2:].reshape(out.shape[:-1] + (self.buster_number, self.BUSTER_SIZE))
+        busters[..., 0] = world.state[..., world.team_0]
+        busters[..., 1] = world.x[..., world.team_0]
+        busters[..., 2] = world.y[..., world.team_0]
+
+        # coordinates of the closest visible ghosts, 1.0 when there is no more visible ghost
+        config = world.config
+        ids, dist = closest
+        found = dist < np.inf
+        slots = ids + world.ghosts.start
+        if world.batch_size is not None:
+            slots += np.arange(world.batch_size)[:, None, None] * world.size
+        ghosts = busters[..., 3:3 + 3 * self.CLOSEST_GHOSTS].reshape(ids.shape + (3,))
+        ghosts[..., 0] = np.where(found, world.x.ravel()[slots] / config.map_width, 1.0)
+        ghosts[..., 1] = np.where(found, world.y.ravel()[slots] / config.map_height, 1.0)
+        ghosts[..., 2] = (config.bust_min_range <= dist) & (dist <= config.bust_max_range)
+
+        busters[..., 3 + 3 * self.CLOSEST_GHOSTS:] = (50.0 / config.map_width, 50.0 / config.map_height)
+
+        return out
+
+    def copy(self, observation):
+        """
+        Function that writes a saved observation in the next buffer
+        :param observation: the observation
+        :return: the copy
+        """
+        self.current = 1 - self.current
+        out = self.buffers[self.current]
+        out[...] = observation
+        return out
@@ -0,0 +1,63 @@
+import time
+
+
+class PhaseTimer:
+    """
+    Class that will accumulate the time spent in each phase of the steps of an episode
+
+    The timer is only created when the timing is enabled, a call site checks that the timer exists before timing, so a
+    disabled timer only costs a comparison. Each lap adds the monotonic time since the previous lap (or the start of the
+    step) to the counter of a phase, in nanoseconds.
+    """
+
+    # Phases of a step
+    ACTION = 0
+    OPPONENT = 1
+    COMMANDS = 2
+    CONFLICTS = 3
+    RUN_AWAY = 4
+    SCORING = 5
+    STATE = 6
+    OBSERVATION = 7
+    PHASE_NAMES = ('action', 'opponent', 'commands', 'conflicts', 'run_away', 'scoring', 'state', 'observation')
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.totals = [0] * len(self.PHASE_NAMES)
+        self.steps = 0
+        self.last = 0
+
+    def clear(self):
+        """
+        Set every counter back to zero, at the start of an episode
+        """
+        self.totals = [0] * len(self.PHASE_NAMES)
+        self.steps = 0
+
+    def start(self):
+        """
+        Start timing the first phase of a step
+        """
+        self.last = time.perf_counter_ns()
+
+    def lap(self, phase):
+        """
+        End a phase and start the next one
+        :param phase: the phase ended
+        """
+        now = time.perf_counter_ns()
+        self.totals[phase] += now - self.last
+        self.last = now
+
+    def stats(self):
+        """
+        Function that gives the counters
+        :return: a dictionary with the nanoseconds spent in each phase ('<phase>_ns'), their sum ('total_ns') and the
+        number of steps timed ('steps')
+        """
+        stats = {name + '_ns': total for name, total in zip(self.PHASE_NAMES, self.totals)}
+        stats['total_ns'] = sum(self.totals)
+        stats['steps'] = self.steps
+        return stats
@@ -0,0 +1,124 @@
+import numpy as np
+
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.game_config import GameConfig
+
+
+class Rasterizer:
+    """
+    Class that will draw the games of a world state in rgb arrays with numpy only, without viewer nor display
+
+    The background with the two bases is drawn once, a frame is a copy of the background on which every entity is
+    stamped as a disc : the pixels of all the discs are computed and written at once from the offsets of the pixels of
+    one disc. Frames are drawn in a canvas with a margin as wide as a disc, so discs crossing a side need no clipping.
+    The map is drawn as the viewer does, the corner of team 0 at the bottom left. Frames are views on a canvas
+    allocated once, they are overwritten by the next draw.
+    """
+
+    BACKGROUND_COLOR = (255, 255, 255)
+    BASE_0_COLOR = (255, 225, 225)
+    BASE_1_COLOR = (225, 255, 225)
+    GHOST_COLOR = (0, 0, 255)
+    TEAM_0_COLOR = (255, 0, 0)
+    TEAM_1_COLOR = (0, 255, 0)
+    CARRYING_COLOR = (255, 255, 0)
+
+    def __init__(self, config=None, width=Constants.PYGAME_WINDOW_WIDTH, height=Constants.PYGAME_WINDOW_HEIGHT,
+                 batch_size=None):
+        """
+        Constructor
+        :param config: the map size and rule constants of the games (see GameConfig), GameConfig.DEFAULT if not given
+        :param width: the width of a frame in pixels
+        :param height: the height of a frame in pixels
+        :param batch_size: the number of games of the world states drawn, a single game if not given
+        """
+        self.config = GameConfig.DEFAULT if config is None else config
+        self.width = width
+        self.height = height
+        self.batch_size = batch_size
+        self.scale_x = width / self.config.map_width
+        self.scale_y = height / self.config.map_height
+
+        # Canvas of every frame with its margin, the frames are views on it
+        self.margin = max(Constants.PYGAME_GHOST_RADIUS, Constants.PYGAME_BUSTER_RADIUS)
+        self.canvas_height = height + 2 * self.margin
+        self.canvas_width = width + 2 * self.margin
+        shape = (self.canvas_height, self.canvas_width, 3)
+        self.canvas = np.empty(shape if batch_size is None else (batch_size,) + shape, dtype=np.uint8)
+        self.frames = self.canvas[..., self.margin:self.margin + height, self.margin:self.margin + width, :]
+        self.background = self._background()
+        self.ghost_disc = self._disc(Constants.PYGAME_GHOST_RADIUS)
+        self.buster_disc = self._disc(Constants.PYGAME_BUSTER_RADIUS)
+
+    def _disc(self, radius):
+        """
+        Function that gives the pixels of a disc around its centre
+        :param radius: the radius of the disc in pixels, at most the margin of the canvas
+        :return: the offsets of the pixels in the canvas
+        """
+        rows, columns = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+        inside = rows * rows + columns * columns <= radius * radius
+        return rows[inside] * self.canvas_width + columns[inside]
+
+    def _background(self):
+        """
+        Function that draws the map without entities : the bases on a white background
+        :return: an array of the shape of the canvas of a frame
+        """
+        config = self.config
+        rows, columns = np.mgrid[0:self.canvas_height, 0:self.canvas_width] - self.margin
+        x = (columns + 0.5) / self.scale_x
+        y = (self.height - rows - 0.5) / self.scale_y
+
+        background = np.empty((self.canvas_height, self.canvas_width, 3), dtype=np.uint8)
+        background[...] = self.BACKGROUND_COLOR
+        background[np.hypot(x, y) < config.base_range] = self.BASE_0_COLOR
+        background[np.hypot(config.map_width - x, config.map_height - y) < config.base_range] = self.BASE_1_COLOR
+        return background
+
+    def _stamp(self, canvas, games, x, y, colors, disc):
+        """
+        Draw discs in frames, every disc at once
+        :param canvas: the canvas of the frames, a flat array of bytes
+        :param games: the frame of each disc
+        :param x: the x coordinate of each disc on the map
+        :param y: the y coordinate of each disc on the map
+        :param colors: the color of each disc, an array of shape (discs, 3)
+        :param disc: the pixels of a disc, see _disc
+        """
+        row = self.height - 1 - np.clip(np.rint(y * self.scale_y).astype(np.intp), 0, self.height - 1)
+        column = np.clip(np.rint(x * self.scale_x).astype(np.intp), 0, self.width - 1)
+        centre = (games * self.canvas_height + row + self.margin) * self.canvas_width + column + self.margin
+        bytes_index = ((centre[:, None] + disc) * 3).reshape(-1)
+        for channel in range(3):
+            canvas[bytes_index + channel] = np.repeat(colors[:, channel], len(disc))
+
+    def draw(self, world):
+        """
+        Function that draws every game of a world state : the free ghosts, then the busters (yellow when carrying)
+        :param world: the world state, with batch_size games
+        :return: the frames, a view of shape (..., height, width, 3) of uint8 with the batch axis first if any
+        """
+        canvas = self.canvas.reshape(-1)
+        self.canvas[...] = self.background
+
+        ghosts = world.ghosts
+        free = world.free_ghosts().reshape(-1, world.ghost_number)
+        games, slots = np.nonzero(free)
+        if len(games):
+            ghost_x = world.x[..., ghosts].reshape(free.shape)[games, slots]
+            ghost_y = world.y[..., ghosts].reshape(free.shape)[games, slots]
+            colors = np.broadcast_to(np.array(self.GHOST_COLOR, dtype=np.uint8), (len(games), 3))
+            self._stamp(canvas, games, ghost_x, ghost_y, colors, self.ghost_disc)
+
+        if world.buster_number:
+            busters = world.busters
+            count = 2 * world.buster_number
+            games = np.arange(self.canvas.size // self.background.size * count) // count
+            team = np.arange(len(games)) % count // world.buster_number
+            colors = np.array([self.TEAM_0_COLOR, self.TEAM_1_COLOR], dtype=np.uint8)[team]
+            colors[world.state[..., busters].reshape(-1) == Constants.STATE_BUSTER_CARRYING] = self.CARRYING_COLOR
+            self._stamp(canvas, games, world.x[..., busters].reshape(-1), world.y[..., busters].reshape(-1), colors,
+                        self.buster_disc)
+
+        return self.frames
@@ -0,0 +1,96 @@
+class RenderLayer:
+    """
+    Class that will hold the rendering objects of the entities of a game, apart from the entities
+    The objects are keyed by the type and the id of their entity, so entities only hold the game state and a game that
+    is never rendered never creates any of them
+
+    The layer is a pool : the geometries of an entity are created once, the first time the entity is drawn, and kept
+    for every following episode. The layer is added to the viewer as a single geometry and draws the geometries of the
+    entities that are shown, an entity out of the game (a ghost carried or scored) is hidden instead of removed.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.images = {}
+        self.transforms = {}
+        self.hidden = set()
+
+    @staticmethod
+    def key(entity):
+        """
+        Function that gives the key of an entity
+        :param entity: the entity
+        :return: the tuple (type, id)
+        """
+        return entity.type, entity.id
+
+    def add(self, entity, image, transform):
+        """
+        Keep the rendering objects of an entity
+        :param entity: the entity
+        :param image: the geometry drawn for the entity
+        :param transform: the transform placing the geometry
+        """
+        key = self.key(entity)
+        self.images[key] = image
+        self.transforms[key] = transform
+
+    def pool(self, entities, make):
+        """
+        Function that creates the rendering objects of the entities that have none yet
+        :param entities: the entities
+        :param make: a function giving the tuple (image, transform) of an entity
+        :return: the number of entities given new rendering objects
+        """
+        created = 0
+        for entity in entities:
+            if self.key(entity) not in self.images:
+                self.add(entity, *make(entity))
+                created += 1
+        return created
+
+    def image(self, entity):
+        """
+        Function that gives the geometry drawn for an entity
+        :param entity: the entity
+        :return: the geometry, None if the entity has none
+        """
+        return self.images.get(self.key(entity))
+
+    def transform(self, entity):
+        """
+        Function that gives the transform placing the geometry of an entity
+        :param entity: the entity
+        :return: the transform, None if the entity has none
+        """
+        return self.transforms.get(self.key(entity))
+
+    def show(self, entity, shown=True):
+        """
+        Show or hide the geometry of an entity
+        :param entity: the entity
+        :param shown: false to hide the entity
+        """
+        if shown:
+            self.hidden.discard(self.key(entity))
+        else:
+            self.hidden.add(self.key(entity))
+
+    def render(self):
+        """
+        Draw the geometries of the shown entities, called by the viewer holding the layer
+        """
+        hidden = self.hidden
+        for key, image in self.images.items():
+            if key not in hidden:
+                image.render()
+
+    def clear(self):
+        """
+        Forget every rendering object, when the viewer is closed
+        """
+        self.images.clear()
+        self.transforms.clear()
+        self.hidden.clear()
@@ -0,0 +1,304 @@
+import numpy as np
+
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.ai_behaviour import Aibehaviour
+from gym_buster.envs.game_classes.tracing import Trace
+
+
+class Rules:
+    """
+    Class that will handle the rules of a round applied on a whole world state at once
+    Every function works on a single game or on a batch of games (see WorldState)
+    """
+
+    @staticmethod
+    def simulate(world, commands_0, commands_1=None, rng=None):
+        """
+        Function that plays a round on a copy of a world state, nothing given is modified
+        Same rules as BusterEnv._run_step, every game of a batch can be given its own commands to expand many
+        candidate actions at once (see WorldState.from_snapshots)
+        :param world: the world state, a single game or a batch
+        :param commands_0: the commands of team 0, an array of shape (..., buster_number, Constants.COMMAND_SIZE)
+        :param commands_1: the commands of team 1, the simple AI (class Aibehaviour) plays team 1 if not given
+        :param rng: the numpy random generator of the simple AI
+        :return: the tuple (next world state, array with the points won by team 0 and team 1)
+        """
+        next_world = world.copy()
+        if commands_1 is None:
+            commands_1 = Aibehaviour.world_commands(next_world, rng)
+        commands = np.concatenate([np.asarray(commands_0), np.asarray(commands_1)], axis=-2)
+        return next_world, Rules.play_round(next_world, commands)
+
+    @staticmethod
+    def play_round(world, commands):
+        """
+        Function that plays a whole round : commands, busting conflicts, ghosts running away and bases scoring
+        :param world: the world state to update
+        :param commands: the commands array of every buster (team 0 then team 1), see Commands
+        :return: an array with the points won by team 0 and team 1 during the round
+        """
+        score = Rules.apply_commands(world, commands)
+        score += Rules.resolve_busting(world)
+        Rules.ghosts_run_away(world)
+        score += Rules.score_bases(world)
+        return score
+
+    @staticmethod
+    def apply_commands(world, commands):
+        """
+        Function that executes the command of every buster
+        Same order as BusterEnv._run_step, buster by buster alternating the teams (buster 0 of team 0, buster 0 of
+        team 1, buster 1 of team 0, ...) : a ghost released during the round can only be busted by a buster coming
+        after the one releasing it, it is still carried for the busters coming before
+        :param world: the world state to update
+        :param commands: the commands array of every buster (team 0 then team 1), see Commands
+        :return: an array with the points of team 0 and team 1 (a released ghost costs one point)
+        """
+        busters = world.busters
+        config = world.config
+        opcode = commands[..., 0]
+        buster_x = world.x[..., busters]
+        buster_y = world.y[..., busters]
+        buster_angle = world.angle[..., busters]
+        buster_state = world.state[..., busters]
+        buster_action = world.action[..., busters]
+        buster_value = world.value[..., busters]
+        score = np.zeros(opcode.shape[:-1] + (2,), dtype=np.int64)
+
+        # Place of each buster in the order of the commands
+        order = np.arange(2 * world.buster_number)
+        order = 2 * (order % world.buster_number) + order // world.buster_number
+        released_by = None
+
+        # Moving, at most buster_max_move toward the point
+        moving = opcode == Constants.COMMAND_MOVE
+        if moving.any():
+            target_x = commands[..., 1]
+            target_y = commands[..., 2]
+            angle = np.degrees(np.arctan2(-(target_y - buster_y), target_x - buster_x))
+            dist = np.sqrt((buster_x - target_x) ** 2 + (buster_y - target_y) ** 2)
+            far_x = np.trunc(buster_x + config.buster_max_move * np.cos(np.radians(angle)))
+            far_y = buster_y - np.trunc(config.buster_max_move * np.sin(np.radians(angle)))
+            close = dist <= config.buster_max_move
+            new_x = np.clip(np.where(close, target_x, far_x), 0, config.map_width)
+            new_y = np.clip(np.where(close, target_y, far_y), 0, config.map_height)
+
+            buster_x[moving] = new_x[moving]
+            buster_y[moving] = new_y[moving]
+            buster_angle[moving] = angle[moving]
+            buster_action[moving] = Constants.ACTION_MOVING
+
+        # Releasing the carried ghost where the buster stands
+        releasing = opcode == Constants.COMMAND_RELEASE
+        buster_action[releasing] = Constants.ACTION_NOTHING
+        releasing &= (buster_value != Constants.VALUE_BUSTER_NOTHING) & (
+            buster_state == Constants.STATE_BUSTER_CARRYING)
+        if releasing.any():
+            index = np.nonzero(releasing)
+            lead = index[:-1]
+            buster_slots = lead + (index[-1] + busters.start,)
+            ghost_slots = lead + (buster_value[releasing] + world.ghosts.start,)
+            dropped = np.zeros(releasing.shape, dtype=bool)
+            dropped[releasing] = world.captured[ghost_slots]
+            world.ghosts_carried -= np.count_nonzero(dropped, axis=-1)
+
+            world.captured[ghost_slots] = False
+            world.x[ghost_slots] = world.x[buster_slots]
+            world.y[ghost_slots] = world.y[buster_slots]
+            world.angle[ghost_slots] = world.angle[buster_slots]
+            world.value[ghost_slots] = Constants.VALUE_GHOST_BASIC
+
+            # Place of the buster releasing each ghost, -1 for the ghosts not released
+            released_by = np.full(world.x.shape[:-1] + (world.ghost_number,), -1)
+            released_by[lead + (buster_value[releasing],)] = order[index[-1]]
+
+            buster_value[releasing] = Constants.VALUE_BUSTER_NOTHING
+            buster_state[releasing] = Constants.STATE_BUSTER_NOTHING
+            buster_action[releasing] = Constants.ACTION_RELEASING
+            np.add.at(score, lead + (index[-1] // world.buster_number,), -1)
+
+        # Positions of this round are known, every phase until the ghosts move shares the distances
+        world.moved()
+
+        # Busting a ghost in range that nobody carries
+        busting = opcode == Constants.COMMAND_BUST
+        buster_action[busting] = Constants.ACTION_NOTHING
+        ghost_ids = commands[..., 3]
+        busting &= (buster_state == Constants.STATE_BUSTER_NOTHING) & (ghost_ids >= 0) & (
+            ghost_ids < world.ghost_number)
+        if busting.any():
+            targets = np.where(busting, ghost_ids, 0)
+            ghost_slots = targets + world.ghosts.start
+            dist = np.take_along_axis(world.distances(busters, world.ghosts), targets[..., None], axis=-1)[..., 0]
+            busting &= (config.bust_min_range <= dist) & (dist <= config.bust_max_range)
+            busting &= ~np.take_along_axis(world.captured, ghost_slots, axis=-1)
+            if released_by is not None:
+                busting &= np.take_along_axis(released_by, targets, axis=-1) < order
+
+            buster_value[busting] = ghost_ids[busting]
+            buster_action[busting] = Constants.ACTION_BUSTING
+            index = np.nonzero(busting)
+            np.add.at(world.value, index[:-1] + (ghost_slots[busting],), 1)
+
+        return score
+
+    @staticmethod
+    def resolve_busting(world):
+        """
+        Function that resolves the busters of both teams busting the same ghost
+        1. If the same number of busters of each team are busting a ghost then the busting is cancelled for the ghost
+        and the busters
+        2. Else the team with most busters wins the ghost and it is captured by the closest buster of this team, the
+        other busters are cancelled. A ghost already captured follows its carrier
+        Busters are grouped by the ghost they target : the counts of each team are bincounts over the targets and the
+        closest buster of a group is found with minimum reductions, so only the busters with a target are visited
+        :param world: the world state to update
+        :return: an array with the points of team 0 and team 1 (a captured ghost gives one point)
+        """
+        buster_number = world.buster_number
+        ghost_number = world.ghost_number
+        score = np.zeros(world.x.shape[:-1] + (2,), dtype=np.int64)
+        buster_value = world.value[..., world.busters]
+        targeting = (buster_value >= 0) & (buster_value < ghost_number)
+        if not targeting.any():
+            return score
+
+        # Flat index of the targeted ghost of every buster with a target, over every game of the batch
+        game, buster = np.nonzero(targeting.reshape(-1, 2 * buster_number))
+        target = buster_value.reshape(-1, 2 * buster_number)[game, buster]
+        group = game * ghost_number + target
+        team = buster // buster_number
+        size = score[..., 0].size * ghost_number
+        count_0 = np.bincount(group[team == 0], minlength=size)
+        count_1 = np.bincount(group[team == 1], minlength=size)
+
+        ghost_alive = world.alive[..., world.ghosts].reshape(-1)
+        ghost_value = world.value[..., world.ghosts].reshape(-1)
+        contested = ghost_alive & (ghost_value != Constants.VALUE_GHOST_BASIC)
+        tie = contested & (count_0 == count_1) & (count_1 > 0)
+        won = contested & (count_0 != count_1)
+        if not (tie.any() or won.any()):
+            return score
+
+        # Closest buster of the winning team, the first one when several are at the same distance
+        winner = (count_1 > count_0).astype(np.int64)
+        members = won[group] & (team == winner[group])
+        dist = world.buster_distances().reshape(-1, 2 * buster_number, world.size)[
+            game, buster, target + world.ghosts.start]
+        closest_dist = np.full(size, np.inf)
+        np.minimum.at(closest_dist, group[members], dist[members])
+        members &= dist == closest_dist[group]
+        closest = np.full(size, 2 * buster_number)
+        np.minimum.at(closest, group[members], buster[members])
+        is_closest = won[group] & (buster == closest[group])
+        cancelled = (tie | won)[group] & ~is_closest
+
+        # Ghosts follow the closest buster, captured when it was busting
+        flat_action = world.action[..., world.busters].reshape(-1, 2 * buster_number)
+        carrying = is_closest & (flat_action[game, buster] == Constants.ACTION_BUSTING)
+        followed = np.nonzero(is_closest)[0]
+        following = group[followed]
+        captured = group[carrying]
+        tied = np.nonzero(tie)[0]
+
+        ghosts = world.ghosts.start
+        games = score[..., 0].size
+        flat_x = world.x.reshape(-1, world.size)
+        flat_y = world.y.reshape(-1, world.size)
+        follow_game = game[followed]
+        flat_x[follow_game, target[followed] + ghosts] = flat_x[follow_game, buster[followed]]
+        flat_y[follow_game, target[followed] + ghosts] = flat_y[follow_game, buster[followed]]
+        world.moved()
+        flat_captured = world.captured.reshape(-1, world.size)
+        flat_value = world.value.reshape(-1, world.size)
+        newly = captured[~flat_captured[captured // ghost_number, captured % ghost_number + ghosts]]
+        freed = tied[flat_captured[tied // ghost_number, tied % ghost_number + ghosts]]
+        world.ghosts_carried += (np.bincount(newly // ghost_number, minlength=games) - np.bincount(
+            freed // ghost_number, minlength=games)).reshape(world.ghosts_carried.shape)
+        flat_captured[captured // ghost_number, captured % ghost_number + ghosts] = True
+        flat_value[captured // ghost_number, captured % ghost_number + ghosts] = 1
+        flat_captured[tied // ghost_number, tied % ghost_number + ghosts] = False
+        flat_value[tied // ghost_number, tied % ghost_number + ghosts] = Constants.VALUE_GHOST_BASIC
+
+        flat_state = world.state.reshape(-1, world.size)
+        flat_state[game[carrying], buster[carrying]] = Constants.STATE_BUSTER_CARRYING
+        flat_action[game[cancelled], buster[cancelled]] = Constants.ACTION_NOTHING
+        flat_value[game[cancelled], buster[cancelled]] = Constants.VALUE_BUSTER_NOTHING
+        flat_state[game[cancelled], buster[cancelled]] = Constants.STATE_BUSTER_NOTHING
+
+        flat_score = score.reshape(-1, 2)
+        np.add.at(flat_score, (game[carrying], team[carrying]), 1)
+
+        if Trace.ghost <= Trace.DEBUG:
+            for ghost in tied % ghost_number:
+                Trace.record(Trace.GHOST, Trace.DEBUG, Trace.EVENT_GHOST_BUST_CANCELLED, entity=int(ghost))
+        if Trace.buster <= Trace.DEBUG:
+            for i in np.nonzero(cancelled | carrying)[0]:
+                buster_type = Constants.TYPE_BUSTER_TEAM_0 if team[i] == 0 else Constants.TYPE_BUSTER_TEAM_1
+                buster_id = int(buster[i] % buster_number)
+                if carrying[i]:
+                    Trace.record(Trace.BUSTER, Trace.DEBUG, Trace.EVENT_CAPTURE, buster_type, buster_id, int(target[i]))
+                else:
+                    Trace.record(Trace.BUSTER, Trace.DEBUG, Trace.EVENT_BUST_CANCELLED, buster_type, buster_id)
+        return score
+
+    @staticmethod
+    def ghosts_run_away(world):
+        """
+        Function that will make every free ghost run away from the closest buster in its range of vision
+        If more than one buster are at the same distance, the ghost runs away from the first one
+        :param world: the world state to update
+        """
+        if world.buster_number == 0 or not np.any(world.count_free()):
+            return
+
+        grid = world.grid(world.busters, world.ghosts)
+        if grid is None:
+            dist = world.distances(world.busters, world.ghosts)
+            closest = np.argmin(dist, axis=-2)
+            closest_dist = np.take_along_axis(dist, closest[..., None, :], axis=-2)[..., 0, :]
+        else:
+            closest, closest_dist = grid.closest(world.x[..., world.busters], world.y[..., world.busters])
+        config = world.config
+        fleeing = world.free_ghosts() & (closest_dist < config.range_vision) & (closest_dist > 0)
+        if not fleeing.any():
+            return
+
+        ghost_x = world.x[..., world.ghosts]
+        ghost_y = world.y[..., world.ghosts]
+        buster_x = np.take_along_axis(world.x[..., world.busters], closest, axis=-1)
+        buster_y = np.take_along_axis(world.y[..., world.busters], closest, axis=-1)
+
+        safe_dist = np.where(fleeing, closest_dist, 1.0)
+        new_x = np.clip(ghost_x + (ghost_x - buster_x) / safe_dist * config.ghost_run_away, 0, config.map_width)
+        new_y = np.clip(ghost_y + (ghost_y - buster_y) / safe_dist * config.ghost_run_away, 0, config.map_height)
+        ghost_x[fleeing] = new_x[fleeing]
+        ghost_y[fleeing] = new_y[fleeing]
+        world.moved()
+
+    @staticmethod
+    def score_bases(world):
+        """
+        Function that will kill every free ghost standing in a base and give the point to the base owner
+        :param world: the world state to update
+        :return: an array with the points of team 0 and team 1
+        """
+        if not np.any(world.count_free()):
+            return np.zeros(world.x.shape[:-1] + (2,), dtype=np.int64)
+
+        config = world.config
+        free = world.free_ghosts()
+        ghost_x = world.x[..., world.ghosts]
+        ghost_y = world.y[..., world.ghosts]
+
+        in_base_0 = np.hypot(ghost_x, ghost_y) < config.base_range
+        in_base_1 = np.hypot(config.map_width - ghost_x, config.map_height - ghost_y) < config.base_range
+        scored_0 = free & in_base_0
+        scored_1 = free & ~in_base_0 & in_base_1
+
+        scored = scored_0 | scored_1
+        alive = world.alive[..., world.ghosts]
+        alive[scored] = False
+        world.ghosts_alive -= np.count_nonzero(scored, axis=-1)
+
+        return np.stack([np.count_nonzero(scored_0, axis=-1), np.count_nonzero(scored_1, axis=-1)], axis=-1)
@@ -0,0 +1,144 @@
+import numpy as np
+
+from gym_buster.envs.game_classes.constants import Constants
+
+
+class SpatialGrid:
+    """
+    Class that will index the positions of a group of entities in a uniform grid to answer radius queries
+
+    The map is cut in square cells as large as the query radius, so every entity in range of a position stands in the
+    3x3 cells around the position and only those entities are compared. Positions can have a batch axis first, each
+    game then has its own cells and entities of different games are never paired.
+    """
+
+    # Number of pairs under which comparing every pair is faster than indexing
+    MIN_PAIRS = 10000
+
+    def __init__(self, x, y, cell_size=Constants.ENTITY_RANGE_VISION, width=Constants.MAP_WIDTH,
+                 height=Constants.MAP_HEIGHT):
+        """
+        Constructor, index the positions
+        :param x: the x coordinates of the indexed entities, an array of shape (..., entities)
+        :param y: the y coordinates of the indexed entities
+        :param cell_size: the side of a cell, the largest radius a query can use
+        :param width: the width of the map
+        :param height: the height of the map
+        """
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.cell_size = cell_size
+        self.columns = int(width // cell_size) + 1
+        self.rows = int(height // cell_size) + 1
+
+        keys = self._keys(self.x, self.y).ravel()
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def _cells(self, x, y):
+        """
+        Function that gives the cell of positions, positions out of the map are in the closest border cell
+        :param x: the x coordinates
+        :param y: the y coordinates
+        :return: the tuple (column, row) of arrays
+        """
+        column = np.clip(np.floor_divide(x, self.cell_size), 0, self.columns - 1).astype(np.int64)
+        row = np.clip(np.floor_divide(y, self.cell_size), 0, self.rows - 1).astype(np.int64)
+        return column, row
+
+    def _games(self, shape):
+        """
+        Function that gives the index of the game of every position
+        :param shape: the shape of the positions
+        :return: an array of the same shape
+        """
+        games = np.arange(int(np.prod(shape[:-1], dtype=np.int64))).reshape(shape[:-1] + (1,))
+        return np.broadcast_to(games, shape)
+
+    def _keys(self, x, y):
+        """
+        Function that gives the key of the cell of positions, unique over the games
+        :param x: the x coordinates
+        :param y: the y coordinates
+        :return: an array of keys
+        """
+        column, row = self._cells(x, y)
+        return (self._games(x.shape) * self.rows + row) * self.columns + column
+
+    def query(self, x, y, radius=None):
+        """
+        Function that gives every pair (position, indexed entity) closer than a radius
+        :param x: the x coordinates of the positions, an array of shape (..., positions) with the batch axis of the grid
+        :param y: the y coordinates of the positions
+        :param radius: the radius, at most the cell size, the cell size if not given
+        :return: the tuple (sources, targets, distances) of flat arrays, sources and targets are indexes in the raveled
+        positions and raveled indexed entities, pairs are grouped by source
+        """
+        if radius is None:
+            radius = self.cell_size
+        if radius > self.cell_size:
+            raise ValueError("Radius larger than the cells of the grid : " + str(radius))
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        column, row = self._cells(x, y)
+        games = self._games(x.shape)
+
+        # Keys of the 3x3 neighbour cells of every position, cells out of the grid have no key
+        neighbour_column = column[..., None] + np.tile([-1, 0, 1], 3)
+        neighbour_row = row[..., None] + np.repeat([-1, 0, 1], 3)
+        keys = (games[..., None] * self.rows + neighbour_row) * self.columns + neighbour_column
+        inside = (0 <= neighbour_column) & (neighbour_column < self.columns) & \
+                 (0 <= neighbour_row) & (neighbour_row < self.rows)
+
+        # Range of every neighbour cell in the sorted entities
+        start = np.searchsorted(self.sorted_keys, keys.ravel(), side='left')
+        end = np.searchsorted(self.sorted_keys, keys.ravel(), side='right')
+        lengths = np.where(inside.ravel(), end - start, 0)
+
+        # One candidate per entity of each neighbour cell
+        total = int(lengths.sum())
+        first = np.cumsum(lengths) - lengths
+        candidate = np.repeat(start, lengths) + np.arange(total) - np.repeat(first, lengths)
+        sources = np.repeat(np.arange(x.size), lengths.reshape(-1, 9).sum(axis=-1))
+        targets = self.order[candidate]
+
+        dx = x.ravel()[sources] - self.x.ravel()[targets]
+        dy = y.ravel()[sources] - self.y.ravel()[targets]
+        distances = np.sqrt(dx * dx + dy * dy)
+
+        close = distances < radius
+        return sources[close], targets[close], distances[close]
+
+    def in_range(self, x, y, radius=None):
+        """
+        Function that gives the mask of indexed entities closer than a radius to at least one position
+        :param x: the x coordinates of the positions, an array of shape (..., positions) with the batch axis of the grid
+        :param y: the y coordinates of the positions
+        :param radius: the radius, at most the cell size, the cell size if not given
+        :return: a boolean array of the shape of the indexed entities
+        """
+        _, targets, _ = self.query(x, y, radius)
+        mask = np.zeros(self.x.size, dtype=bool)
+        mask[targets] = True
+        return mask.reshape(self.x.shape)
+
+    def closest(self, x, y, radius=None):
+        """
+        Function that gives for every indexed entity the closest position in a radius, the first one if several
+        positions are at the same distance
+        :param x: the x coordinates of the positions, an array of shape (..., positions) with the batch axis of the grid
+        :param y: the y coordinates of the positions
+        :param radius: the radius, at most the cell size, the cell size if not given
+        :return: the tuple (positions, distances) of arrays of the shape of the indexed entities, the position index is
+        along the last axis, the distance is infinite when no position is in range
+        """
+        x = np.asarray(x, dtype=np.float64)
+        sources, targets, distances = self.query(x, y, radius)
+
+        closest = np.full(self.x.size, np.inf)
+        np.minimum.at(closest, targets, distances)
+        first = closest[targets] == distances
+        positions = np.full(self.x.size, x.size, dtype=np.int64)
+        np.minimum.at(positions, targets[first], sources[first])
+        positions[np.isinf(closest)] = 0
+        return (positions % max(x.shape[-1], 1)).reshape(self.x.shape), closest.reshape(self.x.shape)
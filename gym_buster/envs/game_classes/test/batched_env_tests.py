@@ -0,0 +1,236 @@
+import unittest
+
+import numpy as np
+
+from gym_buster.envs.buster_env import BusterEnv
+from gym_buster.envs.batched_buster_env import BatchedBusterEnv
+from gym_buster.envs.game_classes.ai_behaviour import Aibehaviour
+from gym_buster.envs.game_classes.buster import Buster
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.world_state import WorldState
+from gym_buster.envs.game_classes.rules import Rules
+from gym_buster.envs.game_classes.ghost import Ghost
+
+
+class BatchedEnvTest(unittest.TestCase):
+
+    def reset(self):
+        Ghost.reset_ghost()
+
+    @staticmethod
+    def release_and_bust(releaser):
+        """
+        Function that prepares a round where a buster of team 0 releases the ghost it carries and its teammate busts it,
+        the ghost is captured again (one point) when the buster busting it plays after the one releasing it (minus one)
+        :param releaser: the id of the buster releasing the ghost, the other one busts
+        :return: the tuple (environment, commands of team 0, commands of team 1)
+        """
+        environment = BusterEnv(2, 1)
+        environment.reset()
+        for buster, x in zip(environment.buster_team0, [3000, 4200]):
+            buster.x, buster.y = x, 3000
+        carrier = environment.buster_team0[releaser]
+        carrier.state = Constants.STATE_BUSTER_CARRYING
+        carrier.value = 0
+        ghost = environment.ghosts[0]
+        ghost.x, ghost.y = carrier.x, carrier.y
+        ghost.captured = True
+
+        commands_0 = np.zeros((2, Constants.COMMAND_SIZE), dtype=np.int64)
+        commands_0[releaser, 0] = Constants.COMMAND_RELEASE
+        commands_0[1 - releaser] = (Constants.COMMAND_BUST, 0, 0, 0)
+        commands_1 = np.array([(Constants.COMMAND_MOVE, buster.x, buster.y, 0) for buster in environment.buster_team1],
+                              dtype=np.int64)
+        return environment, commands_0, commands_1
+
+    def test_step_batch(self):
+        """
+        Step a batch of games until they are all reset
+        """
+        environment = BatchedBusterEnv(batch_size=4, max_steps=3)
+        environment.seed(42)
+        observation = environment.reset()
+        self.assertTrue(observation.shape == (4, 2 + 14 * 3))
+        self.assertTrue(environment.action_space.shape == (4, 12))
+
+        for step in range(4):
+            observation, reward, done, info = environment.step(environment.action_space.sample())
+            self.assertTrue(observation.shape == (4, 2 + 14 * 3))
+            self.assertTrue(reward.shape == (4,))
+
+        self.assertTrue(done.all())
+        self.assertTrue(all('terminal_observation' in game_info for game_info in info))
+        self.assertTrue((environment.current_step == 0).all())
+        self.assertTrue((observation[:, :2] == 0).all())
+
+    def test_rules_match_single_env(self):
+        """
+        Play the same commands in BusterEnv and in a batch of 2 copies of the game
+        """
+        for seed in [7, 2]:
+            self.play_rules_and_single_env(seed)
+
+        self.reset()
+
+    def play_rules_and_single_env(self, seed):
+        """
+        Play 100 steps of a seeded game in BusterEnv and in a batch of 2 copies of the game
+        :param seed: the seed of the game
+        """
+        environment = BusterEnv()
+        environment.seed(seed)
+        environment.action_space.seed(seed)
+        environment.reset()
+
+        world = WorldState(environment.buster_number, environment.ghost_number, 2)
+        for name in WorldState.FIELDS:
+            getattr(world, name)[:] = getattr(environment.world, name)
+        scores = np.zeros((2, 2), dtype=np.int64)
+
+        rng = np.random.default_rng(seed)
+        for step in range(100):
+            commands_0 = environment._transform_action(environment.action_space.sample())
+            commands_1 = Aibehaviour.next_command(environment.buster_team1, environment.ghosts, rng)
+            environment._run_step(commands_0, commands_1)
+            environment.state = environment._get_state()
+
+            commands = np.concatenate([commands_0, commands_1])
+            scores += Rules.play_round(world, np.stack([commands, commands]))
+
+            for name in WorldState.FIELDS:
+                self.assertTrue(np.allclose(getattr(world, name), getattr(environment.world, name)), msg=name)
+            self.assertTrue((scores == [environment.score_team0, environment.score_team1]).all())
+
+        self.assertTrue(environment.score_team1 > 0)
+
+    def test_rules_release_and_bust(self):
+        """
+        A ghost released and busted in the same round is only busted by a buster playing after the one releasing it,
+        as in BusterEnv
+        """
+        for releaser, busted in [(1, False), (0, True)]:
+            environment, commands_0, commands_1 = self.release_and_bust(releaser)
+            world = WorldState.from_snapshots(2, 1, [environment.world.snapshot()] * 2)
+            commands = np.concatenate([commands_0, commands_1])
+            scores = Rules.play_round(world, np.stack([commands, commands]))
+
+            environment._run_step(commands_0, commands_1)
+            self.assertTrue(environment.ghosts[0].captured == busted)
+            self.assertTrue(environment.buster_team0[1 - releaser].state == (
+                Constants.STATE_BUSTER_CARRYING if busted else Constants.STATE_BUSTER_NOTHING))
+            self.assertTrue((environment.score_team0, environment.score_team1) == (int(busted) - 1, 0))
+            self.assertTrue((world.game_snapshots() == environment.world.snapshot()).all())
+            self.assertTrue((scores == [int(busted) - 1, 0]).all())
+            self.assertTrue((world.ghosts_carried == int(busted)).all())
+
+        self.reset()
+
+    def test_observation_matches_single_env(self):
+        """
+        Build the observation of a BusterEnv game in a batch of 2 copies of the game
+        """
+        environment = BusterEnv(observation_dtype=np.float32)
+        environment.seed(3)
+        environment.reset()
+        for step in range(20):
+            previous, _, _, _ = environment.step(environment.action_space.sample())
+        previous_copy = previous.copy()
+        observation, _, _, _ = environment.step(environment.action_space.sample())
+        self.assertTrue(observation.dtype == np.float32)
+        self.assertTrue(environment.observation_space.dtype == np.float32)
+        self.assertTrue(np.array_equal(previous, previous_copy))
+
+        batch = BatchedBusterEnv(batch_size=2, observation_dtype=np.float32)
+        for name in WorldState.FIELDS:
+            getattr(batch.world, name)[:] = getattr(environment.world, name)
+        batch.world.moved()
+        batch.scores[:] = [environment.score_team0, environment.score_team1]
+        batch_observation = batch._make_observation()
+        self.assertTrue(np.array_equal(batch_observation[0], observation))
+        self.assertTrue(np.array_equal(batch_observation[1], observation))
+
+        self.reset()
+
+    def test_simulate_matches_single_env(self):
+        """
+        Simulate candidate actions from a snapshot of BusterEnv in one batch
+        """
+        environment = BusterEnv()
+        environment.seed(5)
+        environment.action_space.seed(5)
+        environment.reset()
+        for step in range(20):
+            environment.step(environment.action_space.sample())
+        snapshot = environment.get_snapshot()
+        scores = np.array(snapshot['scores'])
+
+        candidates = [environment._transform_action(environment.action_space.sample()) for _ in range(3)]
+        commands_1 = Aibehaviour.next_command(environment.buster_team1, environment.ghosts, environment.np_random)
+        world = WorldState.from_snapshots(environment.buster_number, environment.ghost_number, [snapshot['world']] * 3)
+        next_world, points = Rules.simulate(world, np.stack(candidates), np.stack([commands_1] * 3))
+        self.assertTrue((world.game_snapshots() == snapshot['world']).all())
+
+        for i, commands_0 in enumerate(candidates):
+            environment.restore(snapshot)
+            environment._run_step(commands_0, commands_1)
+            self.assertTrue(np.array_equal(next_world.game_snapshots()[i], environment.world.snapshot()))
+            self.assertTrue((scores + points[i] == [environment.score_team0, environment.score_team1]).all())
+
+        # The simple AI plays team 1 when its commands are not given
+        environment.restore(snapshot)
+        rng = np.random.default_rng()
+        rng.bit_generator.state = snapshot['rng']
+        next_world, points = Rules.simulate(world.game(0), candidates[0], rng=rng)
+        environment._run_step(candidates[0], None)
+        self.assertTrue(np.array_equal(next_world.x, environment.world.x))
+        self.assertTrue(np.array_equal(next_world.value, environment.world.value))
+        self.assertTrue((scores + points == [environment.score_team0, environment.score_team1]).all())
+
+        self.reset()
+
+    def test_simulate_release_and_bust(self):
+        """
+        Simulate a round where a ghost is released and busted, the ghost is only busted by a buster playing after the
+        one releasing it as in BusterEnv
+        """
+        for releaser, busted in [(1, False), (0, True)]:
+            environment, commands_0, commands_1 = self.release_and_bust(releaser)
+            next_world, points = Rules.simulate(environment.world, commands_0, commands_1)
+            environment._run_step(commands_0, commands_1)
+
+            self.assertTrue(np.array_equal(next_world.snapshot(), environment.world.snapshot()))
+            self.assertTrue(next_world.captured[next_world.ghost_slot(0)] == busted)
+            self.assertTrue((points == [environment.score_team0, environment.score_team1]).all())
+            self.assertTrue((points == [int(busted) - 1, 0]).all())
+
+        self.reset()
+
+    def test_world_commands_match_next_command(self):
+        """
+        The AI gives the same commands to every game of a batch at once and game by game, with 5 busters per team
+        """
+        environment = BatchedBusterEnv(buster_number=5, ghost_number=30, batch_size=6, max_steps=40)
+        environment.seed(3)
+        environment.action_space.seed(3)
+        environment.reset()
+        games = [environment.world.game(i) for i in range(environment.batch_size)]
+        busters = [[Buster.view(game, game.buster_slot(Constants.TYPE_BUSTER_TEAM_1, i), i) for i in range(5)]
+                   for game in games]
+        ghosts = [[Ghost.view(game, game.ghost_slot(i), i) for i in range(30)] for game in games]
+        rng_batch = np.random.default_rng(11)
+        rng_games = np.random.default_rng(11)
+
+        carrying = 0
+        for step in range(80):
+            commands = Aibehaviour.world_commands(environment.world, rng_batch)
+            expected = np.stack([Aibehaviour.next_command(busters[i], ghosts[i], rng_games) for i in range(6)])
+            self.assertTrue(np.array_equal(commands, expected), msg=step)
+            self.assertTrue(rng_batch.integers(1 << 30) == rng_games.integers(1 << 30))
+            carrying += np.count_nonzero(commands[..., 0] == Constants.COMMAND_RELEASE)
+            environment.step(environment.action_space.sample())
+
+        self.assertTrue(carrying > 0)
+        self.assertTrue(Aibehaviour.world_commands(environment.world.game(0), rng_batch).shape == (5, 4))
+
+        self.reset()
+
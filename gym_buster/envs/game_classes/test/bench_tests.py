@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from gym_buster.bench.micro import MicroBenchmark
+from gym_buster.bench.results import Results
+from gym_buster.bench.throughput import Throughput
+from gym_buster.envs.game_classes.ghost import Ghost
+
+
+class BenchTest(unittest.TestCase):
+
+    def reset(self):
+        Ghost.reset_ghost()
+
+    def test_scenario_seeded(self):
+        """
+        Two scenarios with the same seed hold the same game
+        """
+        first = MicroBenchmark.scenario(3, 20, seed=4)
+        second = MicroBenchmark.scenario(3, 20, seed=4)
+        self.assertTrue(np.array_equal(first.world.snapshot(), second.world.snapshot()))
+        self.assertTrue(np.array_equal(first.observation, second.observation))
+
+        self.reset()
+
+    def test_run_save_compare(self):
+        """
+        Run every benchmark once, save the results and compare them with themselves
+        """
+        rows = MicroBenchmark.run([(3, 15)], repeat=1, min_time=0)
+        self.assertTrue(len(rows) == 9)
+        self.assertTrue(all(row['median_ns'] > 0 for row in rows))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            Results.save(path, MicroBenchmark.KIND, rows, 'test')
+            results = Results.load(path)
+        self.assertTrue(results['kind'] == MicroBenchmark.KIND)
+        self.assertTrue(results['metadata']['label'] == 'test')
+
+        comparison = MicroBenchmark.compare(results, results)
+        self.assertTrue(len(comparison) == len(rows))
+        self.assertTrue(all(line['ratio'] == 1 and not line['regression'] for line in comparison))
+
+        self.reset()
+
+    def test_throughput(self):
+        """
+        Measure a few steps of each engine run in the process and compare the results saved in csv
+        """
+        configs = Throughput.configurations(['single', 'batched'], [3], [15, 30], [(16000, 9000)], [2], [0],
+                                            max_steps=10, steps=15, resets=2, warmup=2, seed=0)
+        self.assertTrue(len(configs) == 4)
+        rows = [Throughput.run(config) for config in configs]
+        self.assertTrue(all(row['steps'] == 30 and row['steps_per_s'] > 0 for row in rows))
+        self.assertTrue(all(row['episodes'] >= 2 for row in rows))
+        self.assertTrue(all(row['p50_us'] <= row['p99_us'] for row in rows))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.csv')
+            Results.save(path, Throughput.KIND, rows, 'test')
+            results = Results.load(path)
+        self.assertTrue(results['kind'] == Throughput.KIND)
+        self.assertTrue(results['metadata']['label'] == 'test')
+        self.assertTrue(results['rows'] == rows)
+
+        comparison = Throughput.compare(results, {'rows': rows})
+        self.assertTrue(len(comparison) == len(rows) * len(Throughput.METRICS))
+        self.assertTrue(not any(line['regression'] for line in comparison))
+
+        self.reset()
+
+    def test_compare_error_row(self):
+        """
+        A configuration that failed, or a metric that was not measured, is left out of the comparison
+        """
+        keys = {'engine': 'single', 'buster_number': 3, 'map_width': 16000, 'map_height': 9000, 'batch_size': 1,
+                'workers': 0}
+        metrics = {'steps_per_s': 1000.0, 'resets_per_s': 10.0, 'p50_us': 900.0, 'p99_us': 1500.0,
+                   'peak_rss_kb': 50000}
+        old = [dict(keys, ghost_number=15, **metrics), dict(keys, ghost_number=150, **metrics)]
+        new = [dict(keys, ghost_number=15, **dict(metrics, peak_rss_kb=None)),
+               dict(keys, ghost_number=150, error='MemoryError')]
+
+        with tempfile.TemporaryDirectory() as directory:
+            old_path = os.path.join(directory, 'old.csv')
+            new_path = os.path.join(directory, 'new.csv')
+            Results.save(old_path, Throughput.KIND, old)
+            Results.save(new_path, Throughput.KIND, new)
+            comparison = Throughput.compare(Results.load(old_path), Results.load(new_path))
+            status = Throughput.main(['--compare', old_path, new_path])
+
+        self.assertTrue(len(comparison) == 4)
+        self.assertTrue(all(line['ghost_number'] == 15 and line['metric'] != 'peak_rss_kb' for line in comparison))
+        self.assertTrue(status == 0)
+
+        self.reset()
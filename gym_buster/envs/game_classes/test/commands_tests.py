@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from gym_buster.envs.game_classes.buster import Buster
+from gym_buster.envs.game_classes.commands import Commands
+from gym_buster.envs.game_classes.constants import Constants
+
+
+class CommandsTest(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertTrue(Commands.parse("MOVE 1234 567") == (Constants.COMMAND_MOVE, 1234, 567, 0))
+        self.assertTrue(Commands.parse("BUST 4") == (Constants.COMMAND_BUST, 0, 0, 4))
+        self.assertTrue(Commands.parse("RELEASE") == (Constants.COMMAND_RELEASE, 0, 0, 0))
+        with self.assertRaises(ValueError):
+            Commands.parse("JUMP")
+
+    def test_format(self):
+        for text in ["MOVE 1234 567", "BUST 4", "RELEASE"]:
+            self.assertTrue(Commands.format(Commands.parse(text)) == text)
+
+    def test_as_array(self):
+        commands = Commands.as_array(["MOVE 10 20", "RELEASE"])
+        self.assertTrue(commands.shape == (2, Constants.COMMAND_SIZE))
+        self.assertTrue(commands.dtype == np.int64)
+        self.assertTrue(Commands.as_array(commands) is commands)
+
+    def test_execute(self):
+        buster = Buster(Constants.TYPE_BUSTER_TEAM_0, 1)
+        self.assertTrue(buster.execute(Constants.COMMAND_MOVE, 500, 500, 0) == 0)
+        self.assertTrue((buster.x, buster.y) == (500, 500))
+        self.assertTrue(buster.action == Constants.ACTION_MOVING)
+
+        self.assertTrue(buster.buster_command("RELEASE") == 0)
+        self.assertTrue(buster.action == Constants.ACTION_NOTHING)
+
+        with self.assertRaises(ValueError):
+            buster.execute(42, 0, 0, 0)
@@ -1,8 +1,15 @@
+import pickle
 import unittest
+from unittest import mock
 
 from gym_buster.envs.game_classes.entity import Entity
 from gym_buster.envs.game_classes.math_utils import MathUtility
 from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.buster import Buster
+from gym_buster.envs.game_classes.ghost import Ghost
+from gym_buster.envs.game_classes.render_layer import RenderLayer
+from gym_buster.envs.game_classes.spatial_grid import SpatialGrid
+from gym_buster.envs.game_classes.world_state import WorldState
 from gym_buster.envs.game_classes.test.tests_utils import TestUtils
 
 
@@ -109,6 +116,17 @@ class EntityTest(unittest.TestCase):
         self.assertTrue(result is None)
         self.assertTrue(dist == Constants.MAP_MAX_DISTANCE)
 
+    def test_get_nearest(self):
+        self.entity.x = 8000
+        self.entity.y = 4500
+
+        entities = TestUtils.generate_entities()
+        result = self.entity.get_nearest(entities, 3)
+        self.assertTrue([entity.id for entity, _ in result] == [1, 2, 3])
+        self.assertTrue(self.entity.get_closest(entities, 3)[0].id == 4)
+        self.assertTrue(len(self.entity.get_nearest(entities[:2], 3)) == 2)
+        self.assertTrue(self.entity.get_closest(entities, 4)[0] is None)
+
     def test_number_of_entities_in_range(self):
         self.entity.x = 8000
         self.entity.y = 4500
@@ -126,3 +144,42 @@ class EntityTest(unittest.TestCase):
 
         result = Entity.get_entities_visible(entities, ghosts)
         self.assertTrue(len(result) == 2)
+
+    def test_in_range_grid(self):
+        """
+        The spatial grid used for many entities gives the same entities in range as the distances
+        """
+        self.entity.x = 8000
+        self.entity.y = 4500
+        entities = TestUtils.generate_entities()
+        ghosts = TestUtils.generate_ghosts()
+
+        with mock.patch.object(SpatialGrid, 'MIN_PAIRS', 0):
+            self.assertTrue(self.entity.get_number_entities_in_range(entities) == 3)
+            self.assertTrue([ghost.id for ghost in Entity.get_entities_visible(entities, ghosts)] == [1, 2])
+
+    def test_slotted_entities(self):
+        """
+        Entities only hold slotted attributes, their rendering objects are kept by a render layer
+        """
+        world = WorldState(1, 1)
+        buster = Buster(Constants.TYPE_BUSTER_TEAM_1, 0, world)
+        ghost = Ghost(0, world)
+        for entity in (self.entity, buster, ghost):
+            self.assertFalse(hasattr(entity, '__dict__'))
+        with self.assertRaises(AttributeError):
+            buster.render_img = None
+
+        copy = pickle.loads(pickle.dumps(buster))
+        self.assertTrue((copy.id, copy.x, copy.y, copy.type) == (0, buster.x, buster.y, buster.type))
+
+        layer = RenderLayer()
+        layer.add(buster, 'buster image', 'buster transform')
+        layer.add(ghost, 'ghost image', 'ghost transform')
+        self.assertTrue(layer.image(buster) == 'buster image' and layer.transform(ghost) == 'ghost transform')
+        self.assertTrue(layer.image(Buster(Constants.TYPE_BUSTER_TEAM_0, 0, world)) is None)
+        layer.clear()
+        self.assertTrue(layer.image(ghost) is None)
+
+        Ghost.reset_ghost()
+
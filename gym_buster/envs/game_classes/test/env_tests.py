@@ -1,5 +1,14 @@
+import sys
+import types
 import unittest
+from unittest import mock
+
+import numpy as np
+
 import gym_buster.envs.buster_env as env
+from gym_buster.envs.batched_buster_env import BatchedBusterEnv
+from gym_buster.envs.game_classes.game_config import GameConfig
+from gym_buster.envs.game_classes.phase_timer import PhaseTimer
 
 
 class EnvTest(unittest.TestCase):
@@ -69,3 +78,206 @@ class EnvTest(unittest.TestCase):
 
         self.assertTrue(episodes == 5)
         self.assertTrue(environment.max_steps == 250)
+
+    def test_headless(self):
+        """
+        A headless environment never opens a viewer
+        """
+        environment = env.BusterEnv()
+        environment.reset()
+        for step in range(5):
+            environment.step(environment.action_space.sample())
+            self.assertTrue(environment.render() is None)
+
+        self.assertTrue(environment.viewer is None)
+        self.assertTrue(environment.render_layer.image(environment.ghosts[0]) is None)
+        environment.close()
+
+        with self.assertRaises(ValueError):
+            env.BusterEnv(render_mode='video')
+
+    def test_seed_reproducible(self):
+        """
+        Two environments with the same seed play the same episode
+        """
+        episodes = []
+        for seed in [5, 5, 6]:
+            environment = env.BusterEnv()
+            environment.seed(seed)
+            environment.action_space.seed(seed)
+            observations = [environment.reset().copy()]
+            for step in range(100):
+                observation, reward, done, _ = environment.step(environment.action_space.sample())
+                observations.append(observation.copy())
+            episodes.append(np.array(observations))
+
+        self.assertTrue(np.array_equal(episodes[0], episodes[1]))
+        self.assertFalse(np.array_equal(episodes[0], episodes[2]))
+
+    def test_snapshot_restore(self):
+        """
+        Restoring a snapshot replays the same steps
+        """
+        environment = env.BusterEnv()
+        environment.seed(11)
+        environment.reset()
+        for step in range(30):
+            environment.step(environment.action_space.sample())
+
+        snapshot = environment.get_snapshot()
+        actions = [environment.action_space.sample() for _ in range(50)]
+        runs = []
+        for run in range(2):
+            observation = environment.restore(snapshot)
+            self.assertTrue(environment.current_step == 30)
+            results = [observation.copy()]
+            for action in actions:
+                observation, reward, done, _ = environment.step(action)
+                results.append(np.append(observation, [reward, done]))
+            runs.append(np.concatenate(results))
+
+        self.assertTrue(np.array_equal(runs[0], runs[1]))
+        self.assertTrue(environment.current_step == 80)
+
+    def test_perf_stats(self):
+        """
+        The phases of the steps are timed only while enabled, per episode
+        """
+        environment = env.BusterEnv()
+        environment.seed(2)
+        environment.reset()
+        _, _, _, info = environment.step(environment.action_space.sample())
+        self.assertTrue('perf_stats' not in info)
+        self.assertTrue(environment.perf_stats() is None)
+
+        environment.enable_perf_stats()
+        for step in range(10):
+            _, _, _, info = environment.step(environment.action_space.sample())
+        stats = environment.perf_stats()
+        self.assertTrue(info['perf_stats'] == stats)
+        self.assertTrue(stats['steps'] == 10)
+        self.assertTrue(all(stats[name + '_ns'] > 0 for name in PhaseTimer.PHASE_NAMES))
+        self.assertTrue(stats['total_ns'] == sum(stats[name + '_ns'] for name in PhaseTimer.PHASE_NAMES))
+
+        environment.reset()
+        self.assertTrue(environment.perf_stats()['steps'] == 0)
+        self.assertTrue(environment.perf_stats()['total_ns'] == 0)
+
+        environment.enable_perf_stats(False)
+        _, _, _, info = environment.step(environment.action_space.sample())
+        self.assertTrue(environment.perf_stats() is None)
+        self.assertTrue(info == {})
+
+    def test_configured_sizes(self):
+        """
+        The numbers of entities, the map size and the rules are options of the constructor, a game needs a buster in
+        each team and a ghost
+        """
+        config = GameConfig(map_width=64000, map_height=36000, bust_max_range=2000)
+        environment = env.BusterEnv(2, 150, max_steps=20, config=config)
+        self.assertTrue(environment.observation_space.shape == (2 + 14 * 2,))
+        self.assertTrue(environment.action_space.shape == (4 * 2,))
+
+        world = environment.world
+        environment.seed(4)
+        environment.reset()
+        self.assertTrue(environment.world is world)
+        self.assertTrue(len(environment.ghosts) == 150)
+        self.assertTrue(environment.buster_team1[0].x == 64000 - 50)
+        self.assertTrue((world.x[world.ghosts] <= 64000).all() and (world.y[world.ghosts] <= 36000).all())
+        self.assertTrue((world.x[world.ghosts] > 16000).any())
+
+        done = False
+        while not done:
+            observation, reward, done, _ = environment.step(environment.action_space.sample())
+        self.assertTrue(environment.current_step == 21)
+        self.assertTrue((observation[2:].reshape(2, 14)[:, 3:12] <= 1).all())
+        self.assertTrue(environment.buster_team0[0].can_bust(environment.buster_team0[1]) ==
+                        (900 <= environment.buster_team0[0].distance_to(environment.buster_team0[1]) <= 2000))
+
+        with self.assertRaises(ValueError):
+            GameConfig(map_width=0)
+        for buster_number, ghost_number in [(1, 0), (0, 3)]:
+            with self.assertRaises(ValueError):
+                env.BusterEnv(buster_number, ghost_number)
+            with self.assertRaises(ValueError):
+                BatchedBusterEnv(2, buster_number, ghost_number)
+
+    def test_game_over(self):
+        """
+        The game is over as soon as the last ghost is scored, a game lost gives the lowest reward
+        """
+        environment = env.BusterEnv(1, 1)
+        environment.seed(0)
+        environment.reset()
+        ghost = environment.ghosts[0]
+        ghost.x, ghost.y = 16000 - 500, 9000 - 500
+
+        observation, reward, done, _ = environment.step(np.zeros(4))
+        self.assertTrue(environment.world.count_alive() == 0)
+        self.assertTrue(done and environment.game_over and environment.state['game_over'])
+        self.assertTrue(environment.score_team1 == 1 and reward == -4000)
+
+        environment.reset()
+        self.assertTrue(environment.world.count_alive() == 1 and not environment.game_over)
+
+    def test_render_pool(self):
+        """
+        The geometries of the viewer are created once and reused by every episode, ghosts out of the game are hidden
+        """
+        class Geometry:
+            def __init__(self):
+                self.drawn = 0
+
+            def set_color(self, *color):
+                self.color = color
+
+            def add_attr(self, attribute):
+                self.transform = attribute
+
+            def render(self):
+                self.drawn += 1
+
+        class Transform:
+            def set_translation(self, x, y):
+                self.translation = (x, y)
+
+        class Viewer:
+            def __init__(self, width, height):
+                self.geoms = []
+
+            def add_geom(self, geometry):
+                self.geoms.append(geometry)
+
+            def render(self):
+                for geometry in self.geoms:
+                    geometry.render()
+
+            def close(self):
+                pass
+
+        rendering = types.SimpleNamespace(Viewer=Viewer, Transform=Transform, make_circle=lambda radius: Geometry())
+        environment = env.BusterEnv(2, 5, max_steps=3, render_mode='human')
+        environment.seed(1)
+        with mock.patch.dict(sys.modules, {'gym.envs.classic_control.rendering': rendering}):
+            for episode in range(4):
+                environment.reset()
+                done = False
+                while not done:
+                    _, _, done, _ = environment.step(environment.action_space.sample())
+                    environment.render()
+
+            layer = environment.render_layer
+            self.assertTrue(len(environment.viewer.geoms) == 1 and environment.viewer.geoms[0] is layer)
+            self.assertTrue(len(layer.images) == 5 + 2 * 2)
+            ghost = environment.ghosts[0]
+            self.assertTrue(layer.image(ghost).drawn == 4 * 4)
+
+            ghost.alive = False
+            environment.render()
+            self.assertTrue(layer.image(ghost).drawn == 4 * 4)
+            self.assertTrue(layer.image(environment.buster_team0[0]).drawn == 4 * 4 + 1)
+
+            environment.close()
+            self.assertTrue(environment.viewer is None and not layer.images)
+
@@ -200,3 +200,29 @@ class GameTest(unittest.TestCase):
         self.assertTrue(environment.buster_team1[2].state == Constants.STATE_BUSTER_NOTHING)
         self.assertTrue(environment.buster_team1[2].value == Constants.VALUE_BUSTER_NOTHING)
         self.assertTrue(environment.buster_team1[2].action == Constants.ACTION_MOVING)
+
+    def test_two_environments(self):
+        """
+        Test two environments of the same process keep their own ghosts
+        """
+        environment = BusterEnv()
+        environment.reset()
+        other = BusterEnv()
+        other.reset()
+
+        environment.buster_team0[0].x = 9000
+        environment.buster_team0[0].y = 4500
+        environment.ghosts[0].x = 9800
+        environment.ghosts[0].y = 5500
+        other.ghosts[0].x = 1000
+        other.ghosts[0].y = 8000
+
+        commands_0 = ["BUST 0", "MOVE 9000 4500", "MOVE 9000 4500"]
+        commands_1 = ["MOVE 9000 4500", "MOVE 9000 4500", "MOVE 9000 4500"]
+        environment._run_step(commands_0, commands_1)
+
+        self.assertTrue(environment.ghosts[0].captured)
+        self.assertTrue(environment.buster_team0[0].value == environment.ghosts[0].id)
+        self.assertFalse(other.ghosts[0].captured)
+        self.assertTrue((other.ghosts[0].x, other.ghosts[0].y) == (1000, 8000))
+        self.assertTrue(other.ghosts[0].value == Constants.VALUE_GHOST_BASIC)
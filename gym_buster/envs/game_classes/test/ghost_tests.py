@@ -1,6 +1,9 @@
 import unittest
 
 from gym_buster.envs.game_classes.ghost import Ghost
+from gym_buster.envs.game_classes.math_utils import MathUtility
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.test.tests_utils import TestUtils
 
 
 class GhostTest(unittest.TestCase):
@@ -8,3 +11,21 @@ class GhostTest(unittest.TestCase):
     def reset(self):
         Ghost.reset_ghost()
 
+    def test_run_away(self):
+        """
+        A ghost runs away from the closest buster in its vision range, the first one of the list when several are at
+        the same distance
+        """
+        busters = TestUtils.generate_entities()
+        ghost = Ghost(0)
+        ghost.x, ghost.y = 8000, 4500
+        ghost.run_away(busters)
+        self.assertTrue((ghost.x, ghost.y) == MathUtility.opposite_direction(8000, 4500, busters[0].x, busters[0].y,
+                                                                             Constants.GHOST_RUN_WAY))
+
+        ghost.x, ghost.y = 8000, 4500
+        ghost.run_away(busters[3:])
+        ghost.run_away([])
+        self.assertTrue((ghost.x, ghost.y) == (8000, 4500))
+
+        self.reset()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from gym_buster.envs.buster_env import BusterEnv
+from gym_buster.envs.batched_buster_env import BatchedBusterEnv
+from gym_buster.envs.game_classes.rasterizer import Rasterizer
+from gym_buster.envs.game_classes.world_state import WorldState
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.ghost import Ghost
+
+
+class RasterizerTest(unittest.TestCase):
+
+    def reset(self):
+        Ghost.reset_ghost()
+
+    def test_draw_entities(self):
+        """
+        Free ghosts, busters of each team and carrying busters are stamped on the bases at their pixel
+        """
+        world = WorldState(1, 2)
+        world.x[world.busters] = [4000, 12000]
+        world.y[world.busters] = [6000, 3000]
+        world.x[world.ghosts] = [8000, 2000]
+        world.y[world.ghosts] = [4500, 2000]
+        world.captured[world.ghost_slot(1)] = True
+        world.state[world.team_1] = Constants.STATE_BUSTER_CARRYING
+
+        rasterizer = Rasterizer(width=160, height=90)
+        frame = rasterizer.draw(world)
+        self.assertTrue(frame.shape == (90, 160, 3) and frame.dtype == np.uint8)
+        self.assertTrue(tuple(frame[89 - 45, 80]) == Rasterizer.GHOST_COLOR)
+        self.assertTrue(tuple(frame[89 - 60, 40]) == Rasterizer.TEAM_0_COLOR)
+        self.assertTrue(tuple(frame[89 - 30, 120]) == Rasterizer.CARRYING_COLOR)
+        self.assertTrue(tuple(frame[89 - 20, 20]) == Rasterizer.BACKGROUND_COLOR)
+        self.assertTrue(tuple(frame[89, 0]) == Rasterizer.BASE_0_COLOR)
+        self.assertTrue(tuple(frame[0, 159]) == Rasterizer.BASE_1_COLOR)
+        self.assertTrue(frame is rasterizer.draw(world))
+
+        self.reset()
+
+    def test_render_batch(self):
+        """
+        A batch is drawn at once, each frame is the frame of its game drawn alone
+        """
+        environment = BusterEnv(render_mode='rgb_array')
+        environment.seed(2)
+        environment.reset()
+        for step in range(10):
+            environment.step(environment.action_space.sample())
+        frame = environment.render()
+        self.assertTrue(frame.shape == (Constants.PYGAME_WINDOW_HEIGHT, Constants.PYGAME_WINDOW_WIDTH, 3))
+        self.assertTrue(environment.viewer is None)
+
+        batch = BatchedBusterEnv(batch_size=3)
+        batch.seed(2)
+        batch.reset()
+        for step in range(10):
+            batch.step(batch.action_space.sample())
+        frames = batch.render()
+        self.assertTrue(frames.shape == (3,) + frame.shape)
+
+        rasterizer = Rasterizer()
+        for i in range(3):
+            self.assertTrue(np.array_equal(frames[i], rasterizer.draw(batch.world.game(i))))
+        self.assertFalse(np.array_equal(frames[0], frames[1]))
+
+        self.reset()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from gym_buster.envs.buster_env import BusterEnv
+from gym_buster.envs.replay import ReplayWriter, ReplayReader
+from gym_buster.envs.game_classes.game_config import GameConfig
+from gym_buster.envs.game_classes.ghost import Ghost
+
+
+class ReplayTest(unittest.TestCase):
+
+    def reset(self):
+        Ghost.reset_ghost()
+
+    def test_episode_seeds(self):
+        """
+        Every episode has its own seed, and the seed alone gives back its first observation
+        """
+        environment = BusterEnv()
+        environment.seed(9)
+        observations = []
+        seeds = []
+        for episode in range(3):
+            observations.append(environment.reset().copy())
+            seeds.append(environment.episode_seed)
+            environment.step(environment.action_space.sample())
+        self.assertTrue(seeds[0] == 9 and len(set(seeds)) == 3)
+
+        for seed, observation in zip(seeds, observations):
+            self.assertTrue(np.array_equal(BusterEnv().reset(seed=seed), observation))
+
+        self.reset()
+
+    def test_record_replay(self):
+        """
+        Replaying the recorded episodes gives back the games at every step and their scores
+        """
+        environment = BusterEnv(2, 10, max_steps=60, config=GameConfig(map_width=8000, map_height=4500))
+        environment.seed(3)
+        environment.action_space.seed(3)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.replay')
+            worlds = []
+            with ReplayWriter(path, environment):
+                for episode in range(3):
+                    environment.reset()
+                    done = False
+                    while not done:
+                        _, _, done, _ = environment.step(environment.action_space.sample())
+                        if environment.current_step == 20:
+                            tick = environment.world.snapshot()
+                    worlds.append((tick, environment.world.snapshot(), environment.current_step,
+                                   environment.score_team0, environment.score_team1))
+            self.assertTrue(environment.recorder is None)
+            self.assertTrue(os.path.getsize(path) < 3 * 61 * 2 * 2 * 4 * 4)
+
+            reader = ReplayReader(path)
+            self.assertTrue(len(reader) == 3)
+            self.assertTrue(reader.buster_number == 2 and reader.ghost_number == 10 and reader.max_steps == 60)
+            self.assertTrue(reader.config == environment.config)
+
+            for episode in range(2, -1, -1):
+                tick, world, steps, score_0, score_1 = worlds[episode]
+                self.assertTrue(reader.scores(episode) == (score_0, score_1))
+                self.assertTrue(reader.commands(episode).shape == (steps, 2, 2, 4))
+
+                replayed = reader.replay(episode)
+                self.assertTrue(np.array_equal(replayed.world.snapshot(), world))
+                self.assertTrue((replayed.score_team0, replayed.score_team1) == (score_0, score_1))
+                self.assertTrue(replayed.current_step == steps)
+
+                ticks = []
+                replayed = reader.replay(episode, until=20, callback=lambda game: ticks.append(game.current_step))
+                self.assertTrue(np.array_equal(replayed.world.snapshot(), tick))
+                self.assertTrue(ticks == list(range(1, 21)))
+
+        self.reset()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from gym_buster.envs.game_classes.spatial_grid import SpatialGrid
+from gym_buster.envs.game_classes.constants import Constants
+
+
+class SpatialGridTest(unittest.TestCase):
+
+    def test_query_matches_all_pairs(self):
+        rng = np.random.default_rng(0)
+        target_x = rng.integers(-500, Constants.MAP_WIDTH + 500, size=(4, 300))
+        target_y = rng.integers(-500, Constants.MAP_HEIGHT + 500, size=(4, 300))
+        source_x = rng.integers(0, Constants.MAP_WIDTH, size=(4, 20))
+        source_y = rng.integers(0, Constants.MAP_HEIGHT, size=(4, 20))
+
+        grid = SpatialGrid(target_x, target_y)
+        sources, targets, distances = grid.query(source_x, source_y, Constants.BUSTER_BUST_MAX_RANGE)
+        order = np.lexsort((targets, sources))
+        sources, targets, distances = sources[order], targets[order], distances[order]
+
+        dist = np.hypot(source_x[..., :, None] - target_x[..., None, :],
+                        source_y[..., :, None] - target_y[..., None, :])
+        games, expected_sources, expected_targets = np.nonzero(dist < Constants.BUSTER_BUST_MAX_RANGE)
+        self.assertTrue(np.array_equal(sources, games * 20 + expected_sources))
+        self.assertTrue(np.array_equal(targets, games * 300 + expected_targets))
+        self.assertTrue(np.allclose(distances, dist[games, expected_sources, expected_targets]))
+
+        visible = (dist < Constants.ENTITY_RANGE_VISION).any(axis=-2)
+        self.assertTrue(np.array_equal(grid.in_range(source_x, source_y), visible))
+
+    def test_closest(self):
+        grid = SpatialGrid([8000, 100, 3000], [4500, 100, 3000])
+        closest, distance = grid.closest([8300, 7700, 9000], [4500, 4500, 4500])
+
+        self.assertTrue(list(closest[:2]) == [0, 0])
+        self.assertTrue(list(distance[:2]) == [300, np.inf])
+        self.assertTrue(np.isinf(distance[2]))
+
+        with self.assertRaises(ValueError):
+            grid.query([0], [0], Constants.ENTITY_RANGE_VISION + 1)
@@ -0,0 +1,34 @@
+import unittest
+
+from gym_buster.envs.subproc_buster_env import SubprocBusterEnv
+
+
+class SubprocEnvTest(unittest.TestCase):
+
+    def test_step_async_wait(self):
+        """
+        Step 4 environments spread over 2 workers
+        """
+        environment = SubprocBusterEnv(4, worker_number=2)
+        try:
+            self.assertTrue(environment.seed(0) == [0, 1, 2, 3])
+            seeds = environment.seed()
+            self.assertTrue(seeds != environment.seed() and seeds[1:] == [seed + 1 for seed in seeds[:-1]])
+            self.assertTrue(len(environment.seed(3)) == 4)
+            observation = environment.reset()
+            self.assertTrue(observation.shape == (4, 2 + 14 * 3))
+
+            for step in range(3):
+                environment.step_async(environment.action_space.sample())
+                self.assertTrue(environment.waiting)
+                with self.assertRaises(RuntimeError):
+                    environment.step_async(environment.action_space.sample())
+                observation, reward, done, info = environment.step_wait()
+                self.assertTrue(observation.shape == (4, 2 + 14 * 3))
+                self.assertTrue(reward.shape == (4,))
+                self.assertTrue(done.shape == (4,))
+                self.assertTrue(len(info) == 4)
+                self.assertTrue((observation[:, 3] >= 0).all())
+        finally:
+            environment.close()
+        self.assertTrue(environment.closed)
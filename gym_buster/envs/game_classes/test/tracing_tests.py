@@ -0,0 +1,75 @@
+import io
+import unittest
+
+from gym_buster.envs.buster_env import BusterEnv
+from gym_buster.envs.game_classes.buster import Buster
+from gym_buster.envs.game_classes.ghost import Ghost
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.tracing import Trace
+
+
+class TracingTest(unittest.TestCase):
+
+    def reset(self):
+        Trace.disable()
+        Ghost.reset_ghost()
+
+    def test_disabled(self):
+        Trace.configure(capacity=16)
+        Trace.disable()
+
+        buster = Buster(Constants.TYPE_BUSTER_TEAM_0, 1)
+        buster.move(500, 500)
+        self.assertTrue(len(Trace.events()) == 0)
+
+        self.reset()
+
+    def test_record_and_dump(self):
+        Trace.configure(categories=('buster',), capacity=16)
+
+        buster = Buster(Constants.TYPE_BUSTER_TEAM_0, 1)
+        buster.move(500, 500)
+        buster.release()
+
+        events = Trace.events()
+        self.assertTrue(len(events) == 2)
+        self.assertTrue(events[0]['event'] == Trace.EVENT_MOVE)
+        self.assertTrue(events[0]['a'] == 500)
+        self.assertTrue(events[1]['event'] == Trace.EVENT_NOTHING_TO_RELEASE)
+
+        stream = io.StringIO()
+        Trace.dump(stream)
+        self.assertTrue("Buster team 0 with id 1 moving to X: 500, Y: 500" in stream.getvalue())
+
+        self.reset()
+
+    def test_category_enabled_without_configure(self):
+        """
+        A category enabled by setting its level directly records in a ring buffer allocated at the first event
+        """
+        Trace.buffer = None
+        Trace.buster = Trace.DEBUG
+
+        buster = Buster(Constants.TYPE_BUSTER_TEAM_0, 1)
+        buster.move(500, 500)
+        events = Trace.events()
+        self.assertTrue(len(events) == 1 and events[0]['event'] == Trace.EVENT_MOVE)
+        self.assertTrue(len(Trace.buffer) == Trace.CAPACITY)
+
+        self.reset()
+
+    def test_ring_buffer(self):
+        Trace.configure(level=Trace.INFO, capacity=4)
+
+        environment = BusterEnv()
+        for episode in range(6):
+            environment.reset()
+            environment.step(environment.action_space.sample())
+
+        events = Trace.events()
+        self.assertTrue(len(events) == 4)
+        self.assertTrue(Trace.count == 7)
+        self.assertTrue(list(events['sequence']) == [3, 4, 5, 6])
+        self.assertTrue(all(events['event'] == Trace.EVENT_RESET))
+
+        self.reset()
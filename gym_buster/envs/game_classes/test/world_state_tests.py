@@ -0,0 +1,221 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from gym_buster.envs.game_classes.world_state import WorldState
+from gym_buster.envs.game_classes.rules import Rules
+from gym_buster.envs.game_classes.spatial_grid import SpatialGrid
+from gym_buster.envs.game_classes.buster import Buster
+from gym_buster.envs.game_classes.ghost import Ghost
+from gym_buster.envs.game_classes.math_utils import MathUtility
+from gym_buster.envs.game_classes.constants import Constants
+
+
+class WorldStateTest(unittest.TestCase):
+
+    def reset(self):
+        Ghost.reset_ghost()
+
+    def test_entities_are_views(self):
+        world = WorldState(2, 3)
+        buster = Buster(Constants.TYPE_BUSTER_TEAM_1, 1, world)
+        ghost = Ghost(2, world)
+
+        buster.x = 1234
+        buster.value = 2
+        ghost.captured = True
+        self.assertTrue(world.x[world.buster_slot(Constants.TYPE_BUSTER_TEAM_1, 1)] == 1234)
+        self.assertTrue(world.value[3] == 2)
+        self.assertTrue(world.captured[world.ghost_slot(2)])
+
+        world.y[world.ghost_slot(2)] = 4321
+        self.assertTrue(ghost.y == 4321)
+        self.assertTrue(world.count_captured() == 1)
+
+        self.reset()
+
+    def test_ghost_registry(self):
+        world = WorldState(1, 3)
+        ghosts = [Ghost(i, world) for i in range(3)]
+        self.assertTrue(world.get_ghost(2) is ghosts[2])
+        self.assertTrue(world.get_ghost(3) is None)
+        self.assertTrue(Ghost.get_ghost(2) is None)
+
+        standalone = Ghost(2)
+        self.assertTrue(Ghost.get_ghost(2) is standalone)
+        self.assertTrue(Ghost.get_ghost(2, world) is ghosts[2])
+
+        self.reset()
+
+    def test_visible(self):
+        world = WorldState(1, 3)
+        buster = Buster(Constants.TYPE_BUSTER_TEAM_0, 0, world)
+        buster.x, buster.y = 8000, 4500
+        ghosts = [Ghost(i, world) for i in range(3)]
+        ghosts[0].x, ghosts[0].y = 8300, 4500
+        ghosts[1].x, ghosts[1].y = 9300, 1500
+        ghosts[2].x, ghosts[2].y = 0, 0
+
+        visible = world.visible(world.team_0, world.ghosts)
+        self.assertTrue(list(visible) == [True, False, False])
+
+        self.reset()
+
+    def test_distances_shared(self):
+        world = WorldState(1, 2)
+        buster = Buster(Constants.TYPE_BUSTER_TEAM_0, 0, world)
+        ghost = Ghost(1, world)
+        buster.x, buster.y = 8000, 4500
+        ghost.x, ghost.y = 9000, 4500
+
+        distances = world.distances(world.busters, world.ghosts)
+        self.assertTrue(world.distances(world.team_0, world.ghosts).base is distances.base)
+        self.assertTrue(buster.distance_to(ghost) == 1000)
+        self.assertFalse(distances.flags.writeable)
+
+        ghost.x = 9500
+        self.assertTrue(world.distances(world.busters, world.ghosts)[0, 1] == 1500)
+        self.assertTrue(buster.can_bust(ghost))
+
+        world.x[world.ghost_slot(1)] = 8100
+        world.moved()
+        self.assertFalse(buster.can_bust(ghost))
+
+        self.reset()
+
+    def test_nearest(self):
+        world = WorldState(1, 5)
+        world.x[:] = [8000, 0, 8200, 7800, 8000, 9000, 8000]
+        world.y[:] = [4500, 0, 4500, 4500, 4300, 4500, 0]
+        ids, dist = world.nearest(world.team_0, world.ghosts, 3)
+        self.assertTrue(ids.tolist() == [[0, 1, 2]])
+        self.assertTrue(dist.tolist() == [[200, 200, 200]])
+
+        mask = np.array([False, True, False, True, False])
+        ids, dist = world.nearest(world.team_0, world.ghosts, 3, mask)
+        self.assertTrue(ids.tolist() == [[1, 3, 0]])
+        self.assertTrue(dist[0, :2].tolist() == [200, 1000])
+        self.assertTrue(np.isinf(dist[0, 2]))
+
+        ids, dist = world.nearest(world.team_0, world.ghosts, 7)
+        self.assertTrue(ids.shape == (1, 7))
+        self.assertTrue(np.isinf(dist[0, 5:]).all())
+
+    def test_grid_matches_all_pairs(self):
+        rng = np.random.default_rng(1)
+        world, dense = WorldState(24, 400, 2), WorldState(24, 400, 2)
+        world.x[:] = dense.x[:] = rng.integers(0, Constants.MAP_WIDTH, size=world.x.shape)
+        world.y[:] = dense.y[:] = rng.integers(0, Constants.MAP_HEIGHT, size=world.y.shape)
+
+        self.assertTrue(world.grid(world.busters, world.ghosts) is not None)
+        visible = (world.distances(world.team_1, world.ghosts) < Constants.ENTITY_RANGE_VISION).any(axis=-2)
+        self.assertTrue(np.array_equal(world.visible(world.team_1, world.ghosts), visible))
+
+        Rules.ghosts_run_away(world)
+        with mock.patch.object(SpatialGrid, 'MIN_PAIRS', world.size ** 2):
+            self.assertTrue(dense.grid(dense.busters, dense.ghosts) is None)
+            Rules.ghosts_run_away(dense)
+        self.assertTrue(np.array_equal(world.x, dense.x))
+        self.assertTrue(np.array_equal(world.y, dense.y))
+
+    def test_ghosts_run_away(self):
+        world = WorldState(1, 2)
+        busters = [Buster(Constants.TYPE_BUSTER_TEAM_0, 0, world), Buster(Constants.TYPE_BUSTER_TEAM_1, 0, world)]
+        busters[0].x, busters[0].y = 8000, 4500
+        ghosts = [Ghost(i, world) for i in range(2)]
+        ghosts[0].x, ghosts[0].y = 8500, 4500
+        ghosts[1].x, ghosts[1].y = 3000, 3000
+
+        expected = MathUtility.opposite_direction(8500, 4500, 8000, 4500, Constants.GHOST_RUN_WAY)
+        Rules.ghosts_run_away(world)
+        self.assertTrue((ghosts[0].x, ghosts[0].y) == expected)
+        self.assertTrue((ghosts[1].x, ghosts[1].y) == (3000, 3000))
+
+        ghosts[0].captured = True
+        Rules.ghosts_run_away(world)
+        self.assertTrue((ghosts[0].x, ghosts[0].y) == expected)
+
+        self.reset()
+
+    def test_score_bases(self):
+        world = WorldState(1, 3)
+        ghosts = [Ghost(i, world) for i in range(3)]
+        ghosts[0].x, ghosts[0].y = 500, 500
+        ghosts[1].x, ghosts[1].y = Constants.MAP_WIDTH - 500, Constants.MAP_HEIGHT - 500
+        ghosts[2].x, ghosts[2].y = 600, 600
+        ghosts[2].captured = True
+
+        self.assertTrue(list(Rules.score_bases(world)) == [1, 1])
+        self.assertFalse(ghosts[0].alive)
+        self.assertFalse(ghosts[1].alive)
+        self.assertTrue(ghosts[2].alive)
+        self.assertTrue(list(Rules.score_bases(world)) == [0, 0])
+
+        self.reset()
+
+    def test_resolve_busting(self):
+        """
+        Busting conflicts of a batch : the team with most busters wins and its closest buster (the first one at the same
+        distance) captures, a tie cancels every busting
+        """
+        world = WorldState(2, 2, batch_size=2)
+        world.x[:, world.busters] = [[8000, 8000, 8000, 9000]] * 2
+        world.y[:, world.busters] = 4500
+        world.x[:, world.ghosts] = 8500
+        world.y[:, world.ghosts] = 4500
+        world.alive[:, world.ghosts] = True
+        world.action[:, world.busters] = Constants.ACTION_BUSTING
+        world.moved()
+
+        # Game 0 : 2 busters of team 0 against 1 on ghost 0, game 1 : 1 against 1 on ghost 1
+        world.value[:, world.busters] = [[0, 0, 0, -1], [-1, 1, 1, -1]]
+        world.value[:, world.ghosts] = [[3, 0], [0, 2]]
+
+        self.assertTrue(np.array_equal(Rules.resolve_busting(world), [[1, 0], [0, 0]]))
+        self.assertTrue(list(world.state[0, world.busters]) == [Constants.STATE_BUSTER_CARRYING, 0, 0, 0])
+        self.assertTrue(list(world.value[0, world.busters]) == [0, -1, -1, -1])
+        self.assertTrue(list(world.captured[0, world.ghosts]) == [True, False])
+        self.assertTrue((world.x[0, world.ghosts][0], world.y[0, world.ghosts][0]) == (8000, 4500))
+
+        self.assertTrue(list(world.value[1, world.busters]) == [-1, -1, -1, -1])
+        self.assertTrue(list(world.action[1, world.busters]) == [Constants.ACTION_BUSTING, 0, 0,
+                                                                 Constants.ACTION_BUSTING])
+        self.assertTrue(list(world.value[1, world.ghosts]) == [0, Constants.VALUE_GHOST_BASIC])
+        self.assertFalse(world.captured[1, world.ghosts].any())
+
+        self.reset()
+
+    def test_ghost_counters(self):
+        """
+        The alive and carried counters follow the entities, the rules, the games of a batch and the restored snapshots
+        """
+        world = WorldState(1, 3)
+        busters = [Buster(Constants.TYPE_BUSTER_TEAM_0, 0, world), Buster(Constants.TYPE_BUSTER_TEAM_1, 0, world)]
+        ghosts = [Ghost(i, world) for i in range(3)]
+        snapshot = world.snapshot()
+        self.assertTrue((world.count_alive(), world.count_captured(), world.count_free()) == (3, 0, 3))
+
+        ghosts[0].captured = True
+        ghosts[0].captured = True
+        ghosts[1].kill()
+        self.assertTrue((world.count_alive(), world.count_captured(), world.count_free()) == (2, 1, 1))
+
+        ghosts[2].x, ghosts[2].y = 500, 500
+        self.assertTrue(list(Rules.score_bases(world)) == [1, 0])
+        self.assertTrue((world.count_alive(), world.count_captured(), world.count_free()) == (1, 1, 0))
+
+        world.restore(snapshot)
+        self.assertTrue((world.count_alive(), world.count_captured()) == (3, 0))
+
+        batch = WorldState(1, 3, batch_size=2)
+        batch.alive[1, batch.ghosts] = [True, False, False]
+        batch.recount()
+        game = batch.game(1)
+        self.assertTrue(list(batch.count_alive()) == [3, 1] and game.count_alive() == 1)
+        Ghost.view(game, game.ghost_slot(0), 0).alive = False
+        self.assertTrue(list(batch.count_alive()) == [3, 0])
+        batch.clear([1])
+        self.assertTrue(list(batch.count_alive()) == [3, 3] and game.count_alive() == 3)
+
+        self.reset()
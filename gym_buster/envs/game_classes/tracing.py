@@ -0,0 +1,153 @@
+import sys
+
+import numpy as np
+
+
+class Trace:
+    """
+    Class that will handle the tracing of the simulation events
+
+    Tracing is disabled by default. Each category has its own level and a call site checks it before recording, so a
+    disabled category only costs a comparison. Events are written without any formatting in a preallocated ring
+    buffer, the text is only built when the buffer is dumped.
+    """
+
+    # Levels
+    DEBUG = 10
+    INFO = 20
+    OFF = 100
+    LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO'}
+
+    # Categories
+    ENV = 0
+    BUSTER = 1
+    GHOST = 2
+    AI = 3
+    CATEGORY_NAMES = ('env', 'buster', 'ghost', 'ai')
+
+    # Level of each category, read by the call sites
+    env = OFF
+    buster = OFF
+    ghost = OFF
+    ai = OFF
+
+    # Events and their text when dumped
+    EVENT_INIT = 0
+    EVENT_RESET = 1
+    EVENT_STEP = 2
+    EVENT_SCORE = 3
+    EVENT_GHOSTS = 4
+    EVENT_NOTHING_TO_BUST = 5
+    EVENT_MOVE = 6
+    EVENT_RELEASE = 7
+    EVENT_NOTHING_TO_RELEASE = 8
+    EVENT_BUST = 9
+    EVENT_BUST_FAILED = 10
+    EVENT_BUST_CANCELLED = 11
+    EVENT_CAPTURE = 12
+    EVENT_GHOST_BUST_CANCELLED = 13
+    EVENT_AI_CARRYING = 14
+    EVENTS = {
+        EVENT_INIT: "Initializing environment ...",
+        EVENT_RESET: "Resetting environment...",
+        EVENT_STEP: "--------- STEP {entity} -----------",
+        EVENT_SCORE: "Score team 0 : {a:g}, Score team 1 : {b:g}",
+        EVENT_GHOSTS: "Captured : {a:g}, Alive : {b:g}",
+        EVENT_NOTHING_TO_BUST: "Buster {entity} team {team} try busting but nothing happened",
+        EVENT_MOVE: "Buster team {team} with id {entity} moving to X: {a:g}, Y: {b:g}",
+        EVENT_RELEASE: "Buster team {team} with id {entity} releasing ghost id : {a:g} at X: {b:g}, Y: {c:g}",
+        EVENT_NOTHING_TO_RELEASE: "Buster team {team} with id {entity} has nothing to release",
+        EVENT_BUST: "Buster team {team} with id {entity} busting ghost id : {a:g}",
+        EVENT_BUST_FAILED: "Buster team {team} with id {entity} failed busting",
+        EVENT_BUST_CANCELLED: "Buster team {team} with id {entity} cancelled busting",
+        EVENT_CAPTURE: "Buster team {team} with id {entity} captured ghost id : {a:g}",
+        EVENT_GHOST_BUST_CANCELLED: "Ghost {entity} cancelling busting",
+        EVENT_AI_CARRYING: "Buster {entity} carrying a ghost.",
+    }
+
+    DTYPE = np.dtype([('sequence', np.int64), ('category', np.int8), ('level', np.int8), ('event', np.int16),
+                      ('team', np.int8), ('entity', np.int64), ('a', np.float64), ('b', np.float64),
+                      ('c', np.float64)])
+
+    # Number of events kept by the ring buffer allocated at the first record when configure() was not called
+    CAPACITY = 65536
+
+    buffer = None
+    count = 0
+
+    @classmethod
+    def configure(cls, level=DEBUG, categories=CATEGORY_NAMES, capacity=CAPACITY):
+        """
+        Enable the tracing and allocate an empty ring buffer
+        :param level: the minimum level of the recorded events
+        :param categories: the names of the categories to record
+        :param capacity: the number of events kept, the oldest events are overwritten
+        """
+        cls.buffer = np.zeros(capacity, dtype=cls.DTYPE)
+        cls.count = 0
+        for name in cls.CATEGORY_NAMES:
+            setattr(cls, name, level if name in categories else cls.OFF)
+
+    @classmethod
+    def disable(cls):
+        """
+        Disable the tracing of every category, the recorded events are kept
+        """
+        for name in cls.CATEGORY_NAMES:
+            setattr(cls, name, cls.OFF)
+
+    @classmethod
+    def record(cls, category, level, event, team=0, entity=0, a=0, b=0, c=0):
+        """
+        Write an event in the ring buffer, the call site has to check the level of its category first
+        The ring buffer is allocated at the first event when a category was enabled without configure()
+        :param category: the category of the event
+        :param level: the level of the event
+        :param event: the event
+        :param team: the team of the entity
+        :param entity: the id of the entity (or the step number)
+        :param a: first value of the event
+        :param b: second value of the event
+        :param c: third value of the event
+        """
+        if cls.buffer is None:
+            cls.buffer = np.zeros(cls.CAPACITY, dtype=cls.DTYPE)
+            cls.count = 0
+        cls.buffer[cls.count % len(cls.buffer)] = (cls.count, category, level, event, team, entity, a, b, c)
+        cls.count += 1
+
+    @classmethod
+    def events(cls):
+        """
+        Function that gives the recorded events still in the ring buffer, oldest first
+        :return: a structured array of Trace.DTYPE
+        """
+        if cls.buffer is None:
+            return np.zeros(0, dtype=cls.DTYPE)
+        capacity = len(cls.buffer)
+        if cls.count <= capacity:
+            return cls.buffer[:cls.count].copy()
+        start = cls.count % capacity
+        return np.concatenate([cls.buffer[start:], cls.buffer[:start]])
+
+    @classmethod
+    def format(cls, event):
+        """
+        Function that gives the text of an event
+        :param event: a recorded event
+        :return: a string
+        """
+        text = cls.EVENTS[int(event['event'])].format(team=int(event['team']), entity=int(event['entity']),
+                                                       a=event['a'], b=event['b'], c=event['c'])
+        return '{} [{}] {}: {}'.format(int(event['sequence']), cls.LEVEL_NAMES[int(event['level'])],
+                                       cls.CATEGORY_NAMES[int(event['category'])], text)
+
+    @classmethod
+    def dump(cls, stream=None):
+        """
+        Write the text of the recorded events
+        :param stream: the stream to write in, the standard output if not given
+        """
+        stream = stream or sys.stdout
+        for event in cls.events():
+            stream.write(cls.format(event) + '\n')
@@ -0,0 +1,437 @@
+import numpy as np
+
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.game_config import GameConfig
+from gym_buster.envs.game_classes.math_utils import MathUtility
+from gym_buster.envs.game_classes.spatial_grid import SpatialGrid
+
+
+class WorldState:
+    """
+    Class that will hold the whole game state in contiguous numpy arrays (struct of arrays)
+
+    Every entity of a game owns one slot in each array. Slots are ordered as the busters of team 0, the busters of
+    team 1 and then the ghosts, so a buster or a ghost id can be turned into a slot with a simple offset.
+    Buster and Ghost objects are only views on one slot of these arrays.
+
+    A world state can also hold a batch of independent games, the arrays then have the shape (games, slots) and every
+    function works along the last axis. Every game of a world state follows the same configuration (see GameConfig).
+    """
+
+    FIELDS = ('x', 'y', 'angle', 'type', 'state', 'action', 'value', 'alive', 'captured')
+    FIELD_TYPES = (np.float64, np.float64, np.float64, np.int64, np.int64, np.int64, np.int64, bool, bool)
+
+    # Ghosts of the entities created outside of an environment, shared by every standalone state
+    standalone_ghosts = {}
+
+    def __init__(self, buster_number, ghost_number, batch_size=None, config=None):
+        """
+        Constructor
+        :param buster_number: the number of busters in each team
+        :param ghost_number: the number of ghosts
+        :param batch_size: the number of games, a single game without batch axis if not given
+        :param config: the map size and rule constants, GameConfig.DEFAULT if not given
+        """
+        self.config = GameConfig.DEFAULT if config is None else config
+        self.buster_number = buster_number
+        self.ghost_number = ghost_number
+        self.size = 2 * buster_number + ghost_number
+        self.batch_size = batch_size
+        shape = (self.size,) if batch_size is None else (batch_size, self.size)
+
+        # Slices of each kind of entity in the arrays
+        self.team_0 = slice(0, buster_number)
+        self.team_1 = slice(buster_number, 2 * buster_number)
+        self.busters = slice(0, 2 * buster_number)
+        self.ghosts = slice(2 * buster_number, self.size)
+
+        # Every array is a view on a single block of memory, so the whole state is copied at once (see snapshot)
+        self.shape = shape
+        count = int(np.prod(shape))
+        self._bind(np.empty(sum(count * np.dtype(dtype).itemsize for dtype in self.FIELD_TYPES), dtype=np.uint8))
+
+        self.type[..., self.team_0] = Constants.TYPE_BUSTER_TEAM_0
+        self.type[..., self.team_1] = Constants.TYPE_BUSTER_TEAM_1
+        self.type[..., self.ghosts] = Constants.TYPE_GHOST
+        self._buster_distances = None
+
+        # Number of ghosts still in game and carried by a buster in each game, kept up to date by every change of the
+        # alive and captured flags so the ghosts left are known without scanning them (see count_alive)
+        self.ghosts_alive = np.zeros(shape[:-1], dtype=np.int64)
+        self.ghosts_carried = np.zeros(shape[:-1], dtype=np.int64)
+        self.clear()
+
+        # Ghost objects of this state indexed by id
+        self.ghost_registry = {}
+
+    def _bind(self, storage):
+        """
+        Function that makes every array of the state a view on a block of memory
+        :param storage: the block of memory, an array of bytes
+        """
+        self.storage = storage
+        offset = 0
+        for name, dtype in zip(self.FIELDS, self.FIELD_TYPES):
+            end = offset + int(np.prod(self.shape)) * np.dtype(dtype).itemsize
+            setattr(self, name, storage[offset:end].view(dtype).reshape(self.shape))
+            offset = end
+
+    @classmethod
+    def from_snapshots(cls, buster_number, ghost_number, snapshots, config=None):
+        """
+        Function that gathers snapshots of single games in a batch, the same snapshot can be given several times
+        :param buster_number: the number of busters in each team
+        :param ghost_number: the number of ghosts
+        :param snapshots: a sequence of arrays given by snapshot() of single games
+        :param config: the configuration of the games, GameConfig.DEFAULT if not given
+        :return: a world state holding a batch of games
+        """
+        snapshots = np.asarray(snapshots)
+        world = cls(buster_number, ghost_number, len(snapshots), config)
+        offset = 0
+        for name, dtype in zip(cls.FIELDS, cls.FIELD_TYPES):
+            end = offset + world.size * np.dtype(dtype).itemsize
+            getattr(world, name)[...] = snapshots[:, offset:end].view(dtype)
+            offset = end
+        world.moved()
+        world.recount()
+        return world
+
+    def game_snapshots(self):
+        """
+        Function that gives the snapshot of every game of a batch, see from_snapshots
+        :return: an array of shape (games, bytes), each line can be restored in a state of a single game
+        """
+        return np.concatenate([getattr(self, name).view(np.uint8) for name in self.FIELDS], axis=-1)
+
+    def copy(self):
+        """
+        Function that gives an independent copy of the state, without the ghost objects
+        :return: a world state
+        """
+        world = WorldState.__new__(WorldState)
+        world.__dict__.update(self.__dict__)
+        world.ghost_registry = {}
+        world.ghosts_alive = self.ghosts_alive.copy()
+        world.ghosts_carried = self.ghosts_carried.copy()
+        if self.storage is not None:
+            world._bind(self.storage.copy())
+        else:
+            for name in self.FIELDS:
+                setattr(world, name, getattr(self, name).copy())
+        return world
+
+    @classmethod
+    def standalone(cls):
+        """
+        Function that gives a state with a single slot, used by entities created outside of an environment
+        :return: a world state
+        """
+        world = cls(0, 1)
+        world.ghost_registry = cls.standalone_ghosts
+        return world
+
+    def clear(self, games=None):
+        """
+        Function that puts the entities back to their initial state, busters in their base and ghosts in the middle
+        :param games: the games to clear (indexes or boolean mask) when the state holds a batch, all games if not given
+        """
+        rows = Ellipsis if games is None else games
+        config = self.config
+
+        self.x[rows, self.team_0] = 50
+        self.y[rows, self.team_0] = 50
+        self.x[rows, self.team_1] = config.map_width - 50
+        self.y[rows, self.team_1] = config.map_height - 50
+        self.x[rows, self.ghosts] = config.map_width / 2
+        self.y[rows, self.ghosts] = config.map_height / 2
+        self.angle[rows] = 0
+        self.state[rows] = Constants.STATE_BUSTER_NOTHING
+        self.action[rows] = Constants.ACTION_NOTHING
+        self.value[rows, self.busters] = Constants.VALUE_BUSTER_NOTHING
+        self.value[rows, self.ghosts] = Constants.VALUE_GHOST_BASIC
+        self.alive[rows] = True
+        self.captured[rows] = False
+        self.ghosts_alive[rows] = self.ghost_number
+        self.ghosts_carried[rows] = 0
+        self.moved()
+
+    def spawn_ghosts(self, rng, games=None):
+        """
+        Function that draws a random position outside of the bases for every ghost, all positions of a draw at once
+        :param rng: the numpy random generator
+        :param games: the games to spawn (boolean mask) when the state holds a batch, all games if not given
+        """
+        rows = Ellipsis if games is None else games
+        config = self.config
+        ghost_x = self.x[rows, self.ghosts]
+        ghost_y = self.y[rows, self.ghosts]
+        pending = np.ones(ghost_x.shape, dtype=bool)
+        while pending.any():
+            number = np.count_nonzero(pending)
+            ghost_x[pending] = rng.integers(0, config.map_width, size=number, endpoint=True)
+            ghost_y[pending] = rng.integers(0, config.map_height, size=number, endpoint=True)
+            pending = (np.hypot(ghost_x, ghost_y) < config.base_range) | (
+                np.hypot(config.map_width - ghost_x, config.map_height - ghost_y) < config.base_range)
+
+        self.x[rows, self.ghosts] = ghost_x
+        self.y[rows, self.ghosts] = ghost_y
+        self.moved()
+
+    def snapshot(self):
+        """
+        Function that copies the whole state in a single array
+        :return: an array of bytes, see restore
+        """
+        return self.storage.copy()
+
+    def restore(self, snapshot):
+        """
+        Function that puts the state back as it was when a snapshot was taken, entity views stay valid
+        :param snapshot: an array given by snapshot() of a state with the same numbers of entities
+        """
+        self.storage[:] = snapshot
+        self.moved()
+        self.recount()
+
+    def game(self, index):
+        """
+        Function that gives the state of one game of the batch, sharing the memory of the batch
+        :param index: the index of the game
+        :return: a world state without batch axis
+        """
+        world = WorldState.__new__(WorldState)
+        world.__dict__.update(self.__dict__)
+        world.batch_size = None
+        world.shape = (self.size,)
+        world.storage = None
+        world.ghost_registry = {}
+        world._buster_distances = None
+        world.ghosts_alive = self.ghosts_alive[index, ...]
+        world.ghosts_carried = self.ghosts_carried[index, ...]
+        for name in self.FIELDS:
+            setattr(world, name, getattr(self, name)[index])
+        return world
+
+    # -------------- SLOT FUNCTIONS ---------------- #
+
+    def buster_slot(self, team, ids):
+        """
+        Function that gives the slot of a buster
+        :param team: the team of the buster
+        :param ids: the id of the buster in its team
+        :return: the slot index
+        """
+        if team == Constants.TYPE_BUSTER_TEAM_0:
+            return ids
+        elif team == Constants.TYPE_BUSTER_TEAM_1:
+            return self.buster_number + ids
+        raise ValueError("Entity neither in team 0 or team 1")
+
+    def ghost_slot(self, ids):
+        """
+        Function that gives the slot of a ghost
+        :param ids: the id of the ghost
+        :return: the slot index
+        """
+        return 2 * self.buster_number + ids
+
+    def register_ghost(self, ghost):
+        """
+        Function that registers a ghost object so it can be found from its id
+        :param ghost: the ghost
+        """
+        self.ghost_registry[ghost.id] = ghost
+
+    def get_ghost(self, ids):
+        """
+        Function that gives the ghost object with an id
+        :param ids: the id of the ghost
+        :return: a ghost or None if no ghost has this id
+        """
+        return self.ghost_registry.get(ids)
+
+    # -------------- END SLOT FUNCTIONS ---------------- #
+
+    # -------------- QUERY FUNCTIONS ---------------- #
+
+    def free_ghosts(self):
+        """
+        Function that gives the mask of ghosts that are alive and not carried by a buster
+        :return: a boolean array over the ghosts
+        """
+        return self.alive[..., self.ghosts] & ~self.captured[..., self.ghosts]
+
+    def count_captured(self):
+        """
+        Function that gives the number of ghosts carried by a buster, read from the counters
+        :return: a number, or an array with a number per game
+        """
+        return int(self.ghosts_carried) if self.batch_size is None else self.ghosts_carried.copy()
+
+    def count_alive(self):
+        """
+        Function that gives the number of ghosts still in game, read from the counters
+        :return: a number, or an array with a number per game
+        """
+        return int(self.ghosts_alive) if self.batch_size is None else self.ghosts_alive.copy()
+
+    def count_free(self):
+        """
+        Function that gives the number of ghosts in game that no buster carries, read from the counters
+        :return: a number, or an array with a number per game
+        """
+        free = self.ghosts_alive - self.ghosts_carried
+        return int(free) if self.batch_size is None else free
+
+    def recount(self):
+        """
+        Function that computes the ghost counters from the arrays, to call after writing the alive or captured flags
+        in the arrays. Entity views and the rules update the counters themselves
+        """
+        self.ghosts_alive[...] = np.count_nonzero(self.alive[..., self.ghosts], axis=-1)
+        self.ghosts_carried[...] = np.count_nonzero(self.captured[..., self.ghosts], axis=-1)
+
+    def distances(self, sources, targets):
+        """
+        Function that gives the distance matrix between two groups of entities
+        Distances from busters are read from the buster distance matrix, computed once until an entity moves
+        :param sources: the slice of the first group
+        :param targets: the slice of the second group
+        :return: a read only array of shape (sources, targets), with the batch axis first if any
+        """
+        if sources.stop <= self.busters.stop:
+            return self.buster_distances()[..., sources, targets]
+        return self._compute_distances(sources, targets)
+
+    def buster_distances(self):
+        """
+        Function that gives the distances from every buster to every entity
+        The matrix is kept until moved() is called, so every phase of a round and the AI share it
+        :return: a read only array of shape (busters, slots), with the batch axis first if any
+        """
+        if self._buster_distances is None:
+            self._buster_distances = self._compute_distances(self.busters, slice(0, self.size))
+            self._buster_distances.flags.writeable = False
+        return self._buster_distances
+
+    def distance(self, slot, other):
+        """
+        Function that gives the distance between two entities of a single game, read from the buster distance matrix
+        when it is up to date
+        :param slot: the slot of the first entity
+        :param other: the slot of the second entity
+        :return: the distance
+        """
+        if self._buster_distances is not None:
+            if slot < self.busters.stop:
+                return self._buster_distances.item(slot, other)
+            if other < self.busters.stop:
+                return self._buster_distances.item(other, slot)
+        return MathUtility.distance(self.x.item(slot), self.y.item(slot), self.x.item(other), self.y.item(other))
+
+    def moved(self):
+        """
+        Function to call after writing positions in the arrays, it drops the distances computed before
+        Entity views do it themselves when their position is set
+        """
+        self._buster_distances = None
+
+    def _compute_distances(self, sources, targets):
+        """
+        Function that computes the distance matrix between two groups of entities
+        :param sources: the slice of the first group
+        :param targets: the slice of the second group
+        :return: an array of shape (sources, targets), with the batch axis first if any
+        """
+        dx = self.x[..., sources, None] - self.x[..., None, targets]
+        dy = self.y[..., sources, None] - self.y[..., None, targets]
+        return np.sqrt(dx * dx + dy * dy)
+
+    def nearest(self, sources, targets, number, mask=None):
+        """
+        Function that gives the closest targets of every entity of sources, sorted by distance in a single pass
+        Targets at the same distance are sorted by id
+        :param sources: the slice of the entities from which we compute
+        :param targets: the slice of the targets
+        :param number: the number of targets to give for each source
+        :param mask: the boolean array over the targets that can be given, every target if not given
+        :return: the tuple (ids, distances) of arrays of shape (sources, number), with the batch axis first if any. Ids
+        are along the targets, the distance is infinite (and the id 0) when there are no more targets
+        """
+        dist = self.distances(sources, targets)
+        if mask is not None:
+            dist = np.where(mask[..., None, :], dist, np.inf)
+        if dist.shape[-1] < number:
+            padding = np.full(dist.shape[:-1] + (number - dist.shape[-1],), np.inf)
+            dist = np.concatenate([dist, padding], axis=-1)
+
+        if number < dist.shape[-1]:
+            ids = np.argpartition(dist, number - 1, axis=-1)[..., :number]
+        else:
+            ids = np.broadcast_to(np.arange(number), dist.shape).copy()
+        dist = np.take_along_axis(dist, ids, axis=-1)
+        order = np.lexsort((ids, dist), axis=-1)
+        ids = np.take_along_axis(ids, order, axis=-1)
+        dist = np.take_along_axis(dist, order, axis=-1)
+        ids[np.isinf(dist)] = 0
+        return ids, dist
+
+    def grid(self, sources, targets):
+        """
+        Function that indexes the current positions of a group of entities for radius queries from another group
+        :param sources: the slice of the entities from which the queries are done
+        :param targets: the slice of the entities to index
+        :return: a SpatialGrid that has to be built again when the entities move, or None when the groups are small
+        enough to compare every pair
+        """
+        pairs = self.x[..., sources].size * (targets.stop - targets.start)
+        if pairs < SpatialGrid.MIN_PAIRS:
+            return None
+        return SpatialGrid(self.x[..., targets], self.y[..., targets], self.config.range_vision, self.config.map_width,
+                           self.config.map_height)
+
+    def visible(self, sources, targets, grid=None):
+        """
+        Function that gives the mask of targets seen by at least one entity of sources
+        :param sources: the slice of the entities from which we compute
+        :param targets: the slice of the targets we want to know which are in range
+        :param grid: the grid of the targets at their current positions, see grid()
+        :return: a boolean array over the targets
+        """
+        if grid is None:
+            grid = self.grid(sources, targets)
+        if grid is None:
+            return (self.distances(sources, targets) < self.config.range_vision).any(axis=-2)
+        return grid.in_range(self.x[..., sources], self.y[..., sources])
+
+    # -------------- END QUERY FUNCTIONS ---------------- #
+
+
+class StateField:
+    """
+    Descriptor that exposes one array of the world state as an attribute of an entity view
+    """
+
+    def __init__(self, name):
+        """
+        Constructor
+        :param name: the name of the array in the world state
+        """
+        self.name = name
+        self.position = name in ('x', 'y')
+        self.counter = {'alive': 'ghosts_alive', 'captured': 'ghosts_carried'}.get(name)
+
+    def __get__(self, entity, owner):
+        if entity is None:
+            return self
+        return getattr(entity._world, self.name).item(entity._slot)
+
+    def __set__(self, entity, value):
+        world = entity._world
+        array = getattr(world, self.name)
+        if self.counter is not None and entity._slot >= world.ghosts.start:
+            getattr(world, self.counter)[...] += bool(value) - array.item(entity._slot)
+        array[entity._slot] = value
+        if self.position:
+            world._buster_distances = None
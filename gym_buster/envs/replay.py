@@ -0,0 +1,196 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from gym_buster.envs.buster_env import BusterEnv
+from gym_buster.envs.game_classes.constants import Constants
+from gym_buster.envs.game_classes.game_config import GameConfig
+
+
+class ReplayWriter:
+    """
+    Class that will record the episodes of a BusterEnv in a compact replay file
+
+    A game only depends on the seed of its episode and on the commands of both teams, so an episode is saved as its
+    seed and the integer commands of every step (see Commands), compressed. The file is :
+    - a header : the numbers of entities, the number of steps of a game and the configuration of the games
+    - the episodes, one after the other
+    - an index giving the place, the seed, the number of steps and the scores of every episode
+    - a footer giving the place of the index, so an episode is read without reading the ones before it
+
+    The index is written by close(), an environment being recorded must not be restored from a snapshot.
+    """
+
+    MAGIC = b'GBRP'
+    VERSION = 1
+    # magic, version, buster_number, ghost_number, max_steps, size of the configuration
+    HEADER = struct.Struct('<4sHHIII')
+    # place of the index, number of episodes, magic
+    FOOTER = struct.Struct('<QI4s')
+    INDEX_DTYPE = np.dtype([('offset', '<u8'), ('size', '<u4'), ('seed', '<u8', (2,)), ('steps', '<u4'),
+                            ('score_0', '<i4'), ('score_1', '<i4')])
+    COMMAND_DTYPE = np.dtype('<i4')
+
+    def __init__(self, path, environment):
+        """
+        Constructor, the episodes of the environment are recorded from its next reset
+        :param path: the path of the replay file, overwritten
+        :param environment: the BusterEnv to record
+        """
+        self.environment = environment
+        self.file = open(path, 'wb')
+        config = json.dumps(environment.config.as_dict()).encode()
+        self.file.write(self.HEADER.pack(self.MAGIC, self.VERSION, environment.buster_number,
+                                         environment.ghost_number, environment.max_steps, len(config)))
+        self.file.write(config)
+
+        # Commands of the current episode : (steps, team, buster, command), grown when a game lasts longer
+        self.commands = np.empty((environment.max_steps + 1, 2, environment.buster_number, Constants.COMMAND_SIZE),
+                                 dtype=self.COMMAND_DTYPE)
+        self.steps = 0
+        self.seed = None
+        self.index = []
+        environment.recorder = self
+
+    def begin_episode(self, environment):
+        """
+        Start recording an episode, called by the environment once reset
+        :param environment: the environment
+        """
+        self.seed = environment.episode_seed
+        self.steps = 0
+
+    def record(self, commands_0, commands_1):
+        """
+        Record the commands of a step, called by the environment
+        :param commands_0: the commands array of team 0
+        :param commands_1: the commands array of team 1
+        """
+        if self.steps == len(self.commands):
+            self.commands = np.concatenate((self.commands, np.empty_like(self.commands)))
+        self.commands[self.steps, 0] = commands_0
+        self.commands[self.steps, 1] = commands_1
+        self.steps += 1
+
+    def end_episode(self, environment):
+        """
+        Write the current episode, called by the environment before a reset
+        :param environment: the environment
+        """
+        if self.seed is None:
+            return
+        if not 0 <= self.seed < 2 ** 128:
+            raise ValueError("Seed out of the replay format : " + str(self.seed))
+
+        data = zlib.compress(self.commands[:self.steps].tobytes())
+        self.index.append((self.file.tell(), len(data), (self.seed & (2 ** 64 - 1), self.seed >> 64), self.steps,
+                           environment.score_team0, environment.score_team1))
+        self.file.write(data)
+        self.seed = None
+
+    def close(self):
+        """
+        Write the current episode and the index, and stop recording
+        """
+        if self.file.closed:
+            return
+        self.end_episode(self.environment)
+        offset = self.file.tell()
+        self.file.write(np.array(self.index, dtype=self.INDEX_DTYPE).tobytes())
+        self.file.write(self.FOOTER.pack(offset, len(self.index), self.MAGIC))
+        self.file.close()
+        self.environment.recorder = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+class ReplayReader:
+    """
+    Class that will read a replay file written by ReplayWriter and replay its episodes
+
+    Only the header and the index are read when the file is opened, an episode is read when it is replayed.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor
+        :param path: the path of the replay file
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            magic, version, self.buster_number, self.ghost_number, self.max_steps, size = ReplayWriter.HEADER.unpack(
+                file.read(ReplayWriter.HEADER.size))
+            if magic != ReplayWriter.MAGIC or version != ReplayWriter.VERSION:
+                raise ValueError("Not a replay file : " + str(path))
+            self.config = GameConfig(**json.loads(file.read(size)))
+
+            file.seek(-ReplayWriter.FOOTER.size, 2)
+            offset, episodes, magic = ReplayWriter.FOOTER.unpack(file.read(ReplayWriter.FOOTER.size))
+            if magic != ReplayWriter.MAGIC:
+                raise ValueError("Replay file without index, it was not closed : " + str(path))
+            file.seek(offset)
+            self.index = np.frombuffer(file.read(episodes * ReplayWriter.INDEX_DTYPE.itemsize),
+                                       dtype=ReplayWriter.INDEX_DTYPE)
+
+    def __len__(self):
+        return len(self.index)
+
+    def seed(self, episode):
+        """
+        Function that gives the seed of an episode
+        :param episode: the number of the episode in the file
+        :return: the seed
+        """
+        low, high = self.index[episode]['seed']
+        return int(low) | int(high) << 64
+
+    def scores(self, episode):
+        """
+        Function that gives the scores of an episode when it was recorded
+        :param episode: the number of the episode in the file
+        :return: the tuple (score of team 0, score of team 1)
+        """
+        return int(self.index[episode]['score_0']), int(self.index[episode]['score_1'])
+
+    def commands(self, episode):
+        """
+        Function that reads the commands of an episode
+        :param episode: the number of the episode in the file
+        :return: an array of shape (steps, 2, buster_number, Constants.COMMAND_SIZE), the commands of team 0 then the
+        ones of team 1 of each step
+        """
+        entry = self.index[episode]
+        with open(self.path, 'rb') as file:
+            file.seek(int(entry['offset']))
+            data = zlib.decompress(file.read(int(entry['size'])))
+        commands = np.frombuffer(data, dtype=ReplayWriter.COMMAND_DTYPE).astype(np.int64)
+        return commands.reshape(int(entry['steps']), 2, self.buster_number, Constants.COMMAND_SIZE)
+
+    def replay(self, episode=0, until=None, callback=None):
+        """
+        Function that plays an episode again, headless and without building the observations of the steps
+        :param episode: the number of the episode in the file
+        :param until: the number of steps to play, every step of the episode if not given
+        :param callback: a function called with the environment after each step, to look at the game at every tick
+        :return: the environment after the last step played, with its state and observation
+        """
+        environment = BusterEnv(self.buster_number, self.ghost_number, max_steps=self.max_steps, config=self.config)
+        environment.reset(seed=self.seed(episode))
+        world = environment.world
+        for commands_0, commands_1 in self.commands(episode)[:until]:
+            environment.current_step += 1
+            environment._run_step(commands_0, commands_1)
+            environment.game_over = world.count_alive() == 0
+            if callback is not None:
+                callback(environment)
+
+        environment.state = environment._get_state()
+        environment.previous_observation = environment.observation
+        environment.observation = environment._make_observation()
+        return environment
@@ -0,0 +1,217 @@
+import ctypes
+import multiprocessing
+import os
+
+import numpy as np
+
+from gym import spaces
+from gym.utils import seeding
+
+from gym_buster.envs.buster_env import BusterEnv
+
+
+def _shared_array(context, ctype, dtype, shape):
+    """
+    Function that allocates a shared memory block and its numpy view
+    :param context: the multiprocessing context
+    :param ctype: the ctypes type of an element
+    :param dtype: the numpy type of an element
+    :param shape: the shape of the array
+    :return: the tuple (shared block, array)
+    """
+    block = context.RawArray(ctype, int(np.prod(shape)))
+    return block, np.frombuffer(block, dtype=dtype).reshape(shape)
+
+
+def _worker(remote, parent_remote, env_fn, indexes, blocks, shapes):
+    """
+    Function run by each worker process, it steps its environments and writes the results in the shared memory
+    :param remote: the pipe end of the worker
+    :param parent_remote: the pipe end of the parent, closed in the worker
+    :param env_fn: the function creating an environment
+    :param indexes: the indexes of the environments owned by the worker
+    :param blocks: the shared blocks (actions, observations, terminal observations, rewards, dones)
+    :param shapes: the shapes of the shared blocks
+    """
+    parent_remote.close()
+    actions, observations, terminal_observations, rewards, dones = [
+        np.frombuffer(block, dtype=dtype).reshape(shape) for block, (dtype, shape) in zip(blocks, shapes)]
+    envs = [env_fn() for _ in indexes]
+
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == 'step':
+                for i, env in zip(indexes, envs):
+                    observation, reward, done, _ = env.step(actions[i])
+                    if done:
+                        terminal_observations[i] = observation
+                        observation = env.reset()
+                    observations[i] = observation
+                    rewards[i] = reward
+                    dones[i] = done
+                remote.send(None)
+            elif command == 'reset':
+                for i, env in zip(indexes, envs):
+                    observations[i] = env.reset()
+                remote.send(None)
+            elif command == 'seed':
+                remote.send([env.seed(data + i)[0] for i, env in zip(indexes, envs)])
+            elif command == 'close':
+                for env in envs:
+                    env.close()
+                remote.send(None)
+                break
+            else:
+                raise ValueError("Wrong command for worker : " + str(command))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        remote.close()
+
+
+class SubprocBusterEnv:
+    """
+    Class that will run a batch of BusterEnv in worker processes
+    Each worker owns several environments and writes observations, rewards and dones straight into shared memory,
+    only small control messages go through the pipes. Games are reset automatically when they are over, the last
+    observation of a game is given in the info dictionary of the game.
+    """
+
+    def __init__(self, batch_size, worker_number=None, env_fn=BusterEnv, start_method=None):
+        """
+        Initialize the workers
+        :param batch_size: the number of environments
+        :param worker_number: the number of worker processes, one per core if not given
+        :param env_fn: the function creating an environment, must be picklable with the spawn start method
+        :param start_method: the multiprocessing start method, the platform default if not given
+        """
+        env = env_fn()
+        self.single_observation_space = env.observation_space
+        self.single_action_space = env.action_space
+        env.close()
+
+        self.batch_size = batch_size
+        self.worker_number = min(worker_number or os.cpu_count() or 1, batch_size)
+        self.observation_space = self._batch_space(self.single_observation_space)
+        self.action_space = self._batch_space(self.single_action_space)
+        self.waiting = False
+        self.closed = False
+
+        # Shared memory blocks
+        context = multiprocessing.get_context(start_method)
+        observation_shape = (batch_size,) + self.single_observation_space.shape
+        observation_dtype = self.single_observation_space.dtype
+        observation_ctype = np.ctypeslib.as_ctypes_type(observation_dtype)
+        buffers = [
+            _shared_array(context, ctypes.c_double, np.float64, (batch_size,) + self.single_action_space.shape),
+            _shared_array(context, observation_ctype, observation_dtype, observation_shape),
+            _shared_array(context, observation_ctype, observation_dtype, observation_shape),
+            _shared_array(context, ctypes.c_double, np.float64, (batch_size,)),
+            _shared_array(context, ctypes.c_bool, np.bool_, (batch_size,)),
+        ]
+        blocks = [block for block, _ in buffers]
+        shapes = [(array.dtype, array.shape) for _, array in buffers]
+        self._actions, self._observations, self._terminal_observations, self._rewards, self._dones = [
+            array for _, array in buffers]
+
+        # Workers, each one with a contiguous part of the batch
+        self.remotes = []
+        self.processes = []
+        for indexes in np.array_split(np.arange(batch_size), self.worker_number):
+            remote, worker_remote = context.Pipe()
+            process = context.Process(target=_worker,
+                                      args=(worker_remote, remote, env_fn, indexes.tolist(), blocks, shapes),
+                                      daemon=True)
+            process.start()
+            worker_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+    def seed(self, seed=None):
+        """
+        Seed every environment, environment i gets the seed seed + i
+        :param seed: the seed of the first environment, a random one if not given
+        :return: the list of seeds
+        """
+        if seed is None:
+            _, seed = seeding.np_random(None)
+        for remote in self.remotes:
+            remote.send(('seed', seed))
+        return [env_seed for remote in self.remotes for env_seed in remote.recv()]
+
+    def reset(self):
+        """
+        Function to call to reset every environment
+        :return: the observations of the batch
+        """
+        for remote in self.remotes:
+            remote.send(('reset', None))
+        for remote in self.remotes:
+            remote.recv()
+        return self._observations.copy()
+
+    def step_async(self, actions):
+        """
+        Function that starts a step in every environment without waiting for the results
+        The actions are read by the workers from the shared memory, a step has to be waited for with step_wait()
+        before the next one is started
+        :param actions: an array of shape (batch_size, action size)
+        """
+        if self.waiting:
+            raise RuntimeError("A step is already running, call step_wait() before starting another one")
+        self._actions[:] = actions
+        for remote in self.remotes:
+            remote.send(('step', None))
+        self.waiting = True
+
+    def step_wait(self):
+        """
+        Function that waits for the step started by step_async
+        :return: the observations, rewards, dones of the batch and a list of info dictionaries
+        """
+        for remote in self.remotes:
+            remote.recv()
+        self.waiting = False
+
+        dones = self._dones.copy()
+        infos = [{} for _ in range(self.batch_size)]
+        for i in np.flatnonzero(dones):
+            infos[i]['terminal_observation'] = self._terminal_observations[i].copy()
+
+        return self._observations.copy(), self._rewards.copy(), dones, infos
+
+    def step(self, actions):
+        """
+        Function to call to move forward one step in every environment
+        :param actions: an array of shape (batch_size, action size)
+        :return: the observations, rewards, dones of the batch and a list of info dictionaries
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        """
+        Function to call to stop the workers
+        """
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for remote in self.remotes:
+            remote.recv()
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def _batch_space(self, space):
+        """
+        Function that stacks a space for every environment of the batch
+        :param space: the space of one environment
+        :return: the space of the batch
+        """
+        return spaces.Box(np.tile(space.low, (self.batch_size, 1)), np.tile(space.high, (self.batch_size, 1)),
+                          dtype=space.dtype)